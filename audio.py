@@ -0,0 +1,144 @@
+import math
+from array import array
+from typing import Optional
+
+import pygame
+
+from config import SOUNDS, AUDIO_FREQUENCY, AUDIO_BUFFER, AUDIO_CHANNELS, AUDIO_RESERVED, TONES
+
+
+def synthesize(frequency: float, duration: float, volume: float, decay: float) -> Optional[pygame.mixer.Sound]:
+    """
+    It makes a short beep, which is a sine wave that fades out, in the format the mixer was opened with.
+
+    Args:
+      frequency (float): The pitch of the beep in Hz.
+      duration (float): The length of the beep in seconds.
+      volume (float): The loudness at the start of the beep, between 0 and 1.
+      decay (float): How fast it fades out, the higher the faster.
+
+    Returns:
+      pygame.mixer.Sound, optional: The beep, or None if the mixer isn't open with signed 16 bit samples.
+    """
+    rate, size, channels = pygame.mixer.get_init() or (0, 0, 0)
+    if size != -16:
+        return None
+    count = int(rate * duration)
+    samples = array('h', bytes(2 * count * channels))
+    for index in range(count):
+        value = int(32767 * volume * math.exp(-decay * index / count) * math.sin(2 * math.pi * frequency * index / rate))
+        samples[index * channels:(index + 1) * channels] = array('h', [value]) * channels
+    return pygame.mixer.Sound(buffer=samples.tobytes())
+
+
+class AudioEngine:
+    """
+    It plays the sounds of the game through pygame.mixer, without ever blocking the frame loop.
+    All the sounds are decoded once when it is opened, and kept as Sound buffers, so playing one only hands its samples
+    to the mixer. The mixer is opened with a small buffer, so a sound starts within a few ms.
+    The first channels are reserved for the long sounds, like the greetings, and the short ones, like the key presses,
+    take turns on the rest, cutting off the oldest one if all of them are busy.
+    If there is no audio device, it stays closed, and playing a sound does nothing.
+
+    Attributes:
+      sounds (dict): The decoded sounds, by name.
+      channels (list): The channels the short sounds take turns on.
+      reserved (list): The channels of the long sounds.
+      turn (int): The channel of the next short sound.
+      enabled (bool): Weather the mixer could be opened.
+    """
+    def __init__(self) -> None:
+        """
+        All initial configuration for the audio engine is done here, it has to be opened before it plays anything.
+        """
+        self.sounds: dict[str, pygame.mixer.Sound] = {}
+        self.channels: list[pygame.mixer.Channel] = []
+        self.reserved: list[pygame.mixer.Channel] = []
+        self.turn = 0
+        self.enabled = False
+
+    def open(self) -> bool:
+        """
+        It opens the mixer, and decodes all the sounds. It should be called before the window is opened, since
+        pygame.init opens the mixer with a larger buffer otherwise.
+
+        Returns:
+          bool: Weather the mixer could be opened.
+        """
+        pygame.mixer.pre_init(AUDIO_FREQUENCY, -16, 2, AUDIO_BUFFER)
+        try:
+            pygame.mixer.init()
+        except pygame.error:
+            return False
+
+        pygame.mixer.set_num_channels(AUDIO_CHANNELS)
+        pygame.mixer.set_reserved(AUDIO_RESERVED)
+        self.reserved = [pygame.mixer.Channel(index) for index in range(AUDIO_RESERVED)]
+        self.channels = [pygame.mixer.Channel(index) for index in range(AUDIO_RESERVED, AUDIO_CHANNELS)]
+        for name, path in SOUNDS.items():
+            try:
+                self.sounds[name] = pygame.mixer.Sound(path)
+            except (pygame.error, FileNotFoundError):
+                continue
+        for name, tone in TONES.items():
+            if sound := synthesize(*tone):
+                self.sounds[name] = sound
+        self.enabled = True
+        return True
+
+    def play(self, name: str) -> Optional[pygame.mixer.Channel]:
+        """
+        It starts playing a short sound on the next channel, and returns right away.
+
+        Args:
+          name (str): The name of the sound.
+
+        Returns:
+          pygame.mixer.Channel, optional: The channel it is playing on, or None if it couldn't be played.
+        """
+        if not (sound := self.sounds.get(name)) or not self.channels:
+            return None
+        channel = self.channels[self.turn]
+        self.turn = (self.turn + 1) % len(self.channels)
+        channel.play(sound)
+        return channel
+
+    def announce(self, name: str) -> Optional[pygame.mixer.Channel]:
+        """
+        It starts playing a long sound on a reserved channel, stopping the one playing on it, and returns right away.
+
+        Args:
+          name (str): The name of the sound.
+
+        Returns:
+          pygame.mixer.Channel, optional: The channel it is playing on, or None if it couldn't be played.
+        """
+        if not (sound := self.sounds.get(name)) or not self.reserved:
+            return None
+        self.reserved[0].play(sound)
+        return self.reserved[0]
+
+    def length(self, name: str) -> float:
+        """
+        It returns how long a sound is.
+
+        Args:
+          name (str): The name of the sound.
+
+        Returns:
+          float: The length of the sound in seconds, or 0 if it isn't loaded.
+        """
+        return sound.get_length() if (sound := self.sounds.get(name)) else 0.
+
+    def close(self) -> None:
+        """
+        It stops all the sounds and closes the mixer.
+        """
+        if self.enabled:
+            pygame.mixer.quit()
+        self.sounds.clear()
+        self.channels = self.reserved = []
+        self.enabled = False
+
+
+audio = AudioEngine()
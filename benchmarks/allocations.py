@@ -0,0 +1,102 @@
+"""
+Measures how much memory every frame allocates on the menu, login and history scenes, with tracemalloc.
+Scenes which keep their widgets between frames should allocate next to nothing once they are on the screen.
+
+Run it with `python -m benchmarks.allocations`. It uses a throwaway SQLite database, filled with a page of games.
+"""
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+DIRECTORY = tempfile.mkdtemp()
+os.environ['TYPE_RUSH_SQLITE'] = os.path.join(DIRECTORY, 'type_rush.db')
+
+from database_files.bootstrap import Bootstrap
+from database_files.database import Score, User, open_session, wait_until_ready
+from database_files.encoding import encode_samples, summarize
+from mem_hub import mem
+from scenes import get_scene
+from utils import init_display
+
+GAMES = 20
+SAMPLES = [0, 0, 0] + [40 + second % 30 for second in range(60)]
+
+
+class Host:
+    """
+    It stands in for the game, which holds the current scene.
+
+    Attributes:
+      scene (BaseScreen): The scene being measured.
+    """
+    scene = None
+
+
+def prepare() -> None:
+    """
+    It opens the window and the database, and logs in a user who has played a page of games.
+    """
+    init_display()
+    bootstrap = Bootstrap(('sqlite',), os.path.join(DIRECTORY, 'bootstrap.json'))
+    bootstrap.start()
+    wait_until_ready()
+
+    with open_session(expire_on_commit=False) as session:
+        user = User(username='benchmark', password='benchmark')
+        session.add(user)
+        session.add_all(Score(user=user, score=encode_samples(SAMPLES), final_score=100, error_count=0, **summarize(SAMPLES)) for _ in range(GAMES))
+        session.commit()
+    mem.update({'game': Host(), 'user': user})
+
+
+def measure(name: str, warmup: int, frames: int) -> dict[str, float]:
+    """
+    It runs a scene for a number of frames, and measures the memory each frame allocates.
+
+    Args:
+      name (str): The name of the scene in the registry.
+      warmup (int): The number of frames run before measuring, so the caches are filled.
+      frames (int): The number of frames measured.
+
+    Returns:
+      dict[str, float]: The mean and max peak allocation per frame, and the memory kept after all the frames, in KiB.
+    """
+    scene = mem['game'].scene = get_scene(name)()
+    for _ in range(warmup):
+        scene.main_loop()
+
+    peaks = []
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    for _ in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        scene.main_loop()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    kept = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return {'mean': sum(peaks) / len(peaks) / 1024, 'max': max(peaks) / 1024, 'kept': kept / 1024}
+
+
+def main() -> None:
+    """
+    It measures every scene, and prints the allocations per frame.
+    """
+    parser = argparse.ArgumentParser(description='Measures the memory allocated per frame by the scenes.')
+    parser.add_argument('--warmup', type=int, default=30, help='The number of frames run before measuring.')
+    parser.add_argument('--frames', type=int, default=120, help='The number of frames measured.')
+    args = parser.parse_args()
+
+    prepare()
+    print(f'{"scene":<10} {"mean/frame":>11} {"max/frame":>10} {"kept":>9}')
+    for name in 'login', 'game', 'history':
+        result = measure(name, args.warmup, args.frames)
+        print(f'{name:<10} {result["mean"]:>8.2f}KiB {result["max"]:>7.2f}KiB {result["kept"]:>6.2f}KiB')
+
+
+if __name__ == '__main__':
+    main()
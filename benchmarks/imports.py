@@ -0,0 +1,103 @@
+"""
+Breaks down the time it takes to import the game up to its first frame, using `python -X importtime`, and checks it
+against a budget, so that a change which makes the launch slower is caught.
+
+Run it with `python -m benchmarks.imports`. It exits with a non-zero status if the budget is exceeded, or if a module
+which should only be loaded after the login is imported before the first frame.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import NamedTuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+ENTRY = 'import main'
+BUDGET_MS = 800
+DEFERRED = 'game_files.game', 'graphing.history', 'graphing.live', 'graphing.window', 'matplotlib', 'seaborn'
+
+
+class Import(NamedTuple):
+    name: str
+    depth: int
+    self_us: int
+    cumulative_us: int
+
+
+def profile(entry: str) -> list[Import]:
+    """
+    It imports the entry in a fresh interpreter, and parses the timings printed by -X importtime.
+
+    Args:
+      entry (str): The statement which is timed.
+
+    Returns:
+      list[Import]: Every module which was imported, in the order they finished importing.
+    """
+    environment = {**os.environ, 'SDL_VIDEODRIVER': 'dummy', 'SDL_AUDIODRIVER': 'dummy'}
+    command = [sys.executable, '-X', 'importtime', '-c', entry]
+    stderr = subprocess.run(command, cwd=ROOT, env=environment, capture_output=True, text=True, check=True).stderr
+
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.removeprefix('import time:').split('|')
+        imports.append(Import(name.strip(), (len(name) - len(name.lstrip()) - 1) // 2, int(self_us), int(cumulative_us)))
+    return imports
+
+
+def breakdown(imports: list[Import]) -> dict[str, float]:
+    """
+    It adds up the time spent importing each top level package, including everything it imported which wasn't
+    already loaded.
+
+    Args:
+      imports (list[Import]): The parsed timings.
+
+    Returns:
+      dict[str, float]: The time spent on each top level package in ms, from the slowest to the fastest.
+    """
+    packages: dict[str, float] = defaultdict(float)
+    for module in imports:
+        packages[module.name.partition('.')[0]] += module.self_us / 1e3
+    return dict(sorted(packages.items(), key=lambda item: -item[1]))
+
+
+def main() -> None:
+    """
+    It profiles the imports, prints the breakdown, and checks the budget.
+    """
+    parser = argparse.ArgumentParser(description='Breaks down the import time of the game up to its first frame.')
+    parser.add_argument('--entry', default=ENTRY, help='The statement which is timed.')
+    parser.add_argument('--budget', type=float, default=BUDGET_MS, help='The maximum total import time in ms.')
+    parser.add_argument('--top', type=int, default=15, help='The number of packages shown.')
+    parser.add_argument('--json', metavar='PATH', help='Also saves the breakdown to a JSON file.')
+    args = parser.parse_args()
+
+    imports = profile(args.entry)
+    total = sum(module.self_us for module in imports) / 1e3
+    packages = breakdown(imports)
+    loaded = {module.name for module in imports}
+    early = [name for name in DEFERRED if name in loaded]
+
+    print(f'{"package":<24} {"ms":>8} {"share":>6}')
+    for name, ms in list(packages.items())[:args.top]:
+        print(f'{name:<24} {ms:>8.1f} {ms / total:>6.1%}')
+    print(f'{"total":<24} {total:>8.1f}   (budget {args.budget:.0f}ms)')
+
+    if args.json:
+        with open(args.json, 'w') as file:
+            json.dump({'total_ms': total, 'packages': packages, 'modules': [module._asdict() for module in imports]}, file, indent=2)
+
+    if early:
+        print(f'Imported before the first frame, but should be deferred: {", ".join(early)}')
+    if early or total > args.budget:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""
+Measures how long a correct keystroke takes to handle, as the backlog of letters the player hasn't typed grows.
+
+Run it with `python -m benchmarks.pending_text`.
+"""
+import string
+import timeit
+
+from game_files.pending import PendingText
+
+BACKLOGS = 10, 100, 1_000, 10_000, 100_000
+KEYSTROKES = 2_000
+STORY = 'The quick brown fox, jumps over the lazy dog. ' * ((max(BACKLOGS) + KEYSTROKES) // 40 + 1)
+
+
+def sliced(backlog: int) -> float:
+    """
+    Times the keystrokes the old way, by slicing the pending string.
+
+    Args:
+      backlog (int): The number of letters shown but not typed yet.
+
+    Returns:
+      float: The time taken per keystroke in microseconds.
+    """
+    story = iter(STORY)
+    word = ''.join(next(story) for _ in range(backlog))
+
+    def keystroke() -> None:
+        nonlocal word
+        while True:
+            word = word[1:]
+            if not word:
+                word += next(story)
+            if word[0] in string.ascii_letters:
+                break
+        word = word + next(story)
+
+    return timeit.timeit(keystroke, number=KEYSTROKES) / KEYSTROKES * 1e6
+
+
+def windowed(backlog: int) -> float:
+    """
+    Times the keystrokes with the PendingText window.
+
+    Args:
+      backlog (int): The number of letters shown but not typed yet.
+
+    Returns:
+      float: The time taken per keystroke in microseconds.
+    """
+    word = PendingText(STORY)
+    for _ in range(backlog):
+        word.append()
+
+    def keystroke() -> None:
+        word.consume()
+        word.append()
+
+    return timeit.timeit(keystroke, number=KEYSTROKES) / KEYSTROKES * 1e6
+
+
+def main() -> None:
+    """
+    Prints the time per keystroke of both the ways, for every backlog size.
+    """
+    print(f'{"backlog":>10} {"sliced (us)":>14} {"windowed (us)":>14}')
+    for backlog in BACKLOGS:
+        print(f'{backlog:>10} {sliced(backlog):>14.3f} {windowed(backlog):>14.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,380 @@
+"""
+Renders the scenes headless, under SDL's dummy video and audio drivers, with scripted input, and reports the frames per
+second, the distribution of the frame times and the memory allocated per frame of each one. The graph of a score in
+the history (History.create_graph), a tick of the live graph with either of its views (LiveGraph.plot), and the
+progress of a player with thousands of games (graphing.analytics) are timed on their own.
+
+Run it with `python -m benchmarks.render`. The results can be saved with --output, and compared against an earlier run
+with --baseline, in which case it exits with a non-zero status if anything got slower than the tolerance.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+from typing import Callable, Iterator
+
+import pygame
+
+from benchmarks.allocations import prepare
+from database_files.database import open_session
+from database_files.encoding import PADDING, encode_samples
+from database_files.writer import WriteBehind
+from mem_hub import mem
+from scenes import get_scene
+
+HIGHER_IS_BETTER = 'fps',
+# The tail of the frame times and the cached graphs are too noisy between two runs to fail on, so they are only shown.
+GATED = 'fps', 'p50_ms', 'p95_ms', 'alloc_kib', 'cold_ms', 'plot_us', 'window_plot_us', 'load_ms', 'trends_ms'
+
+
+def key(char: str, code: int = 0) -> pygame.event.Event:
+    """
+    It makes a key press event, as if it came from the keyboard.
+
+    Args:
+      char (str): The character of the key.
+      code (int): The key code, defaults to the code of the character.
+
+    Returns:
+      pygame.event.Event: The key press.
+    """
+    return pygame.event.Event(pygame.KEYDOWN, key=code or ord(char), unicode=char, mod=0, scancode=0)
+
+
+def type_and_erase(word: str) -> Iterator[list[pygame.event.Event]]:
+    """
+    The input of the login scene, which types a word into the focused box and erases it again, one key per frame.
+
+    Args:
+      word (str): The word which is typed.
+
+    Yields:
+      list[pygame.event.Event]: The events of a frame.
+    """
+    while True:
+        for char in word:
+            yield [key(char)]
+        for _ in word:
+            yield [key('', pygame.K_BACKSPACE)]
+
+
+def no_input() -> Iterator[list[pygame.event.Event]]:
+    """
+    The input of a scene which is only looked at.
+
+    Yields:
+      list[pygame.event.Event]: The events of a frame, which are always none.
+    """
+    while True:
+        yield []
+
+
+def play(miss_every: int = 10) -> Iterator[list[pygame.event.Event]]:
+    """
+    The input of a game, which presses the right key every frame, except for a miss every few frames.
+
+    Args:
+      miss_every (int): How many frames there are between the misses.
+
+    Yields:
+      list[pygame.event.Event]: The events of a frame.
+    """
+    frame = 0
+    while True:
+        frame += 1
+        scene = mem['game'].scene
+        if frame % miss_every == 0 or not getattr(scene, 'word', None):
+            yield [key('#')]
+        else:
+            yield [key(scene.char)]
+
+
+def menu() -> None:
+    """
+    It opens the menu of the game.
+    """
+    mem['game'].scene = get_scene('game')()
+
+
+def in_game() -> None:
+    """
+    It opens the game and starts playing.
+    """
+    menu()
+    mem['game'].scene.start_game()
+
+
+def open_scene(name: str) -> Callable[[], None]:
+    """
+    It makes a function which opens a scene of the registry.
+
+    Args:
+      name (str): The name of the scene.
+
+    Returns:
+      function: The function which opens the scene.
+    """
+    return lambda: setattr(mem['game'], 'scene', get_scene(name)())
+
+
+SCENES: dict[str, tuple[Callable[[], None], Callable[[], Iterator]]] = {
+    'login': (open_scene('login'), lambda: type_and_erase('benchmark')),
+    'menu': (menu, no_input),
+    'game': (in_game, play),
+    'history': (open_scene('history'), no_input),
+    'leaderboard': (open_scene('leaderboard'), no_input),
+}
+
+
+def run_frames(script: Iterator, frames: int, measure: Callable[[Callable[[], None]], float]) -> list[float]:
+    """
+    It draws a number of frames as fast as it can, posting the scripted input before every frame.
+
+    Args:
+      script (Iterator): The input of the scene.
+      frames (int): The number of frames.
+      measure (function): It draws a frame, and returns what was measured.
+
+    Returns:
+      list[float]: The measurement of every frame.
+    """
+    results = []
+    for events in script:
+        if len(results) == frames:
+            break
+        for event in events:
+            pygame.event.post(event)
+        results.append(measure(lambda: mem['game'].scene.run_frame()))
+    return results
+
+
+def timed(frame: Callable[[], None]) -> float:
+    """
+    It times a frame.
+
+    Args:
+      frame (function): The frame.
+
+    Returns:
+      float: The time it took in ms.
+    """
+    start = time.perf_counter_ns()
+    frame()
+    return (time.perf_counter_ns() - start) / 1e6
+
+
+def allocated(frame: Callable[[], None]) -> float:
+    """
+    It measures the peak memory allocated by a frame, it expects tracemalloc to be running.
+
+    Args:
+      frame (function): The frame.
+
+    Returns:
+      float: The peak allocation in KiB.
+    """
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    frame()
+    return (tracemalloc.get_traced_memory()[1] - before) / 1024
+
+
+def percentile(values: list[float], fraction: float) -> float:
+    """
+    It picks the value below which the given fraction of the values are.
+
+    Args:
+      values (list[float]): The values.
+      fraction (float): The fraction, between 0 and 1.
+
+    Returns:
+      float: The percentile.
+    """
+    values = sorted(values)
+    return values[min(int(fraction * len(values)), len(values) - 1)]
+
+
+def bench_scene(name: str, warmup: int, frames: int) -> dict[str, float]:
+    """
+    It benchmarks a scene, first timing its frames and then measuring their allocations, since tracemalloc slows them
+    down.
+
+    Args:
+      name (str): The name of the scene in SCENES.
+      warmup (int): The number of frames drawn before measuring.
+      frames (int): The number of frames measured.
+
+    Returns:
+      dict[str, float]: The frames per second, the frame time percentiles, and the mean allocation per frame.
+    """
+    opener, script = SCENES[name]
+    opener()
+    script = script()
+    run_frames(script, warmup, timed)
+    times = run_frames(script, frames, timed)
+
+    tracemalloc.start()
+    allocations = run_frames(script, frames, allocated)
+    tracemalloc.stop()
+
+    return {
+        'fps': 1e3 * len(times) / sum(times),
+        'p50_ms': percentile(times, .5),
+        'p95_ms': percentile(times, .95),
+        'p99_ms': percentile(times, .99),
+        'max_ms': max(times),
+        'alloc_kib': sum(allocations) / len(allocations),
+    }
+
+
+def bench_create_graph() -> dict[str, float]:
+    """
+    It times drawing the graph of every score on the first page of the history, with and without the cache.
+
+    Returns:
+      dict[str, float]: The mean time to open a graph which isn't cached, and one which is, in ms.
+    """
+    from graphing.history import graph_cache
+
+    history = get_scene('history')()
+    history.load_page(0)
+    graph_cache.clear()
+    result = {}
+    for label in 'cold_ms', 'cached_ms':
+        start = time.perf_counter_ns()
+        for index in range(len(history.history)):
+            history.toggle(index)
+        result[label] = (time.perf_counter_ns() - start) / 1e6 / len(history.history)
+    return result
+
+
+def bench_live_plot(ticks: int) -> dict[str, float]:
+    """
+    It times the ticks of the live graph of a game, with both of its views: the sparkline drawn in the game window, and
+    the detached matplotlib window. Only the part of a tick paid by the game is timed for the detached window, which is
+    sending the sample to its process, so its process isn't started.
+
+    Args:
+      ticks (int): The number of ticks, one for every second of a game.
+
+    Returns:
+      dict[str, float]: The mean time of a tick in µs, with the sparkline and with the detached window.
+    """
+    from graphing.live import LiveGraph
+    from graphing.window import DetachedWindow
+
+    window = DetachedWindow(12, start=False)
+    game = get_scene('game')()
+    results = {}
+    for metric, view in ('plot_us', None), ('window_plot_us', window):
+        graph = LiveGraph(game, 12)
+        if view:
+            graph.view = view
+        start = time.perf_counter_ns()
+        for tick in range(ticks):
+            game.score += tick % 7
+            graph.plot()
+        results[metric] = (time.perf_counter_ns() - start) / 1e3 / ticks
+    window.samples.close()
+    window.samples.join_thread()
+    return results
+
+
+def bench_analytics(games: int) -> dict[str, float]:
+    """
+    It times computing the progress of a player with many games, of random lengths and speeds.
+
+    Args:
+      games (int): The number of games of the player.
+
+    Returns:
+      dict[str, float]: The time to load the samples of the games into an array, and to compute the trends, in ms.
+    """
+    from graphing.analytics import load_samples, trends
+
+    generator = random.Random(games)
+    blobs = [encode_samples([0] * PADDING + [generator.randint(20, 90) for _ in range(generator.randint(20, 180))]) for _ in range(games)]
+    start = time.perf_counter_ns()
+    matrix = load_samples(blobs)
+    loaded = time.perf_counter_ns()
+    trends(matrix)
+    return {'load_ms': (loaded - start) / 1e6, 'trends_ms': (time.perf_counter_ns() - loaded) / 1e6}
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    It prints how every result changed since the baseline, and finds the GATED ones which got worse than the
+    tolerance.
+
+    Args:
+      results (dict): The results of this run.
+      baseline (dict): The results of an earlier run.
+      tolerance (float): The fraction a result may get worse by.
+
+    Returns:
+      list[str]: The names of the results which regressed.
+    """
+    regressions = []
+    print(f'\n{"vs baseline":<24} {"before":>9} {"after":>9} {"change":>8}')
+    for group, metrics in results.items():
+        for metric, value in metrics.items():
+            if (before := baseline.get(group, {}).get(metric)) is None or not before:
+                continue
+            change = value / before - 1
+            worse = -change if metric in HIGHER_IS_BETTER else change
+            flag = '  <- regression' if metric in GATED and worse > tolerance else ''
+            print(f'{group + "." + metric:<24} {before:>9.3f} {value:>9.3f} {change:>+8.1%}{flag}')
+            if flag:
+                regressions.append(f'{group}.{metric}')
+    return regressions
+
+
+def main() -> None:
+    """
+    It runs the benchmarks, prints them, and saves and compares them if asked to.
+    """
+    parser = argparse.ArgumentParser(description='Benchmarks the scenes headless, with scripted input.')
+    parser.add_argument('--warmup', type=int, default=30, help='The number of frames drawn before measuring.')
+    parser.add_argument('--frames', type=int, default=300, help='The number of frames measured per scene.')
+    parser.add_argument('--scenes', nargs='+', default=list(SCENES), choices=list(SCENES), help='The scenes to run.')
+    parser.add_argument('--games', type=int, default=10_000, help='The number of games the progress is computed over.')
+    parser.add_argument('--output', metavar='PATH', help='Saves the results to a JSON file.')
+    parser.add_argument('--baseline', metavar='PATH', help='Compares the results against an earlier JSON file.')
+    parser.add_argument('--tolerance', type=float, default=.25, help='The fraction a result may get worse by.')
+    args = parser.parse_args()
+
+    prepare()
+    writer = mem['writer'] = WriteBehind(open_session)
+    writer.start()
+
+    results = {name: bench_scene(name, args.warmup, args.frames) for name in args.scenes}
+    results['create_graph'] = bench_create_graph()
+    results['live_plot'] = bench_live_plot(args.frames)
+    results['analytics'] = bench_analytics(args.games)
+    writer.close()
+
+    print(f'{"scene":<10} {"fps":>8} {"p50":>8} {"p95":>8} {"p99":>8} {"max":>8} {"alloc":>10}')
+    for name in args.scenes:
+        scene = results[name]
+        print(f'{name:<10} {scene["fps"]:>8.0f} {scene["p50_ms"]:>6.2f}ms {scene["p95_ms"]:>6.2f}ms '
+              f'{scene["p99_ms"]:>6.2f}ms {scene["max_ms"]:>6.2f}ms {scene["alloc_kib"]:>7.2f}KiB')
+    graph, plot, analytics = results['create_graph'], results['live_plot'], results['analytics']
+    print(f'create_graph {graph["cold_ms"]:.2f}ms drawn, {graph["cached_ms"]:.3f}ms cached; LiveGraph.plot {plot["plot_us"]:.1f}µs sparkline, {plot["window_plot_us"]:.1f}µs detached window')
+    print(f'progress of {args.games} games: {analytics["load_ms"]:.1f}ms loaded, {analytics["trends_ms"]:.1f}ms computed')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if regressions := compare(results, baseline, args.tolerance):
+            print(f'Regressed: {", ".join(regressions)}')
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+"""
+Measures the time from launch to the first frame of the login screen, and to the database being ready, on a cold start
+(no cached backend and no database) and on a warm start.
+
+Run it with `python -m benchmarks.startup`. The database used is a throwaway SQLite file, MySQL is only probed if it is
+asked for with --backends mysql sqlite.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def child(cache: str, backends: list[str]) -> None:
+    """
+    It launches the game up to its first frame, and prints the timings as JSON. It is run in a fresh interpreter.
+
+    Args:
+      cache (str): The path of the bootstrap cache.
+      backends (list[str]): The backends to probe.
+    """
+    start = time.perf_counter()
+    os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+    os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+    import main
+    from database_files.bootstrap import Bootstrap
+    from mem_hub import mem
+    from utils import init_display
+
+    bootstrap = Bootstrap(tuple(backends), cache)
+    bootstrap.start()
+    imported = time.perf_counter()
+
+    init_display()
+    mem['game'] = main.Game()
+    mem['game'].scene.main_loop()
+    first_frame = time.perf_counter()
+
+    bootstrap.join()
+    print(json.dumps({
+        'imports_ms': (imported - start) * 1e3,
+        'first_frame_ms': (first_frame - start) * 1e3,
+        'database_ms': (time.perf_counter() - start) * 1e3,
+        'bootstrap_ms': bootstrap.elapsed * 1e3,
+        'backend': bootstrap.backend,
+        'warm': bootstrap.warm,
+    }))
+
+
+def launch(directory: str, backends: list[str]) -> dict:
+    """
+    It launches a child process, using the database and cache in the given directory.
+
+    Args:
+      directory (str): The directory of the throwaway database and cache.
+      backends (list[str]): The backends to probe.
+
+    Returns:
+      dict: The timings of the child, along with the time until the process printed them.
+    """
+    environment = {**os.environ, 'TYPE_RUSH_SQLITE': os.path.join(directory, 'type_rush.db')}
+    command = [sys.executable, '-m', 'benchmarks.startup', '--child', os.path.join(directory, 'bootstrap.json'), '--backends', *backends]
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=ROOT, env=environment, capture_output=True, text=True, check=True).stdout
+    timings = json.loads(output.strip().splitlines()[-1])
+    timings['process_ms'] = (time.perf_counter() - start) * 1e3
+    return timings
+
+
+def main() -> None:
+    """
+    It measures a cold start followed by warm starts, and prints the timings.
+    """
+    parser = argparse.ArgumentParser(description='Measures the time to the first frame on cold and warm starts.')
+    parser.add_argument('--child', metavar='CACHE', help=argparse.SUPPRESS)
+    parser.add_argument('--backends', nargs='+', default=['sqlite'], help='The backends to probe, most preferred first.')
+    parser.add_argument('--runs', type=int, default=3, help='The number of warm starts.')
+    args = parser.parse_args()
+
+    if args.child:
+        return child(args.child, args.backends)
+
+    with tempfile.TemporaryDirectory() as directory:
+        runs = [('cold', launch(directory, args.backends))]
+        runs += [('warm', launch(directory, args.backends)) for _ in range(args.runs)]
+
+    print(f'{"start":>6} {"first frame":>12} {"db ready":>9} {"bootstrap":>10} {"process":>8}  backend')
+    for name, timings in runs:
+        print(f'{name:>6} {timings["first_frame_ms"]:>10.0f}ms {timings["database_ms"]:>7.0f}ms '
+              f'{timings["bootstrap_ms"]:>8.0f}ms {timings["process_ms"]:>6.0f}ms  {timings["backend"]}')
+
+
+if __name__ == '__main__':
+    main()
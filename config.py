@@ -5,3 +5,17 @@ WELCOME_SOUND_PATH = get_path(__file__, WELCOME_SOUND)
 
 EXIT_SOUND = 'bye.mp3'
 EXIT_SOUND_PATH = get_path(__file__, EXIT_SOUND)
+
+SOUNDS = {'welcome': WELCOME_SOUND_PATH, 'bye': EXIT_SOUND_PATH}
+
+AUDIO_FREQUENCY = 44100
+AUDIO_BUFFER = 256
+AUDIO_CHANNELS = 8
+AUDIO_RESERVED = 1
+
+KEY_SOUNDS = True
+# The beeps made by the mixer, as (frequency in Hz, duration in seconds, volume, decay).
+TONES = {
+    'hit': (1800, .015, .25, 6),
+    'miss': (110, .08, .35, 3),
+}
@@ -1,26 +1,75 @@
+from sqlalchemy import delete, func, insert, inspect, select
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session
 
 from utils import get_user
 
 
-def setup_database(session: Session) -> None:
+def migrate_scores(engine: Engine, session: Session) -> None:
     """
-    It creates the database and tables if they don't exist, and adds a user named 'guest' with no password if it doesn't
-    exist
+    It brings an existing scores table up to date, by widening the samples column on MySQL, adding the summary and
+    replay columns which are missing, and filling in the summaries of the games which were saved before they existed.
+    The final scores of those games can't be worked out from their samples, so they are left NULL and the games count as
+    0 on the leaderboard. The games saved before the keys and the letters were logged are left without them, so they
+    can't be replayed.
 
     Args:
+      engine (Engine): The engine connected to the database.
       session (Session): The session object that will be used to interact with the database.
     """
-    if is_not_sql:
-        engine.execute(f'create database if not exists {DATABASE_NAME}')
-        engine.execute(f'use {DATABASE_NAME}')
+    columns = {column['name']: column for column in inspect(engine).get_columns('scores')}
 
+    if engine.url.drivername != 'sqlite' and 'blob' not in str(columns['score']['type']).lower():
+        engine.execute('alter table scores modify score blob not null')
+
+    for column in (*SUMMARY_COLUMNS, *REPLAY_COLUMNS):
+        if column.name not in columns:
+            engine.execute(f'alter table scores add column {column.name} {column.type.compile(engine.dialect)}')
+
+    for score in session.query(Score).filter(Score.duration.is_(None)):
+        for name, value in summarize(score.samples).items():
+            setattr(score, name, value)
+    session.commit()
+
+
+def build_leaderboard(engine: Engine, session: Session) -> None:
+    """
+    It creates the leaderboard if it doesn't exist, and fills it in from the games saved so far, replacing whatever it
+    held. From then on, it is kept up to date as the scores are saved.
+
+    Args:
+      engine (Engine): The engine connected to the database.
+      session (Session): The session object that will be used to interact with the database.
+    """
+    Leaderboard.__table__.create(engine, checkfirst=True)
+    bests = select(Score.user_id, func.coalesce(func.max(Score.final_score), 0), func.count(Score.id)).group_by(Score.user_id)
+    session.execute(delete(Leaderboard))
+    session.execute(insert(Leaderboard).from_select(['user_id', 'best_score', 'games'], bests))
+    session.commit()
+
+
+def setup_database(engine: Engine, session: Session) -> None:
+    """
+    It creates the tables if they don't exist, and adds a user named 'guest' with no password if it doesn't
+    exist. The leaderboard is built from the scores the first time.
+
+    Args:
+      engine (Engine): The engine connected to the database.
+      session (Session): The session object that will be used to interact with the database.
+    """
     tables = engine.table_names()
 
     if 'users' not in tables:
         User.__table__.create(engine)
     if 'scores' not in tables:
         Score.__table__.create(engine)
+    else:
+        migrate_scores(engine, session)
+    if 'leaderboard' not in tables:
+        build_leaderboard(engine, session)
+
+    for index in (*Score.__table__.indexes, *Leaderboard.__table__.indexes):
+        index.create(engine, checkfirst=True)
 
     user = User(username='guest', password='')
 
@@ -30,5 +79,5 @@ def setup_database(session: Session) -> None:
 
 
 if True:
-    from database_files.config import DATABASE_NAME
-    from database_files.database import is_not_sql, engine, User, Score
+    from database_files.database import User, Score, Leaderboard, SUMMARY_COLUMNS, REPLAY_COLUMNS
+    from database_files.encoding import summarize
@@ -0,0 +1,180 @@
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from threading import Thread
+from typing import Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from database_files.config import *
+from utils import try_connect
+
+
+def sqlite_pragmas(connection, _) -> None:
+    """
+    It tunes every new SQLite connection, so the game can read while the write-behind thread is writing.
+
+    Args:
+      connection: The DBAPI connection which was opened.
+    """
+    cursor = connection.cursor()
+    cursor.execute('pragma journal_mode=wal')
+    cursor.execute('pragma synchronous=normal')
+    cursor.close()
+
+
+def connect_mysql(warm: bool) -> Optional[Engine]:
+    """
+    It connects to the MySQL server. On a cold start the database is created first, if it doesn't exist.
+
+    Args:
+      warm (bool): Weather the database is known to exist already.
+
+    Returns:
+      Engine: The engine connected to the game's database, if the server could be reached.
+    """
+    if not warm:
+        if not (server := try_connect(MYSQL_CONNECT_COMMAND, **POOL_SETTINGS['mysql'])):
+            return
+        server.execute(f'create database if not exists {DATABASE_NAME}')
+        server.dispose()
+    return try_connect(MYSQL_DATABASE_COMMAND, **POOL_SETTINGS['mysql'])
+
+
+def connect_sqlite(warm: bool) -> Optional[Engine]:
+    """
+    It opens the SQLite database. A warm start is only possible if the database file still exists.
+
+    Args:
+      warm (bool): Weather the database is known to exist already.
+
+    Returns:
+      Engine: The engine connected to the database file, if it could be opened.
+    """
+    if warm and not os.path.exists(SQLITE3_DATABASE_PATH):
+        return
+    if engine := try_connect(SQLITE3_CONNECT_COMMAND, **POOL_SETTINGS['sqlite']):
+        event.listen(engine, 'connect', sqlite_pragmas)
+        engine.dispose()
+    return engine
+
+
+CONNECTORS: dict[str, Callable[[bool], Optional[Engine]]] = {'mysql': connect_mysql, 'sqlite': connect_sqlite}
+
+
+def read_cache(path: str) -> dict:
+    """
+    It reads which backend was chosen last time, and the version of its schema.
+
+    Args:
+      path (str): The path of the cache.
+
+    Returns:
+      dict: The cache, which is empty if it is missing or broken.
+    """
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return {}
+
+
+def write_cache(path: str, backend: str) -> None:
+    """
+    It remembers the chosen backend, and that its schema is up to date.
+
+    Args:
+      path (str): The path of the cache.
+      backend (str): The name of the backend.
+    """
+    with open(path, 'w') as file:
+        json.dump({'backend': backend, 'schema': SCHEMA_VERSION}, file)
+
+
+class Bootstrap(Thread):
+    """
+    It finds the database on a background thread, so the window can open while it is connecting.
+    On a warm start, the backend which was chosen last time is connected to directly, and the schema checks are skipped.
+    Otherwise all the backends are probed at the same time, the most preferred one which can be reached is chosen, and
+    the database is set up.
+
+    Attributes:
+      backends (tuple[str, ...]): The names of the backends, from the most to the least preferred.
+      cache_path (str): The path of the cache of the chosen backend.
+      timeout (float): The maximum number of seconds to wait for a backend, before trying the next one.
+      backend (str, optional): The name of the chosen backend.
+      warm (bool): Weather it was a warm start.
+      elapsed (float): The number of seconds it took to be ready.
+    """
+    def __init__(self, backends: tuple[str, ...] = tuple(CONNECTORS), cache_path: str = BOOTSTRAP_CACHE_PATH, timeout: float = PROBE_TIMEOUT) -> None:
+        """
+        All initial configuration for the bootstrap is done here, it has to be started to connect.
+
+        Args:
+          backends (tuple[str, ...]): The names of the backends, from the most to the least preferred.
+          cache_path (str): The path of the cache of the chosen backend.
+          timeout (float): The maximum number of seconds to wait for a backend, before trying the next one.
+        """
+        super().__init__(name='database-bootstrap', daemon=True)
+        self.backends = backends
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.backend: Optional[str] = None
+        self.warm = False
+        self.elapsed = 0.
+
+    def resolve(self) -> Engine:
+        """
+        It connects to the cached backend, or probes all of them at the same time.
+
+        Raises:
+          RuntimeError: If none of the backends could be reached.
+
+        Returns:
+          Engine: The engine of the chosen backend.
+        """
+        cache = read_cache(self.cache_path)
+        if (cached := cache.get('backend')) in self.backends and cache.get('schema') == SCHEMA_VERSION:
+            if engine := CONNECTORS[cached](True):
+                self.backend, self.warm = cached, True
+                return engine
+
+        pool = ThreadPoolExecutor(len(self.backends), thread_name_prefix='database-probe')
+        futures = {name: pool.submit(CONNECTORS[name], False) for name in self.backends}
+        pool.shutdown(wait=False)
+        for name in self.backends:
+            try:
+                engine = futures[name].result(timeout=self.timeout)
+            except FutureTimeout:
+                continue
+            if engine:
+                self.backend = name
+                return engine
+        raise RuntimeError(f'None of {", ".join(self.backends)} could be reached')
+
+    def run(self) -> None:
+        """
+        It finds the database, sets it up on a cold start, and makes it available to the rest of the game.
+        """
+        start = time.perf_counter()
+        try:
+            engine = self.resolve()
+            if not self.warm:
+                session = Session(bind=engine)
+                try:
+                    setup_database(engine, session)
+                finally:
+                    session.close()
+                write_cache(self.cache_path, self.backend)
+        except Exception as error:
+            self.elapsed = time.perf_counter() - start
+            return bind(None, error)
+        self.elapsed = time.perf_counter() - start
+        bind(engine)
+
+
+if True:
+    from database_files.action import setup_database
+    from database_files.database import SCHEMA_VERSION, Session, bind
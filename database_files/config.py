@@ -1,3 +1,7 @@
+import os
+
+from sqlalchemy.pool import QueuePool
+
 from utils import get_path
 
 
@@ -7,9 +11,28 @@ MYSQL_USERNAME = 'root'
 MYSQL_PASSWORD = 'root'
 
 SQLITE3_DATABASE = 'type_rush.db'
-SQLITE3_DATABASE_PATH = get_path(__file__, SQLITE3_DATABASE)
+SQLITE3_DATABASE_PATH = os.environ.get('TYPE_RUSH_SQLITE', get_path(__file__, SQLITE3_DATABASE))
+
+DATABASE_NAME = 'type_rush'
 
 MYSQL_CONNECT_COMMAND = f'mysql+{MYSQL_WRAPPER}://{MYSQL_USERNAME}:{MYSQL_PASSWORD}@{MYSQL_HOST}'
+MYSQL_DATABASE_COMMAND = f'{MYSQL_CONNECT_COMMAND}/{DATABASE_NAME}'
 SQLITE3_CONNECT_COMMAND = f'sqlite:///{SQLITE3_DATABASE_PATH}'
 
-DATABASE_NAME = 'type_rush'
+PROBE_TIMEOUT = 2
+DATABASE_READY_TIMEOUT = 15
+
+POOL_SETTINGS = {
+    'mysql': {'pool_size': 5, 'max_overflow': 10, 'pool_recycle': 1800, 'pool_pre_ping': True, 'connect_args': {'connect_timeout': PROBE_TIMEOUT}},
+    'sqlite': {'poolclass': QueuePool, 'pool_size': 5, 'max_overflow': 10, 'connect_args': {'check_same_thread': False, 'timeout': 15}},
+}
+
+BOOTSTRAP_CACHE = 'bootstrap.json'
+BOOTSTRAP_CACHE_PATH = get_path(__file__, BOOTSTRAP_CACHE)
+
+WRITER_BATCH_SIZE = 50
+WRITER_RETRIES = 5
+WRITER_BACKOFF = .5
+# Long enough for a batch to be retried to the end, and saved.
+WRITER_SHUTDOWN_TIMEOUT = WRITER_BACKOFF * (2 ** WRITER_RETRIES - 1) + 10
+WRITER_LATENCY_SAMPLES = 100
@@ -1,15 +1,59 @@
-from sqlalchemy import Column, Integer, DateTime, CHAR, VARCHAR, ForeignKey, VARBINARY
-from sqlalchemy.orm import sessionmaker, relationship
+from array import array
+from threading import Event
+from typing import Optional
+
+from sqlalchemy import Column, Integer, DateTime, CHAR, VARCHAR, ForeignKey, LargeBinary, Float, Index, case, event
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, relationship, Session as SessionType
 from sqlalchemy.sql import func
 from sqlalchemy.orm import declarative_base
-from database_files.config import MYSQL_CONNECT_COMMAND, SQLITE3_CONNECT_COMMAND
-from utils import try_connect, encrypt_password, make_user_id, set_value
+from database_files import config
+from database_files.encoding import Keystroke, Letter, decode_samples, decode_keystrokes, decode_letters
+from mem_hub import mem
+from utils import encrypt_password, make_user_id, set_value
+
+SCHEMA_VERSION = 5
 
-engine = try_connect(MYSQL_CONNECT_COMMAND) or try_connect(SQLITE3_CONNECT_COMMAND)
-Session = sessionmaker(bind=engine)
+engine: Optional[Engine] = None
+error: Optional[Exception] = None
+ready = Event()
+# Stands for the timeout of the config, which is read when waiting, since the config may still be importing utils when
+# this module is imported.
+CONFIGURED = object()
+Session = sessionmaker()
 Base = declarative_base()
 
-is_not_sql = engine.url.drivername != 'sqlite'
+
+def bind(new_engine: Optional[Engine], failure: Optional[Exception] = None) -> None:
+    global engine, error
+    engine, error = new_engine, failure
+    if new_engine:
+        Session.configure(bind=new_engine)
+    ready.set()
+
+
+def wait_until_ready(timeout: Optional[float] | object = CONFIGURED) -> Engine:
+    # None waits for as long as it takes, and the default is the timeout of the config.
+    if timeout is CONFIGURED:
+        timeout = config.DATABASE_READY_TIMEOUT
+    if not ready.wait(timeout):
+        raise TimeoutError(f'The database was not ready after {timeout}s, the bootstrap may not have been started or may have died')
+    if not engine:
+        raise RuntimeError('No database could be reached') from error
+    return engine
+
+
+def open_session(**kwargs) -> SessionType:
+    wait_until_ready()
+    return Session(**kwargs)
+
+
+def get_session() -> SessionType:
+    if 'session' not in mem:
+        mem['session'] = open_session()
+    return mem['session']
 
 
 class User(Base):
@@ -29,8 +73,60 @@ class User(Base):
 
 class Score(Base):
     __tablename__ = 'scores'
+    __table_args__ = Index('ix_scores_user_date', 'user_id', 'date_created'),
     id = Column(Integer, autoincrement=True, nullable=False, primary_key=True, unique=True)
     user_id = Column(Integer, ForeignKey(User.id), nullable=False)
     user = relationship(User, backref='scores')
-    score = Column(VARBINARY(200), nullable=False)
+    score = Column(LargeBinary, nullable=False)
     date_created = Column(DateTime(timezone=True), nullable=False, server_default=func.current_timestamp())
+    duration = Column(Integer)
+    final_score = Column(Integer)
+    peak_wpm = Column(Integer)
+    mean_wpm = Column(Float)
+    error_count = Column(Integer)
+    story_id = Column(Integer)
+    story_hash = Column(CHAR(16))
+    keystrokes = Column(LargeBinary)
+    letters = Column(LargeBinary)
+
+    @property
+    def samples(self) -> array:
+        return decode_samples(self.score)
+
+    @property
+    def keystroke_log(self) -> list[Keystroke]:
+        return decode_keystrokes(self.keystrokes)
+
+    @property
+    def letter_log(self) -> list[Letter]:
+        return decode_letters(self.letters)
+
+
+SUMMARY_COLUMNS = Score.duration, Score.final_score, Score.peak_wpm, Score.mean_wpm, Score.error_count
+REPLAY_COLUMNS = Score.story_id, Score.story_hash, Score.keystrokes, Score.letters
+
+
+class Leaderboard(Base):
+    __tablename__ = 'leaderboard'
+    __table_args__ = Index('ix_leaderboard_rank', 'best_score', 'user_id'),
+    user_id = Column(Integer, ForeignKey(User.id), primary_key=True)
+    user = relationship(User)
+    best_score = Column(Integer, nullable=False)
+    games = Column(Integer, nullable=False)
+
+
+@event.listens_for(Score, 'after_insert')
+def rank_score(mapper, connection, score: Score) -> None:
+    """
+    It keeps the leaderboard up to date, by raising the best score of the player if the new score beats it, in the
+    same transaction as the score is saved in. It is a single upsert, so two first games of a player saved at the same
+    time can't both try to add their row.
+    """
+    table, best = Leaderboard.__table__, score.final_score or 0
+    raised = {'best_score': case((table.c.best_score < best, best), else_=table.c.best_score), 'games': table.c.games + 1}
+    if connection.dialect.name == 'sqlite':
+        row = sqlite_insert(table).values(user_id=score.user_id, best_score=best, games=1)
+        connection.execute(row.on_conflict_do_update(index_elements=[table.c.user_id], set_=raised))
+    else:
+        row = mysql_insert(table).values(user_id=score.user_id, best_score=best, games=1)
+        connection.execute(row.on_duplicate_key_update(raised))
@@ -0,0 +1,255 @@
+import struct
+import sys
+import zlib
+from array import array
+from typing import NamedTuple, Sequence
+
+SCORE_MAGIC = b'TR'
+SCORE_VERSION = 1
+SCORE_HEADER = struct.Struct('<2sBBI')
+
+KEYLOG_MAGIC = b'TK'
+KEYLOG_VERSION = 1
+KEYSTROKE = struct.Struct('<QHH')
+MAX_BACKLOG = 0x7fff
+
+LETTERS_MAGIC = b'TL'
+LETTERS_VERSION = 1
+LETTER = struct.Struct('<QI')
+
+FLAG_ZLIB = 1
+COMPRESS_THRESHOLD = 256
+MAX_SAMPLE = 65535
+
+PADDING = 3
+# The live graph shows a second in which nothing was typed as this, instead of 0.
+FILLER_SAMPLE = 2
+
+
+def is_encoded(blob: bytes) -> bool:
+    """
+    Checks whether the blob is in the versioned format. The old format is the raw samples, one byte each, which always
+    start with the zero padding, so they can never start with the magic.
+
+    Args:
+      blob (bytes): The stored samples.
+
+    Returns:
+      bool: Weather the blob has a header.
+    """
+    return blob[:len(SCORE_MAGIC)] == SCORE_MAGIC
+
+
+def encode_samples(samples: Sequence[int], compress: bool = True) -> bytes:
+    """
+    It encodes the WPM samples of a game as a header followed by little endian uint16s, which are compressed with zlib
+    if they are long enough for it to help.
+
+    Args:
+      samples (Sequence[int]): The WPM of every second of the game.
+      compress (bool): Weather the samples may be compressed. Defaults to True.
+
+    Returns:
+      bytes: The encoded samples.
+    """
+    body = array('H', [min(max(sample, 0), MAX_SAMPLE) for sample in samples])
+    if sys.byteorder == 'big':
+        body.byteswap()
+    body = body.tobytes()
+
+    flags = 0
+    if compress and len(body) > COMPRESS_THRESHOLD and len(packed := zlib.compress(body)) < len(body):
+        body = packed
+        flags |= FLAG_ZLIB
+    return SCORE_HEADER.pack(SCORE_MAGIC, SCORE_VERSION, flags, len(samples)) + body
+
+
+def decode_samples(blob: bytes) -> array:
+    """
+    It decodes the samples of a game, from either the versioned or the old format.
+
+    Args:
+      blob (bytes): The stored samples.
+
+    Raises:
+      ValueError: If the blob is of a newer version than this code knows about.
+
+    Returns:
+      array: The WPM of every second of the game.
+    """
+    if not is_encoded(blob):
+        return array('H', iter(blob))
+
+    _, version, flags, count = SCORE_HEADER.unpack_from(blob)
+    if version > SCORE_VERSION:
+        raise ValueError(f'Unknown score encoding version {version}')
+    body = blob[SCORE_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+    samples = array('H')
+    samples.frombytes(body[:2 * count])
+    if sys.byteorder == 'big':
+        samples.byteswap()
+    return samples
+
+
+class Keystroke(NamedTuple):
+    """
+    A key pressed during a game.
+
+    Attributes:
+      time (int): The nanoseconds since the game started, on a monotonic clock.
+      key (str): The character which was typed.
+      hit (bool): Weather it was the letter the player had to type.
+      backlog (int): The number of characters on the screen which hadn't been typed yet, when it was pressed.
+    """
+    time: int
+    key: str
+    hit: bool
+    backlog: int
+
+
+def encode_keystrokes(keystrokes: Sequence[Keystroke], compress: bool = True) -> bytes:
+    """
+    It encodes the keystroke log of a game as a header followed by one record per key, which holds the nanoseconds
+    since the previous key, the code point of the key, and the backlog with the hit flag in its lowest bit.
+    The log is compressed with zlib if it is long enough for it to help, which it nearly always is, since the high
+    bytes of the delays are zeros.
+
+    Args:
+      keystrokes (Sequence[Keystroke]): The keys pressed during the game, in order.
+      compress (bool): Weather the log may be compressed. Defaults to True.
+
+    Returns:
+      bytes: The encoded keystroke log.
+    """
+    body = bytearray(KEYSTROKE.size * len(keystrokes))
+    previous = 0
+    for index, (time, key, hit, backlog) in enumerate(keystrokes):
+        KEYSTROKE.pack_into(body, index * KEYSTROKE.size, time - previous, min(ord(key), 0xffff), min(backlog, MAX_BACKLOG) << 1 | hit)
+        previous = time
+
+    flags = 0
+    if compress and len(body) > COMPRESS_THRESHOLD and len(packed := zlib.compress(body)) < len(body):
+        body = packed
+        flags |= FLAG_ZLIB
+    return SCORE_HEADER.pack(KEYLOG_MAGIC, KEYLOG_VERSION, flags, len(keystrokes)) + body
+
+
+def decode_keystrokes(blob: bytes | None) -> list[Keystroke]:
+    """
+    It decodes the keystroke log of a game. Games saved before the keys were logged have no log.
+
+    Args:
+      blob (bytes, optional): The stored keystroke log.
+
+    Raises:
+      ValueError: If the blob isn't a keystroke log, or is of a newer version than this code knows about.
+
+    Returns:
+      list[Keystroke]: The keys pressed during the game, in order.
+    """
+    if not blob:
+        return []
+
+    magic, version, flags, count = SCORE_HEADER.unpack_from(blob)
+    if magic != KEYLOG_MAGIC or version > KEYLOG_VERSION:
+        raise ValueError(f'Unknown keystroke log {magic!r} version {version}')
+    body = blob[SCORE_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    keystrokes = []
+    time = 0
+    for delay, key, backlog in KEYSTROKE.iter_unpack(body[:KEYSTROKE.size * count]):
+        time += delay
+        keystrokes.append(Keystroke(time, chr(key), bool(backlog & 1), backlog >> 1))
+    return keystrokes
+
+
+class Letter(NamedTuple):
+    """
+    A letter of the story added to the screen during a game.
+
+    Attributes:
+      time (int): The nanoseconds since the game started, on a monotonic clock.
+      keys (int): The number of keys which had been pressed before it was added.
+    """
+    time: int
+    keys: int
+
+
+def encode_letters(letters: Sequence[Letter], compress: bool = True) -> bytes:
+    """
+    It encodes the times the letters of a game were added at, as a header followed by one record per letter, which
+    holds the nanoseconds since the previous letter and the number of keys pressed before it. Like the keystroke log,
+    it is compressed with zlib if it is long enough for it to help.
+
+    Args:
+      letters (Sequence[Letter]): The letters added during the game, in order.
+      compress (bool): Weather the log may be compressed. Defaults to True.
+
+    Returns:
+      bytes: The encoded letters.
+    """
+    body = bytearray(LETTER.size * len(letters))
+    previous = 0
+    for index, (time, keys) in enumerate(letters):
+        LETTER.pack_into(body, index * LETTER.size, time - previous, keys)
+        previous = time
+
+    flags = 0
+    if compress and len(body) > COMPRESS_THRESHOLD and len(packed := zlib.compress(body)) < len(body):
+        body = packed
+        flags |= FLAG_ZLIB
+    return SCORE_HEADER.pack(LETTERS_MAGIC, LETTERS_VERSION, flags, len(letters)) + body
+
+
+def decode_letters(blob: bytes | None) -> list[Letter]:
+    """
+    It decodes the times the letters of a game were added at. Games saved before they were logged have none.
+
+    Args:
+      blob (bytes, optional): The stored letters.
+
+    Raises:
+      ValueError: If the blob isn't a log of letters, or is of a newer version than this code knows about.
+
+    Returns:
+      list[Letter]: The letters added during the game, in order.
+    """
+    if not blob:
+        return []
+
+    magic, version, flags, count = SCORE_HEADER.unpack_from(blob)
+    if magic != LETTERS_MAGIC or version > LETTERS_VERSION:
+        raise ValueError(f'Unknown letter log {magic!r} version {version}')
+    body = blob[SCORE_HEADER.size:]
+    if flags & FLAG_ZLIB:
+        body = zlib.decompress(body)
+
+    letters = []
+    time = 0
+    for delay, keys in LETTER.iter_unpack(body[:LETTER.size * count]):
+        time += delay
+        letters.append(Letter(time, keys))
+    return letters
+
+
+def summarize(samples: Sequence[int]) -> dict[str, int | float]:
+    """
+    It computes the summary of a game which is stored next to its samples, leaving out the zero padding at the start.
+
+    Args:
+      samples (Sequence[int]): The WPM of every second of the game.
+
+    Returns:
+      dict[str, int | float]: The duration, peak WPM and mean WPM of the game.
+    """
+    played = samples[PADDING:]
+    return {
+        'duration': len(played),
+        'peak_wpm': max(samples, default=0),
+        'mean_wpm': sum(played) / len(played) if played else 0.,
+    }
+
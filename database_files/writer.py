@@ -0,0 +1,241 @@
+import time
+import warnings
+from collections import deque
+from queue import Queue, Empty
+from threading import Thread
+from typing import Any, Callable, Iterator, Optional
+
+from sqlalchemy import inspect
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from database_files.config import WRITER_BATCH_SIZE, WRITER_RETRIES, WRITER_BACKOFF, WRITER_SHUTDOWN_TIMEOUT, WRITER_LATENCY_SAMPLES
+
+STOP = object()
+
+
+def forget_keys(rows: list) -> None:
+    """
+    It clears the ids the database gave to rows whose insert was rolled back, so they are given new ones when they are
+    inserted again, instead of reusing ids which someone else may have taken since.
+
+    Args:
+      rows (list): The ORM objects which weren't saved.
+    """
+    for row in rows:
+        mapper = inspect(row).mapper
+        for column in mapper.primary_key:
+            if column.autoincrement is True:
+                setattr(row, mapper.get_property_by_column(column).key, None)
+
+
+class WriteBehind(Thread):
+    """
+    It saves new rows to the database on a background thread with its own session, so the game never waits for the
+    database. The rows are inserted in batches, and a batch which fails because of the connection is retried with an
+    exponential backoff. A batch which fails for any other reason is saved again a row at a time, so only the rows
+    which are at fault are dropped.
+
+    Attributes:
+      queue (Queue): The rows waiting to be saved.
+      session_factory (function): The function which creates the session of the thread.
+      batch_size (int): The maximum number of rows saved in one commit.
+      retries (int): The number of times a batch is retried before it is dropped.
+      backoff (float): The delay before the first retry, which doubles with every retry.
+      committed (int): The number of rows saved.
+      retried (int): The number of times a batch had to be retried.
+      dropped (int): The number of rows which couldn't be saved.
+      saving (int): The number of rows taken off the queue which are being saved.
+      error (Exception, optional): The latest error which made rows be dropped.
+      latencies (deque): The time taken by the latest commits, in seconds.
+    """
+    def __init__(self, session_factory: Callable[..., Session], batch_size: int = WRITER_BATCH_SIZE, retries: int = WRITER_RETRIES, backoff: float = WRITER_BACKOFF) -> None:
+        """
+        All initial configuration for the writer is done here, it has to be started before it saves anything.
+
+        Args:
+          session_factory (function): The function which creates the session of the thread.
+          batch_size (int): The maximum number of rows saved in one commit.
+          retries (int): The number of times a batch is retried before it is dropped.
+          backoff (float): The delay before the first retry, which doubles with every retry.
+        """
+        super().__init__(name='write-behind', daemon=True)
+        self.queue: Queue = Queue()
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        self.committed = self.retried = self.dropped = self.saving = 0
+        self.error: Optional[Exception] = None
+        self.latencies: deque[float] = deque(maxlen=WRITER_LATENCY_SAMPLES)
+
+    def add(self, row: Any) -> None:
+        """
+        It queues a new row to be saved, without waiting for it.
+
+        Args:
+          row (Any): The ORM object to be inserted.
+        """
+        self.queue.put(row)
+
+    def batches(self) -> Iterator[list]:
+        """
+        It takes the queued rows in batches, until it is closed.
+
+        Yields:
+          list: The rows of a batch, at most batch_size of them.
+        """
+        while (row := self.queue.get()) is not STOP:
+            batch = [row]
+            while len(batch) < self.batch_size:
+                try:
+                    row = self.queue.get_nowait()
+                except Empty:
+                    break
+                if row is STOP:
+                    yield batch
+                    return
+                batch.append(row)
+            yield batch
+
+    def connect(self) -> Optional[Session]:
+        """
+        It opens the session of the thread, retrying with an exponential backoff if the database isn't ready.
+
+        Returns:
+          Session, optional: The session, or None if it couldn't be opened.
+        """
+        for attempt in range(self.retries + 1):
+            try:
+                return self.session_factory(expire_on_commit=False)
+            except (SQLAlchemyError, RuntimeError, TimeoutError) as error:
+                failure = error
+                if attempt < self.retries:
+                    self.retried += 1
+                    time.sleep(self.backoff * 2 ** attempt)
+        self.error = failure
+        return None
+
+    def run(self) -> None:
+        """
+        It saves the queued rows in batches, until it is closed. The session is only opened once there is something to
+        save, and the rows which can't be saved because it couldn't be opened are dropped. Whatever is still queued
+        when the thread ends, even because of an error, is counted as dropped.
+        """
+        session = None
+        try:
+            for batch in self.batches():
+                self.saving = len(batch)
+                if session is None and (session := self.connect()) is None:
+                    self.dropped += len(batch)
+                else:
+                    self.commit(session, batch)
+                self.saving = 0
+        finally:
+            if session is not None:
+                session.close()
+            self.discard()
+
+    def discard(self) -> None:
+        """
+        It empties the queue, counting the rows in it as dropped.
+        """
+        while True:
+            try:
+                row = self.queue.get_nowait()
+            except Empty:
+                return
+            if row is not STOP:
+                self.dropped += 1
+
+    def commit(self, session: Session, batch: list) -> None:
+        """
+        It inserts a batch of rows in a single commit, retrying with an exponential backoff if the database can't be
+        reached. Any other error, like a row breaking a unique key, makes the rows be inserted one at a time, so only
+        the rows which fail are dropped.
+
+        Args:
+          session (Session): The session of the thread.
+          batch (list): The rows to be inserted.
+        """
+        for attempt in range(self.retries + 1):
+            start = time.perf_counter()
+            try:
+                session.add_all(batch)
+                session.commit()
+            except OperationalError as error:
+                session.rollback()
+                forget_keys(batch)
+                failure = error
+                if attempt < self.retries:
+                    self.retried += 1
+                    time.sleep(self.backoff * 2 ** attempt)
+            except SQLAlchemyError as error:
+                session.rollback()
+                forget_keys(batch)
+                failure = error
+                if len(batch) > 1:
+                    for row in batch:
+                        self.commit(session, [row])
+                    return
+                break
+            else:
+                self.latencies.append(time.perf_counter() - start)
+                self.committed += len(batch)
+                return
+        self.error = failure
+        self.dropped += len(batch)
+
+    def close(self, timeout: float = WRITER_SHUTDOWN_TIMEOUT) -> int:
+        """
+        It saves everything which is still queued, and then stops the thread. If the thread is still saving when the
+        timeout is up, it is left behind and a warning reports the rows which weren't saved, since they are lost on exit.
+
+        Args:
+          timeout (float): The maximum number of seconds to wait for the queue to be saved.
+
+        Returns:
+          int: The number of rows which weren't saved in time.
+        """
+        if self.is_alive():
+            self.queue.put(STOP)
+            self.join(timeout)
+        if not self.is_alive():
+            return 0
+        with self.queue.mutex:
+            queued = sum(row is not STOP for row in self.queue.queue)
+        unsaved = queued + self.saving
+        warnings.warn(f'The write-behind thread was still saving after {timeout}s, {unsaved} rows are unsaved ({queued} '
+                      f'queued, {self.saving} being saved)', RuntimeWarning)
+        return unsaved
+
+    @property
+    def depth(self) -> int:
+        """
+        It returns the number of rows which are waiting to be saved.
+
+        Returns:
+          int: The number of queued rows.
+        """
+        return self.queue.qsize()
+
+    @property
+    def metrics(self) -> dict[str, int | float | str]:
+        """
+        It returns the state of the writer, to check whether it is keeping up.
+
+        Returns:
+          dict[str, int | float | str]: The queue depth, the counters, the last, mean and max commit latency in ms, and
+            the latest error which made rows be dropped.
+        """
+        latencies = list(self.latencies)
+        return {
+            'depth': self.depth,
+            'committed': self.committed,
+            'retried': self.retried,
+            'dropped': self.dropped,
+            'last_ms': latencies[-1] * 1e3 if latencies else 0.,
+            'mean_ms': sum(latencies) / len(latencies) * 1e3 if latencies else 0.,
+            'max_ms': max(latencies, default=0.) * 1e3,
+            'error': repr(self.error) if self.error else '',
+        }
@@ -1,3 +1,8 @@
+import os
+import warnings
+
+import pygame
+
 from utils import Colors, get_path, pos
 
 WIDTH = 1200
@@ -13,6 +18,35 @@ MEDIUM_FONT_SIZE = 40
 SMALL_FONT_SIZE = 20
 
 FPS = 30
+
+FRAME_PACING_MODES = 'fixed', 'uncapped', 'adaptive'
+FRAME_PACING = os.environ.get('TYPE_RUSH_PACING', 'fixed')
+if FRAME_PACING not in FRAME_PACING_MODES:
+    warnings.warn(f'Unknown frame pacing {FRAME_PACING!r} in TYPE_RUSH_PACING, it should be one of {", ".join(FRAME_PACING_MODES)}, '
+                  f'falling back to fixed', RuntimeWarning)
+    FRAME_PACING = 'fixed'
+ADAPTIVE_MAX_FPS = 240
+URGENT_EVENTS = pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN
+INPUT_LATENCY_SAMPLES = 100
+
+TEXT_CACHE_SIZE = 512
+
+JOB_WORKERS = 2
+JOB_LATENCY_SAMPLES = 100
+
+ROUTER_CELL_SIZE = 100
+
+CURSOR_BLINK = .5
+ERROR_FLASH = .3
+
+PROFILE_FRAMES = 600
+PROFILE_TOGGLE_KEY = pygame.K_F3
+PROFILE_REFRESH = 15
+PROFILE_DROPPED_RATIO = 1.5
+PROFILE_CSV_PATH = os.environ.get('TYPE_RUSH_PROFILE')
+
+REPLAY_STEP = 10 ** 9 // FPS
+
 GAME_NAME = 'Type Rush'
 
 FONT = "Moon.otf"
@@ -21,6 +55,10 @@ FONT_PATH = get_path(__file__, FONT)
 ICON = 'icon.ico'
 ICON_PATH = get_path(__file__, ICON)
 
+STORIES_PATH = get_path(__file__, '..', 'stories')
+CORPUS = 'stories.corpus'
+CORPUS_PATH = get_path(__file__, CORPUS)
+
 INITIAL_SPEED = .5
 TEXT_SPEED = .001
 
@@ -37,4 +75,4 @@ RIGHT_BUTTON_COORDS = pos(3 * WIDTH / 4, 5 * HEIGHT / 8)
 LEFT_BUTTON_COLORS = Colors.GREEN, Colors.BRIGHT_GREEN
 RIGHT_BUTTON_COLORS = Colors.RED, Colors.BRIGHT_RED
 
-__all__ = ('WIDTH', 'HEIGHT', 'DIMENSIONS', 'SCREEN_COLOR', 'TEXT_COLOR', 'LARGER_FONT_SIZE', 'LARGE_FONT_SIZE', 'MEDIUM_FONT_SIZE', 'SMALL_FONT_SIZE', 'FPS', 'GAME_NAME', 'FONT', 'FONT_PATH', 'ICON', 'ICON_PATH', 'INITIAL_SPEED', 'TEXT_SPEED', 'BUTTON_WIDTH', 'BUTTON_HEIGHT', 'BUTTON_SIZE', 'LEFT_BUTTON_TEXT', 'RIGHT_BUTTON_TEXT', 'LEFT_BUTTON_COORDS', 'RIGHT_BUTTON_COORDS', 'LEFT_BUTTON_COLORS', 'RIGHT_BUTTON_COLORS')
+__all__ = ('WIDTH', 'HEIGHT', 'DIMENSIONS', 'SCREEN_COLOR', 'TEXT_COLOR', 'LARGER_FONT_SIZE', 'LARGE_FONT_SIZE', 'MEDIUM_FONT_SIZE', 'SMALL_FONT_SIZE', 'FPS', 'FRAME_PACING_MODES', 'FRAME_PACING', 'ADAPTIVE_MAX_FPS', 'URGENT_EVENTS', 'INPUT_LATENCY_SAMPLES', 'TEXT_CACHE_SIZE', 'JOB_WORKERS', 'JOB_LATENCY_SAMPLES', 'ROUTER_CELL_SIZE', 'CURSOR_BLINK', 'ERROR_FLASH', 'PROFILE_FRAMES', 'PROFILE_TOGGLE_KEY', 'PROFILE_REFRESH', 'PROFILE_DROPPED_RATIO', 'PROFILE_CSV_PATH', 'REPLAY_STEP', 'GAME_NAME', 'FONT', 'FONT_PATH', 'ICON', 'ICON_PATH', 'STORIES_PATH', 'CORPUS', 'CORPUS_PATH', 'INITIAL_SPEED', 'TEXT_SPEED', 'BUTTON_WIDTH', 'BUTTON_HEIGHT', 'BUTTON_SIZE', 'LEFT_BUTTON_TEXT', 'RIGHT_BUTTON_TEXT', 'LEFT_BUTTON_COORDS', 'RIGHT_BUTTON_COORDS', 'LEFT_BUTTON_COLORS', 'RIGHT_BUTTON_COLORS')
@@ -1,97 +1,156 @@
-import random
-import string
 import time
-from typing import Iterator
 
 import pygame
-from playsound import playsound
 
-from config import EXIT_SOUND_PATH
-from game_files.story_maker import parse_stories
+from audio import audio
+from config import KEY_SOUNDS
+from database_files.encoding import Keystroke, Letter
+from game_files.pending import PendingText
+from game_files.story_maker import load_corpus
+from leaderboard_system.leaderboard import standings
 from scenes import set_scene
 from utils import *
 
+
+def quit_game() -> None:
+    """
+    Say goodbye, and close the game once the goodbye is over, while the frames keep being drawn.
+    """
+    audio.announce('bye')
+    scheduler.after(audio.length('bye'), stop)
+
+
 left_default_text = Text(LEFT_BUTTON_TEXT, LEFT_BUTTON_COORDS, *BUTTON_SIZE, background_color=LEFT_BUTTON_COLORS[0], font=MediumFont)
 LEFT_BUTTON = Button(left_default_text, {'background_color': LEFT_BUTTON_COLORS[1]})
 right_default_text = Text(RIGHT_BUTTON_TEXT, RIGHT_BUTTON_COORDS, *BUTTON_SIZE, background_color=RIGHT_BUTTON_COLORS[0], font=MediumFont)
-RIGHT_BUTTON = Button(right_default_text, {'background_color': RIGHT_BUTTON_COLORS[1]}, action=lambda: [pygame.display.quit(), playsound(EXIT_SOUND_PATH,), stop()])
+RIGHT_BUTTON = Button(right_default_text, {'background_color': RIGHT_BUTTON_COLORS[1]}, action=quit_game)
 
 LOGOUT_BUTTON = RIGHT_BUTTON.modify({'text': 'Logout', 'position': pos(LEFT_BUTTON_COORDS[0], 7 * HEIGHT / 8)})
-STATS_BUTTON = LEFT_BUTTON.modify({'text': 'View Stats', 'position': pos(RIGHT_BUTTON_COORDS[0], 7 * HEIGHT / 8)}, action=lambda: set_scene(mem['history']))
+STATS_BUTTON = LEFT_BUTTON.modify({'text': 'View Stats', 'position': pos(RIGHT_BUTTON_COORDS[0], 7 * HEIGHT / 8)}, action=partial(set_scene, 'history'))
+LEADERBOARD_BUTTON = STATS_BUTTON.modify({'text': 'Leaderboard', 'position': pos(WIDTH / 2, 7 * HEIGHT / 8)}, action=partial(set_scene, 'leaderboard'))
+RACE_BUTTON = STATS_BUTTON.modify({'text': 'Race', 'position': pos(WIDTH / 2, 5 * HEIGHT / 8)}, action=partial(set_scene, 'race'))
 
 
 class Game(BaseScreen):
     """
     Attributes:
+      clock (function): The monotonic clock of the game, in nanoseconds. It can be swapped out, to replay a game faster
+        than real time.
+      headless (bool): Weather the game is run without a window, in which case the live graph is never detached.
       scene_name (str): The name of the game.
       scene (function): The current scene.
       score (int): The current score of the player.
-      word (str | None): The current word being typed.
+      word (PendingText | None): The part of the story which is on the screen, but hasn't been typed yet.
       wrong (int): The number of wrong guesses.
-      last_call (float): The time when the letter had last been added.
-      graph_call (float): The time when the graph had last updated.
+      last_call (float): The time when the letter had last been added, -inf if it never has.
+      graph_call (float): The time when the graph had last updated, -inf if it never has.
       sleep_time (float): The delay before adding a new letter to the story.
-      word_rect (Text | None): The text object of the word.
-      story (Iterator[str]): The story on the screen to be typed.
+      word_rect (pygame.Rect | None): The area covered by the word.
+      scroller (Scroller): The pre-rendered glyphs of the word, which are drawn on the screen.
+      story_index (int): The index of the story in the corpus.
+      story (str): The story on the screen to be typed.
+      started (int): The time on the clock when the game started.
+      keystrokes (list[Keystroke]): The keys pressed during the game.
+      letters (list[Letter]): The letters added as time went by during the game. The ones added at the start, and when
+        nothing was left to type, follow from the keys, so they aren't logged.
       graph (LiveGraph): The interactive graph, which shows the users typing speed.
+      title (Text): The name of the game, or the score of the last game, shown on the menu.
+      score_text (Text): The score shown during the game.
+      best_text (Text): The best score of the player shown during the game.
+      record_text (Text): The best score of anyone shown during the game.
     """
-    def __init__(self) -> None:
+    clock: Callable[[], int] = time.monotonic_ns
+    headless: bool = False
+
+    def __init__(self, story_index: Optional[int] = None) -> None:
         """
         Initializes and sets the game scene ready for action.
+
+        Args:
+          story_index (int, optional): The index of the story in the corpus. Defaults to a random story.
         """
         self.scene_name: str = GAME_NAME
         self.scene: Callable[[], None] = self.draw_outer_scene
         self.score: int = 0
-        self.word: str | None = None
+        self.word: PendingText | None = None
         self.wrong: int = 0
-        self.last_call: float = 0
-        self.graph_call: float = 0
+        self.last_call: float = float('-inf')
+        self.graph_call: float = float('-inf')
         self.sleep_time: float = .5
         self.word_rect: pygame.Rect | None = None
-
-        story = random.choice(parse_stories())
-        self.story: Iterator[str] = iter(story)
+        self.scroller: Scroller = Scroller(glyph_atlas(LargeFont, Colors.BLUE), pos(WIDTH - 25, HEIGHT // 2))
+        self.title: Text = Text(self.scene_name, (WIDTH/2, HEIGHT/4), font=LargerFont)
+        self.score_text: Text = Text('', GAME_AREA // 8, font=MediumFont, text_color=Colors.GREY)
+        self.best_text: Text = self.score_text.modify(position=pos(WIDTH * 5 // 6, HEIGHT // 8))
+        self.record_text: Text = self.score_text.modify(position=pos(WIDTH // 2, HEIGHT // 8))
 
         LEFT_BUTTON.action = self.start_game
-        LOGOUT_BUTTON.action = partial(set_scene, mem['login'])
+        LOGOUT_BUTTON.action = partial(set_scene, 'login')
+        if not self.headless and 'user' in mem:
+            standings.load(mem['user'])
 
-        self.graph: LiveGraph = LiveGraph(self, story)
+        self.load_story(story_index)
+
+    def load_story(self, story_index: Optional[int] = None) -> None:
+        """
+        Open the story to be played, with empty logs and a new live graph for it.
+
+        Args:
+          story_index (int, optional): The index of the story in the corpus. Defaults to a random story.
+        """
+        corpus = load_corpus()
+        self.story_index: int = corpus.random() if story_index is None else story_index
+        self.story: str = corpus[self.story_index]
+        self.started: int = 0
+        self.keystrokes: list[Keystroke] = []
+        self.letters: list[Letter] = []
+        self.graph: LiveGraph = LiveGraph(self, corpus.rig(self.story_index))
 
     def draw_outer_scene(self) -> None:
         """
         This function draws the menu of the game, which has the play button,
-        the quit button, the logout button and the stats button.
+        the quit button, the race button, the logout button, the stats button and the leaderboard button.
         """
-        Text(self.scene_name, (WIDTH/2, HEIGHT/4), font=LargerFont).draw()
+        self.title.text = self.scene_name
+        self.title.draw()
         LEFT_BUTTON.draw(self)
         RIGHT_BUTTON.draw(self)
         LOGOUT_BUTTON.draw(self)
         STATS_BUTTON.draw(self)
+        LEADERBOARD_BUTTON.draw(self)
+        RACE_BUTTON.draw(self)
 
     def start_game(self) -> None:
         """
         Set this class as the current scene, and prepare the word.
         """
         self.scene = self.draw_game
-        self.word = self.next_letter
+        self.started = self.clock()
+        self.word = PendingText(self.story)
+        self.add_letter()
 
     def draw_graph(self) -> None:
         """
         Update the graph if it's been more than one second.
         """
-        if (now := time.time()) - self.graph_call > 1:
+        if (now := self.now) - self.graph_call > 1:
             self.graph_call = now
             self.graph.plot()
 
     def draw_game(self) -> None:
         """
-        Draw the scores, and update the graph.
+        Draw the scores, and update the graph. The best scores come from the standings kept in memory, so drawing them
+        doesn't ask the database.
         """
-        score = Text(f'Your Score: {self.score}', GAME_AREA // 8, font=MediumFont, text_color=Colors.GREY)
-        score.draw()
-        score.modify(f'Score to Beat: {self.score}', pos(WIDTH * 5 // 6, HEIGHT // 8)).draw()
-        self.word_rect = Text(self.word, pos(WIDTH - 25, HEIGHT // 2), font=LargeFont, text_color=Colors.BLUE).draw()
+        self.score_text.text = f'Your Score: {self.score}'
+        self.score_text.draw()
+        self.best_text.text = f'Score to Beat: {max(standings.personal, self.score)}'
+        self.best_text.draw()
+        self.record_text.text = f'Record: {max(standings.record, self.score)}'
+        self.record_text.draw()
+        self.word_rect = self.scroller.draw()
         self.draw_graph()
+        self.graph.draw()
 
     @property
     def char(self) -> str:
@@ -103,37 +162,46 @@ class Game(BaseScreen):
           str: The first letter of the word.
         """
         if not self.word:
-            self.word += self.next_letter
-        return self.word[0]
+            self.add_letter()
+        return self.word.first
 
     def handle_keys(self) -> None:
         """
         Handle the key presses and check if the key pressed is the same as the first letter of the word.
         If it is, remove the first letter of the word and increase the score.
         If it is not, increase the number of wrong guesses.
+        Every key is added to the keystroke log at the time it arrived at, along with the number of characters which were
+        still to be typed.
         """
         for event in self.events:
             if event.type == pygame.QUIT:
                 stop()
-            elif self.word and event.type == pygame.KEYDOWN:
-                if event.unicode.casefold() == self.char.casefold():
+            elif self.word and event.type == pygame.KEYDOWN and event.unicode:
+                hit = event.unicode.casefold() == self.char.casefold()
+                elapsed = max(getattr(event, 'arrived', self.clock()), self.started) - self.started
+                if self.keystrokes:
+                    elapsed = max(elapsed, self.keystrokes[-1].time)
+                self.keystrokes.append(Keystroke(elapsed, event.unicode, hit, len(self.word)))
+                if KEY_SOUNDS:
+                    audio.play('hit' if hit else 'miss')
+                if hit:
                     self.score += 1
-                    while True:
-                        self.word = self.word[1:]
-                        if self.char in string.ascii_letters:
-                            break
+                    removed, added = self.word.consume()
+                    for _ in range(removed):
+                        self.scroller.pop()
+                    self.scroller.push(added)
                 else:
                     self.wrong += 1
 
     @property
     def now(self) -> float:
         """
-        A wrapper for the time.time() function within the class as a descriptor, for easier access.
+        The time on the clock of the game in seconds, as a descriptor, for easier access.
 
         Returns:
-          float: The current time in seconds since the Epoch.
+          float: The current time in seconds, from an arbitrary starting point.
         """
-        return time.time()
+        return self.clock() / 1e9
 
     @property
     def next_letter(self) -> str:
@@ -143,25 +211,45 @@ class Game(BaseScreen):
         Returns:
           str: The next letter from the story.
         """
-        return next(self.story)
+        return self.word.append()
+
+    def add_letter(self) -> None:
+        """
+        Add the next letter from the story to the end of the word.
+        """
+        self.scroller.push(self.next_letter)
 
     def handler(self) -> None:
         """
-        Add the next letter from the story in every specified interval, and increase the game speed.
-        And end the game if the word has gone off the screen.
+        Add the next letter from the story in every specified interval.
+        """
+        if self.word is not None and self.now - self.last_call > self.sleep_time:
+            self.scroll()
+
+    def scroll(self) -> None:
+        """
+        Add the next letter from the story, and increase the game speed. And end the game if the word has gone off the
+        screen. The letter is logged with the time it was added at, and the number of keys pressed before it, so a
+        replay can add it at the same point of the game.
         """
-        if isinstance(self.word, str) and self.now - self.last_call > self.sleep_time:
-            self.word = self.word + self.next_letter
-            self.sleep_time -= TEXT_SPEED
+        self.letters.append(Letter(self.clock() - self.started, len(self.keystrokes)))
+        self.add_letter()
+        self.sleep_time -= TEXT_SPEED
+
+        if self.word_rect and self.word_rect.left < 0:
+            self.game_over()
 
-            if self.word_rect and self.word_rect.left < 0:
-                score = self.score
-                self.graph.save()
-                self.__init__()
-                self.scene_name = f'Your score was {score}'
-                LEFT_BUTTON.text = 'Play again!'
+        self.last_call = self.now
 
-            self.last_call = self.now
+    def game_over(self) -> None:
+        """
+        Save the game, along with its keystroke and letter logs, and go back to the menu with a new story, showing the score.
+        """
+        score = self.score
+        self.graph.save()
+        self.__init__()
+        self.scene_name = f'Your score was {score}'
+        LEFT_BUTTON.default_text.text = LEFT_BUTTON.active_text.text = 'Play again!'
 
 
 if True:
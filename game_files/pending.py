@@ -0,0 +1,110 @@
+import string
+from array import array
+
+
+def index_letters(story: str) -> array:
+    """
+    It makes a table which has, for every position in the story, the position of the next letter at or after it.
+
+    Args:
+      story (str): The story to be indexed.
+
+    Returns:
+      array: The table, with one extra entry at the end, which is the length of the story.
+    """
+    table = array('l', [len(story)]) * (len(story) + 1)
+    after = len(story)
+    for index in range(len(story) - 1, -1, -1):
+        if story[index] in string.ascii_letters:
+            after = index
+        table[index] = after
+    return table
+
+
+class PendingText:
+    """
+    The part of the story which has been shown to the player, but hasn't been typed yet.
+    It is a window into the story, so adding and typing letters only move its ends, and nothing is ever copied.
+
+    Attributes:
+      story (str): The story being typed.
+      head (int): The position of the first pending character in the story.
+      tail (int): The position right after the last pending character in the story.
+      typeable (array): The position of the next letter at or after every position in the story.
+    """
+    def __init__(self, story: str) -> None:
+        """
+        All initial configuration for the PendingText is done here.
+
+        Args:
+          story (str): The story to be typed.
+        """
+        self.story = story
+        self.head = 0
+        self.tail = 0
+        self.typeable = index_letters(story)
+
+    def append(self) -> str:
+        """
+        Shows the next character of the story to the player.
+
+        Raises:
+          StopIteration: If the whole story has already been shown.
+
+        Returns:
+          str: The character which was added.
+        """
+        if self.tail >= len(self.story):
+            raise StopIteration
+        self.tail += 1
+        return self.story[self.tail - 1]
+
+    def consume(self) -> tuple[int, str]:
+        """
+        Removes the first pending character, along with everything after it up to the next letter.
+        If that goes past the end of the pending text, the story is shown up to that letter.
+
+        Raises:
+          StopIteration: If there are no more letters left in the story.
+
+        Returns:
+          tuple[int, str]: The number of characters removed from the front, and the characters added to the end.
+        """
+        target = self.typeable[self.head + 1]
+        if target >= len(self.story):
+            raise StopIteration
+        removed = min(target, self.tail) - self.head
+        added = ''
+        if target >= self.tail:
+            added = self.story[target:target + 1]
+            self.tail = target + 1
+        self.head = target
+        return removed, added
+
+    @property
+    def first(self) -> str:
+        """
+        The first pending character, which is the one the player has to type.
+
+        Returns:
+          str: The first pending character.
+        """
+        return self.story[self.head]
+
+    def __len__(self) -> int:
+        """
+        It returns the number of pending characters.
+
+        Returns:
+          int: Number of characters which have been shown, but not typed yet.
+        """
+        return self.tail - self.head
+
+    def __str__(self) -> str:
+        """
+        It returns the pending characters, this copies them, so it shouldn't be used every frame.
+
+        Returns:
+          str: The pending characters.
+        """
+        return self.story[self.head:self.tail]
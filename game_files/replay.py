@@ -0,0 +1,192 @@
+"""
+Replays a saved game from its keystroke and letter logs, headless and faster than real time.
+
+The game runs against a clock which only moves when the replay moves it. Every key is pressed at the nanosecond it was
+logged at, and every letter the game added as time went by is added after the same number of keys as it was, so the
+keys hit and miss against the same letters as in the real game, and a replay can be compared key by key against the log
+it came from. Between them, the replay runs a frame every step, which is when the graph is sampled. Once the logged
+letters run out, the letters are added by the clock again, a frame at a time, until the word runs off the screen.
+
+Run it with `python -m game_files.replay SCORE_ID`.
+"""
+import argparse
+import time
+from itertools import islice
+from typing import Iterator, Optional, Sequence
+
+import pygame
+
+from database_files.encoding import Keystroke, Letter
+from game_files.game import Game
+from game_files.story_maker import load_corpus
+from utils import REPLAY_STEP
+
+
+class ReplayGame(Game):
+    """
+    A game which plays itself from a keystroke log and a letter log.
+
+    Attributes:
+      log (Sequence[Keystroke]): The keystroke log being replayed.
+      letter_log (Sequence[Letter]): The letters the game added as time went by, which are added at the same point.
+      step (int): The nanoseconds the clock moves by between two frames.
+      time (int): The time on the clock of the replay.
+      frames (int): The number of frames run.
+      finished (bool): Weather the game is over.
+    """
+    headless = True
+
+    def __init__(self, story_index: int, log: Sequence[Keystroke], letter_log: Sequence[Letter] = (), step: int = REPLAY_STEP) -> None:
+        """
+        All initial configuration for the replay is done here.
+
+        Args:
+          story_index (int): The index in the corpus of the story which was played.
+          log (Sequence[Keystroke]): The keystroke log being replayed.
+          letter_log (Sequence[Letter]): The letters the game added as time went by. Without them, the letters are
+            added by the clock of the replay from the start, so the keys may not hit the same letters as they did.
+          step (int): The nanoseconds the clock moves by between two frames.
+        """
+        self.time = 0
+        super().__init__(story_index)
+        self.log = log
+        self.letter_log = letter_log
+        self.step = step
+        self.frames = 0
+        self.finished = False
+
+    def clock(self) -> int:
+        """
+        The clock of the replay, which stands still between frames.
+
+        Returns:
+          int: The time on the clock in nanoseconds.
+        """
+        return self.time
+
+    def frame(self, events: list[pygame.event.Event]) -> None:
+        """
+        It runs a frame of the game without drawing it, in the same order as BaseScreen.run_frame.
+
+        Args:
+          events (list[pygame.event.Event]): The events of the frame.
+        """
+        self.events = events
+        self.handle_keys()
+        self.word_rect = self.scroller.rect
+        self.draw_graph()
+        self.handler()
+        self.frames += 1
+
+    def handler(self) -> None:
+        """
+        It only adds the letters by the clock once the logged ones ran out, until then they are added by run.
+        """
+        if len(self.letters) >= len(self.letter_log):
+            super().handler()
+
+    def advance(self, until: int) -> None:
+        """
+        It runs the frames between now and a point in time, and then moves the clock to it.
+
+        Args:
+          until (int): The time on the clock to move to.
+        """
+        while not self.finished and self.time + self.step <= until:
+            self.time += self.step
+            self.frame([])
+        self.time = max(self.time, until)
+
+    def timeline(self) -> Iterator[tuple[int, Optional[Keystroke]]]:
+        """
+        It merges the logs in the order things happened in the game, every letter after the keys pressed before it.
+
+        Returns:
+          Iterator[tuple[int, Keystroke | None]]: The nanoseconds since the start, and the key, or None for a letter.
+        """
+        pressed = 0
+        for letter in self.letter_log:
+            for keystroke in islice(self.log, pressed, letter.keys):
+                yield keystroke.time, keystroke
+            pressed = max(pressed, letter.keys)
+            yield letter.time, None
+        for keystroke in islice(self.log, pressed, None):
+            yield keystroke.time, keystroke
+
+    def run(self) -> 'ReplayGame':
+        """
+        It plays the game from the logs, and then until the word runs off the screen, or the story runs out.
+
+        Returns:
+          ReplayGame: The replay, for chaining.
+        """
+        self.start_game()
+        try:
+            for elapsed, keystroke in self.timeline():
+                self.advance(self.started + elapsed)
+                if self.finished:
+                    break
+                if keystroke:
+                    self.frame([pygame.event.Event(pygame.KEYDOWN, key=ord(keystroke.key), unicode=keystroke.key, arrived=self.time)])
+                else:
+                    self.word_rect = self.scroller.rect
+                    self.scroll()
+            while not self.finished:
+                self.advance(self.time + self.step)
+        except StopIteration:
+            self.finished = True
+        return self
+
+    def game_over(self) -> None:
+        """
+        It ends the replay, without saving it or going back to the menu.
+        """
+        self.finished = True
+
+    @property
+    def diverged(self) -> int:
+        """
+        The number of keys which had a different outcome, or were pressed with a different backlog, than in the log.
+
+        Returns:
+          int: The number of keys which don't match the log, including the ones the replay never got to.
+        """
+        mismatches = sum(logged[1:] != replayed[1:] for logged, replayed in zip(self.log, self.keystrokes))
+        return mismatches + abs(len(self.log) - len(self.keystrokes))
+
+
+def main() -> None:
+    """
+    It replays a saved game, and prints how it compares to the original.
+    """
+    parser = argparse.ArgumentParser(description='Replays a saved game from its keystroke and letter logs.')
+    parser.add_argument('score_id', type=int, help='The id of the game in the scores table.')
+    parser.add_argument('--step', type=float, default=REPLAY_STEP / 1e6, help='The milliseconds between two frames.')
+    args = parser.parse_args()
+
+    from database_files.bootstrap import Bootstrap
+    from database_files.database import Score, open_session
+
+    Bootstrap().start()
+    with open_session() as session:
+        if not (score := session.get(Score, args.score_id)):
+            parser.error(f'There is no game with the id {args.score_id}')
+        if score.story_hash is None or not score.keystrokes or not score.letters:
+            parser.error(f'The game {args.score_id} was saved before its keys and letters were logged, so it can\'t be replayed')
+        story_id, story_digest, log, letters, final_score = score.story_id, score.story_hash, score.keystroke_log, score.letter_log, score.final_score
+
+    try:
+        story_id = load_corpus().find(story_digest, story_id)
+    except LookupError:
+        parser.error(f'The story the game {args.score_id} was played on is no longer in the corpus')
+
+    start = time.perf_counter()
+    replay = ReplayGame(story_id, log, letters, int(args.step * 1e6)).run()
+    elapsed = time.perf_counter() - start
+    played = replay.time - replay.started
+    print(f'score {replay.score} (saved {final_score}), {replay.wrong} wrong, {len(log)} keys, {replay.diverged} diverged')
+    print(f'{played / 1e9:.1f}s played in {elapsed:.3f}s over {replay.frames} frames, {played / 1e9 / elapsed:.0f}x real time')
+
+
+if __name__ == '__main__':
+    main()
@@ -1,33 +1,299 @@
+import argparse
+import hashlib
+import mmap
+import os
+import random
+import re
 import string
+import struct
+from functools import lru_cache
+from typing import Iterator, Optional
 
-from utils import get_path
+from utils import STORIES_PATH, CORPUS_PATH
 
-stories = []
-mapping = {_: _ for _ in string.ascii_letters+' '}
+DELIMITER = '---'
+NOT_TYPEABLE = re.compile(f'[^{string.ascii_letters} ]')
 
+CORPUS_MAGIC = b'TRCORPUS'
+CORPUS_VERSION = 3
+CORPUS_HEADER = struct.Struct('<8sIIQI')
+CORPUS_ENTRY = struct.Struct('<QIIII')
+CORPUS_INDEX = struct.Struct('<I')
 
-def char_filter(story: list[str]) -> str:
+STORY_HASH_SIZE = 8
+
+
+def parse_stories() -> list[str]:
     """
-    It removes all the non ascii letters.
+    It parses the file in which the stories are written abd splits the contents by the delimiter '---', and finally
+    returns a list of the stories.
+
+    Returns:
+      list[str]: A list of strings.
+    """
+    with open(STORIES_PATH, 'r') as file:
+        return [story.replace('\n', ' ').strip() for story in file.read().split(DELIMITER)]
+
+
+def iter_stories(path: str, chunk_size: int = 1 << 20) -> Iterator[str]:
+    """
+    It reads the stories file a chunk at a time and yields the stories one by one, so the whole file is never in memory.
+
+    Args:
+      path (str): The path of the stories file.
+      chunk_size (int): The number of characters read at a time. Defaults to 1 MiB.
+
+    Yields:
+      str: The stories, in the same form as the ones returned by parse_stories.
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        buffer = ''
+        while chunk := file.read(chunk_size):
+            *complete, buffer = (buffer + chunk).split(DELIMITER)
+            for story in complete:
+                yield story.replace('\n', ' ').strip()
+        yield buffer.replace('\n', ' ').strip()
+
+
+def story_stats(story: str) -> tuple[int, int, int]:
+    """
+    It computes the word length stats of a story, counting only the ascii letters and spaces.
 
     Args:
-      story (list): The raw story to be filtered.
+      story (str): The story.
 
     Returns:
-      str: The story as a single string with the non ascii letters removed.
+      tuple[int, int, int]: The rig used to turn letters per second into WPM, the number of words and the number of letters.
     """
-    for pos, char in enumerate(story):
-        story[pos] = mapping.get(char, '')
-    return ''.join(story)
+    word_len = [len(_) for _ in NOT_TYPEABLE.sub('', story).split()]
+    letters = sum(word_len)
+    return (60*len(word_len)//letters if letters else 0), len(word_len), letters
 
 
-def parse_stories() -> list[str]:
+def story_hash(story: str) -> str:
     """
-    It parses the file in which the stories are written abd splits the contents by the delimiter '---', and finally
-    returns a list of the stories.
+    It fingerprints a story, so a saved game can tell whether the story at its index is still the one it was played on.
+
+    Args:
+      story (str): The story.
 
     Returns:
-      list[str]: A list of strings.
+      str: The hex digest of the story, 2 * STORY_HASH_SIZE characters long.
     """
-    with open(get_path(__file__, '..', 'stories'), 'r') as file:
-        return [story.replace('\n', ' ').strip() for story in file.read().split('---')]
+    return hashlib.blake2b(story.encode(), digest_size=STORY_HASH_SIZE).hexdigest()
+
+
+def build_corpus(source: str, destination: str) -> int:
+    """
+    It compiles the stories file into the corpus format, which is a header, the encoded stories, a table with the
+    offset, length and stats of every story, and the indices of the stories which aren't empty. Empty stories are kept
+    as empty entries, so a story has the same index in the corpus as in parse_stories, which is the index the games are
+    saved and raced with.
+
+    Args:
+      source (str): The path of the stories file.
+      destination (str): The path where the corpus is written.
+
+    Returns:
+      int: The number of stories in the corpus.
+    """
+    entries = []
+    playable = []
+    temporary = f'{destination}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(bytes(CORPUS_HEADER.size))
+        for story in iter_stories(source):
+            data = story.encode()
+            if data:
+                playable.append(CORPUS_INDEX.pack(len(entries)))
+            entries.append(CORPUS_ENTRY.pack(file.tell(), len(data), *story_stats(story)))
+            file.write(data)
+        table = file.tell()
+        file.writelines(entries)
+        file.writelines(playable)
+        file.seek(0)
+        file.write(CORPUS_HEADER.pack(CORPUS_MAGIC, CORPUS_VERSION, len(entries), table, len(playable)))
+    os.replace(temporary, destination)
+    return len(entries)
+
+
+class StoryCorpus:
+    """
+    The compiled stories, which are memory mapped so that picking a story only reads that story from the disk.
+
+    Attributes:
+      file (BinaryIO): The opened corpus file.
+      map (mmap.mmap): The memory map of the corpus file.
+      count (int): The number of stories in the corpus.
+      table (int): The offset of the table of stories in the file.
+      playable (int): The number of stories which aren't empty, whose indices follow the table of stories.
+    """
+    def __init__(self, path: str) -> None:
+        """
+        It opens the corpus and checks that it is in the expected format.
+
+        Args:
+          path (str): The path of the corpus.
+
+        Raises:
+          ValueError: If the file isn't a corpus of the current version.
+        """
+        self.file = open(path, 'rb')
+        self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.table, self.playable = CORPUS_HEADER.unpack_from(self.map)
+        if magic != CORPUS_MAGIC or version != CORPUS_VERSION:
+            self.close()
+            raise ValueError(f'{path} is not a version {CORPUS_VERSION} story corpus')
+
+    def entry(self, index: int) -> tuple[int, int, int, int, int]:
+        """
+        It reads the entry of a story from the table.
+
+        Args:
+          index (int): The index of the story.
+
+        Returns:
+          tuple[int, int, int, int, int]: The offset, length in bytes, rig, number of words and number of letters of the story.
+        """
+        if not 0 <= index < self.count:
+            raise IndexError('story index out of range')
+        return CORPUS_ENTRY.unpack_from(self.map, self.table + index * CORPUS_ENTRY.size)
+
+    def __getitem__(self, index: int) -> str:
+        """
+        It reads a story from the corpus.
+
+        Args:
+          index (int): The index of the story.
+
+        Returns:
+          str: The story.
+        """
+        offset, length, *_ = self.entry(index)
+        return self.map[offset:offset + length].decode()
+
+    def hash(self, index: int) -> str:
+        """
+        It fingerprints a story of the corpus.
+
+        Args:
+          index (int): The index of the story.
+
+        Returns:
+          str: The hash of the story, from story_hash.
+        """
+        return story_hash(self[index])
+
+    def rig(self, index: int) -> int:
+        """
+        It returns the rig of a story, which is used to convert the letters typed per second into WPM.
+
+        Args:
+          index (int): The index of the story.
+
+        Returns:
+          int: The rig of the story.
+        """
+        return self.entry(index)[2]
+
+    def random(self) -> int:
+        """
+        It picks a random story, which isn't empty, from the indices of those stored after the table of stories.
+
+        Raises:
+          ValueError: If every story is empty.
+
+        Returns:
+          int: The index of the story.
+        """
+        if not self.playable:
+            raise ValueError('The corpus has no stories')
+        offset = self.table + self.count * CORPUS_ENTRY.size + random.randrange(self.playable) * CORPUS_INDEX.size
+        return CORPUS_INDEX.unpack_from(self.map, offset)[0]
+
+    def find(self, digest: str, hint: Optional[int] = None) -> int:
+        """
+        It finds the story with the given hash, looking at the given index first, since the stories rarely move.
+
+        Args:
+          digest (str): The hash of the story, from story_hash.
+          hint (int, optional): The index the story is expected at.
+
+        Raises:
+          LookupError: If no story in the corpus has that hash.
+
+        Returns:
+          int: The index of the story.
+        """
+        if hint is not None and 0 <= hint < self.count and self.hash(hint) == digest:
+            return hint
+        for index in range(self.count):
+            if self.hash(index) == digest:
+                return index
+        raise LookupError(f'No story in the corpus has the hash {digest}')
+
+    def __len__(self) -> int:
+        """
+        It returns the number of stories in the corpus.
+
+        Returns:
+          int: Number of stories.
+        """
+        return self.count
+
+    def close(self) -> None:
+        """
+        It closes the memory map and the file.
+        """
+        self.map.close()
+        self.file.close()
+
+
+def is_stale(source: str, destination: str) -> bool:
+    """
+    Checks whether the corpus has to be rebuilt, because it doesn't exist or the stories file was changed after it.
+
+    Args:
+      source (str): The path of the stories file.
+      destination (str): The path of the corpus.
+
+    Returns:
+      bool: Weather the corpus is missing or older than the stories file.
+    """
+    return not os.path.exists(destination) or os.path.getmtime(destination) < os.path.getmtime(source)
+
+
+@lru_cache(maxsize=None)
+def load_corpus() -> StoryCorpus:
+    """
+    It opens the corpus, building it first if the stories file has changed since it was last built, or if it was built
+    in an older format.
+
+    Returns:
+      StoryCorpus: The opened corpus, which is shared by everyone.
+    """
+    if is_stale(STORIES_PATH, CORPUS_PATH):
+        build_corpus(STORIES_PATH, CORPUS_PATH)
+    try:
+        return StoryCorpus(CORPUS_PATH)
+    except ValueError:
+        build_corpus(STORIES_PATH, CORPUS_PATH)
+        return StoryCorpus(CORPUS_PATH)
+
+
+def main() -> None:
+    """
+    The command line interface, which rebuilds the corpus from the stories file.
+    """
+    parser = argparse.ArgumentParser(description='Compiles the stories file into a memory mappable corpus.')
+    parser.add_argument('command', choices=['build'])
+    parser.add_argument('--stories', default=STORIES_PATH, help='The path of the stories file.')
+    parser.add_argument('--output', default=CORPUS_PATH, help='The path where the corpus is written.')
+    args = parser.parse_args()
+
+    count = build_corpus(args.stories, args.output)
+    print(f'Built {args.output} with {count} stories')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+"""
+The progress of a player over all their games, computed with NumPy on every game at once.
+The samples of the games are read straight out of their stored blobs, and put into one 2-D array padded with NaN, so
+every statistic is a single vectorized operation over the whole history, however many games there are.
+"""
+import struct
+import zlib
+from typing import NamedTuple, Sequence
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import select
+
+from database_files.database import Score, open_session
+from database_files.encoding import FLAG_ZLIB, PADDING, SCORE_HEADER, SCORE_VERSION, is_encoded
+from graphing.config import ANALYTICS_WINDOW, ANALYTICS_BANDS
+
+
+class Trends(NamedTuple):
+    """
+    The progress of a player, from their first game to their latest one.
+
+    Attributes:
+      means (np.ndarray): The mean WPM of every game.
+      peaks (np.ndarray): The peak WPM of every game.
+      consistency (np.ndarray): How steady the WPM of every game was, from 0 to 1, which is 1 minus the coefficient of
+        variation of its seconds.
+      rolling (np.ndarray): The mean WPM over the latest ANALYTICS_WINDOW games, at every game.
+      best (np.ndarray): The best peak WPM so far, at every game.
+      low (np.ndarray): The lower percentile band of the mean WPM over the latest ANALYTICS_WINDOW games, at every game.
+      high (np.ndarray): The upper percentile band of the mean WPM over the latest ANALYTICS_WINDOW games, at every game.
+      improvement (float): The WPM gained per game, from a straight line fitted through the mean WPM of the games.
+    """
+    means: np.ndarray
+    peaks: np.ndarray
+    consistency: np.ndarray
+    rolling: np.ndarray
+    best: np.ndarray
+    low: np.ndarray
+    high: np.ndarray
+    improvement: float
+
+    def __len__(self) -> int:
+        """
+        It returns the number of games.
+
+        Returns:
+          int: The number of games with at least one second played.
+        """
+        return len(self.means)
+
+
+def sample_view(blob: bytes) -> np.ndarray:
+    """
+    It reads the samples of a game straight out of its stored blob, without copying them, unless they are compressed.
+
+    Args:
+      blob (bytes): The stored samples, in either the versioned or the old format.
+
+    Raises:
+      ValueError: If the blob is of a newer version than this code knows about.
+
+    Returns:
+      np.ndarray: The WPM of every second of the game, including the zero padding at the start.
+    """
+    if not is_encoded(blob):
+        return np.frombuffer(blob, np.uint8)
+
+    _, version, flags, count = SCORE_HEADER.unpack_from(blob)
+    if version > SCORE_VERSION:
+        raise ValueError(f'Unknown score encoding version {version}')
+    if flags & FLAG_ZLIB:
+        return np.frombuffer(zlib.decompress(blob[SCORE_HEADER.size:]), '<u2', count)
+    return np.frombuffer(blob, '<u2', count, SCORE_HEADER.size)
+
+
+def load_samples(blobs: Sequence[bytes]) -> np.ndarray:
+    """
+    It puts the samples of many games into one array, a row per game, padded with NaN after the end of every game.
+    The zero padding at the start of every game is left out, and so are the games whose samples can't be decoded, being
+    of a newer version or corrupt.
+
+    Args:
+      blobs (Sequence[bytes]): The stored samples of the games.
+
+    Returns:
+      np.ndarray: The WPM of every second of every game, as float32.
+    """
+    views = []
+    for blob in blobs:
+        try:
+            views.append(sample_view(blob)[PADDING:])
+        except (ValueError, struct.error, zlib.error):
+            continue
+    lengths = np.fromiter(map(len, views), np.intp, len(views))
+    matrix = np.full((len(views), lengths.max(initial=0)), np.nan, np.float32)
+    if views:
+        matrix[np.arange(matrix.shape[1]) < lengths[:, None]] = np.concatenate(views)
+    return matrix
+
+
+def trends(matrix: np.ndarray, window: int = ANALYTICS_WINDOW, bands: tuple[int, int] = ANALYTICS_BANDS) -> Trends:
+    """
+    It computes the progress of a player from the samples of their games, in the order they were played.
+    Games without a single second played are left out.
+
+    Args:
+      matrix (np.ndarray): The samples of the games, as returned by load_samples.
+      window (int): The number of latest games the rolling statistics are computed over.
+      bands (tuple[int, int]): The lower and upper percentiles of the band.
+
+    Returns:
+      Trends: The progress of the player.
+    """
+    played = (~np.isnan(matrix)).sum(axis=1)
+    matrix, played = matrix[played > 0], played[played > 0]
+    if not len(matrix):
+        empty = np.zeros(0)
+        return Trends(empty, empty, empty, empty, empty, empty, empty, 0.)
+
+    means = np.nansum(matrix, axis=1) / played
+    peaks = np.nanmax(matrix, axis=1)
+    deviation = np.sqrt(np.nansum((matrix - means[:, None]) ** 2, axis=1) / played)
+    consistency = np.clip(1 - np.divide(deviation, means, out=np.ones_like(means), where=means > 0), 0, 1)
+
+    window = min(window, len(means))
+    games = np.arange(1, len(means) + 1)
+    starts = np.maximum(games - window, 0)
+    totals = np.concatenate(([0.], np.cumsum(means)))
+    rolling = (totals[games] - totals[starts]) / (games - starts)
+
+    # The first games don't have a whole window of games before them, so their bands are over the games so far.
+    first = [np.percentile(means[:game], bands) for game in range(1, window)]
+    low, high = np.concatenate((np.reshape(first, (-1, 2)).T, np.percentile(sliding_window_view(means, window), bands, axis=1)), axis=1)
+
+    improvement = float(np.polyfit(games, means, 1)[0]) if len(means) > 1 else 0.
+    return Trends(means, peaks, consistency, rolling, np.maximum.accumulate(peaks), low, high, improvement)
+
+
+def load_trends(user_id: int) -> Trends:
+    """
+    It loads all the games of a player from the database, oldest first, and computes their progress.
+    It opens its own session, so it can be run as a background job.
+
+    Args:
+      user_id (int): The id of the player.
+
+    Returns:
+      Trends: The progress of the player.
+    """
+    with open_session() as session:
+        query = select(Score.score).where(Score.user_id == user_id).order_by(Score.date_created, Score.id)
+        blobs = session.execute(query).scalars().all()
+    return trends(load_samples(blobs))
+
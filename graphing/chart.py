@@ -0,0 +1,221 @@
+import math
+from typing import Sequence
+
+import pygame
+
+from graphing.config import *
+from utils import SmallFont, render_text
+
+
+def nice_step(limit: float, ticks: int) -> int:
+    """
+    It picks a round step between the ticks of an axis, so that there are about the given number of ticks on it.
+
+    Args:
+      limit (float): The largest value on the axis.
+      ticks (int): The number of ticks wanted.
+
+    Returns:
+      int: The step, which is 1, 2 or 5 times a power of ten.
+    """
+    raw = max(limit / ticks, 1)
+    magnitude = 10 ** math.floor(math.log10(raw))
+    return next(int(factor * magnitude) for factor in (1, 2, 5, 10) if raw <= factor * magnitude)
+
+
+class Chart:
+    """
+    A chart which is drawn natively on a pygame surface, with the seconds, or the games, on the x-axis starting from 1,
+    and the WPM on the y-axis starting from 0.
+
+    Attributes:
+      surf (pygame.Surface): The surface the chart is drawn on.
+      overlay (pygame.Surface): The transparent surface the filled areas are drawn on.
+      plot (pygame.Rect): The area within the axes.
+      max_x (int): The largest value on the x-axis.
+      max_y (int): The largest value on the y-axis.
+    """
+    def __init__(self, size: tuple[int, int], max_x: int, max_y: int, x_label: str = 'Time (seconds)') -> None:
+        """
+        It creates the surface and draws the axes.
+
+        Args:
+          size (tuple[int, int]): The size of the chart.
+          max_x (int): The largest value on the x-axis.
+          max_y (int): The largest value on the y-axis.
+          x_label (str): The name of the x-axis.
+        """
+        self.surf = pygame.Surface(size)
+        self.surf.fill(CHART_BACKGROUND)
+        self.overlay = pygame.Surface(size, pygame.SRCALPHA)
+        left, top, right, bottom = CHART_MARGINS
+        self.plot = pygame.Rect(left, top, size[0] - left - right, size[1] - top - bottom)
+        self.max_x = max(max_x, 2)
+        self.max_y = max_y or 1
+        self.draw_axes(x_label)
+
+    def point(self, x: float, y: float) -> tuple[float, float]:
+        """
+        It converts a point on the chart to its position on the surface.
+
+        Args:
+          x (float): The second.
+          y (float): The WPM.
+
+        Returns:
+          tuple[float, float]: The position on the surface.
+        """
+        return (self.plot.left + (x - 1) * self.plot.width / (self.max_x - 1),
+                self.plot.bottom - min(y, self.max_y) * self.plot.height / self.max_y)
+
+    def label(self, text: str, **position: tuple[float, float]) -> None:
+        """
+        It draws a label on the chart.
+
+        Args:
+          text (str): The text of the label.
+          **position (tuple[float, float]): The point of the label to place, like center=(x, y).
+        """
+        surf = render_text(SmallFont, text, CHART_AXES)
+        self.surf.blit(surf, surf.get_rect(**position))
+
+    def draw_axes(self, x_label: str) -> None:
+        """
+        It draws the grid, the ticks and the names of the axes.
+
+        Args:
+          x_label (str): The name of the x-axis.
+        """
+        step = nice_step(self.max_y, CHART_TICKS)
+        for value in range(0, self.max_y + 1, step):
+            x, y = self.point(1, value)
+            pygame.draw.line(self.surf, CHART_GRID, (x, y), (self.plot.right, y))
+            self.label(str(value), midright=(x - 6, y))
+
+        step = nice_step(self.max_x, CHART_TICKS)
+        for value in range(step, self.max_x + 1, step):
+            x, y = self.point(value, 0)
+            pygame.draw.line(self.surf, CHART_AXES, (x, y), (x, y + 5))
+            self.label(str(value), midtop=(x, y + 8))
+
+        self.label(x_label, midbottom=(self.plot.centerx, self.surf.get_height() - 4))
+        axis = pygame.transform.rotate(render_text(SmallFont, 'WPM', CHART_AXES), 90)
+        self.surf.blit(axis, axis.get_rect(midleft=(4, self.plot.centery)))
+
+    def fill(self, points: Sequence[tuple[float, float]], color: tuple[int, int, int, int]) -> None:
+        """
+        It fills the area within the points, with a transparent color.
+
+        Args:
+          points (Sequence[tuple[float, float]]): The corners of the area, as points on the chart.
+          color (tuple[int, int, int, int]): The color with its transparency.
+        """
+        if len(points) > 2:
+            pygame.draw.polygon(self.overlay, color, [self.point(*point) for point in points])
+
+    def line(self, samples: Sequence[int], color: tuple[int, int, int], width: int) -> None:
+        """
+        It draws a line through the samples.
+
+        Args:
+          samples (Sequence[int]): The WPM of every second.
+          color (tuple[int, int, int]): The color of the line.
+          width (int): The width of the line.
+        """
+        if len(samples) > 1:
+            pygame.draw.lines(self.surf, color, False, [self.point(x, y) for x, y in enumerate(samples, 1)], width)
+
+    def legend(self, entries: Sequence[tuple[str, tuple[int, int, int, int]]]) -> None:
+        """
+        It draws a legend at the top right of the chart.
+
+        Args:
+          entries (Sequence[tuple[str, tuple[int, int, int, int]]]): The name and color of every entry.
+        """
+        top = self.plot.top + 8
+        for text, color in entries:
+            pygame.draw.rect(self.overlay, color, (self.plot.right - 110, top, 24, 14))
+            self.label(text, midleft=(self.plot.right - 78, top + 7))
+            top += 24
+
+    def render(self) -> pygame.Surface:
+        """
+        It puts the filled areas and the frame on the chart.
+
+        Returns:
+          pygame.Surface: The finished chart, converted to the format of the display.
+        """
+        self.surf.blit(self.overlay, (0, 0))
+        pygame.draw.rect(self.surf, CHART_AXES, self.plot, 1)
+        return self.surf.convert()
+
+
+def line_chart(samples: Sequence[int], size: tuple[int, int] = CHART_SIZE) -> pygame.Surface:
+    """
+    It draws the WPM of every second of a game, with the area under it filled.
+
+    Args:
+      samples (Sequence[int]): The WPM of every second.
+      size (tuple[int, int]): The size of the chart.
+
+    Returns:
+      pygame.Surface: The chart.
+    """
+    chart = Chart(size, len(samples), max(samples, default=0))
+    chart.fill([(1, 0), *enumerate(samples, 1), (len(samples), 0)], CHART_FILL)
+    chart.line(samples, CHART_LINE, 3)
+    return chart.render()
+
+
+def comparison_chart(current: Sequence[int], original: Sequence[int], size: tuple[int, int] = CHART_SIZE) -> pygame.Surface:
+    """
+    It compares two games second by second, filling the area between them in green where the current game was faster,
+    and in red where it was slower. Only the seconds which both the games lasted are shown.
+
+    Args:
+      current (Sequence[int]): The WPM of every second of the game being compared.
+      original (Sequence[int]): The WPM of every second of the game it is compared with.
+      size (tuple[int, int]): The size of the chart.
+
+    Returns:
+      pygame.Surface: The chart.
+    """
+    length = min(len(current), len(original))
+    current, original = current[:length], original[:length]
+    chart = Chart(size, length, max(max(current, default=0), max(original, default=0)))
+
+    for x in range(1, length):
+        a0, a1, b0, b1 = original[x - 1], original[x], current[x - 1], current[x]
+        d0, d1 = b0 - a0, b1 - a1
+        if d0 * d1 < 0:
+            t = d0 / (d0 - d1)
+            crossing = x + t, a0 + (a1 - a0) * t
+            chart.fill([(x, a0), crossing, (x, b0)], CHART_FAST if d0 > 0 else CHART_SLOW)
+            chart.fill([crossing, (x + 1, a1), (x + 1, b1)], CHART_FAST if d1 > 0 else CHART_SLOW)
+        else:
+            chart.fill([(x, a0), (x + 1, a1), (x + 1, b1), (x, b0)], CHART_FAST if d0 > 0 or d1 > 0 else CHART_SLOW)
+
+    chart.legend([('Fast', CHART_FAST), ('Slow', CHART_SLOW)])
+    return chart.render()
+
+
+def progress_chart(trends: 'Trends', size: tuple[int, int] = CHART_SIZE) -> pygame.Surface:
+    """
+    It draws the progress of a player over all their games, the mean WPM of every game, the rolling mean with its
+    percentile band, and the best WPM so far.
+
+    Args:
+      trends (Trends): The progress of the player.
+      size (tuple[int, int]): The size of the chart.
+
+    Returns:
+      pygame.Surface: The chart.
+    """
+    means, rolling, best, low, high = (values.tolist() for values in (trends.means, trends.rolling, trends.best, trends.low, trends.high))
+    chart = Chart(size, len(means), math.ceil(max(max(best, default=0), max(high, default=0))), 'Games')
+    chart.fill([*enumerate(low, 1), *reversed(list(enumerate(high, 1)))], CHART_BAND)
+    chart.line(means, CHART_GAMES, 1)
+    chart.line(rolling, CHART_LINE, 3)
+    chart.line(best, CHART_BEST, 2)
+    chart.legend([('Average', (*CHART_LINE, 255)), ('Best', (*CHART_BEST, 255)), ('Range', CHART_BAND)])
+    return chart.render()
@@ -0,0 +1,30 @@
+LIVE_GRAPH_MODE = 'pygame'
+LIVE_GRAPH_MODES = 'pygame', 'window'
+
+LIVE_GRAPH_SECONDS = 30
+LIVE_GRAPH_RECT = 400, 470, 400, 140
+LIVE_GRAPH_SCALE = 60
+
+LIVE_GRAPH_BACKGROUND = 15, 15, 25
+LIVE_GRAPH_LINE = 9, 167, 224
+LIVE_GRAPH_FILL = 10, 70, 95
+
+CHART_SIZE = 640, 480
+CHART_MARGINS = 70, 20, 20, 60
+CHART_BACKGROUND = 255, 255, 255
+CHART_AXES = 60, 60, 60
+CHART_GRID = 225, 225, 225
+CHART_LINE = 0, 0, 255
+CHART_FILL = 31, 119, 180, 77
+CHART_FAST = 0, 128, 0, 64
+CHART_SLOW = 255, 0, 0, 64
+CHART_TICKS = 6
+CHART_GAMES = 170, 170, 210
+CHART_BEST = 0, 128, 0
+CHART_BAND = 31, 119, 180, 60
+
+GRAPH_CACHE_SIZE = 32
+PAGE_SIZE = 20
+
+ANALYTICS_WINDOW = 20
+ANALYTICS_BANDS = 10, 90
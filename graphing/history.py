@@ -1,90 +1,119 @@
 import math
-from typing import Iterator
+from concurrent.futures import Future
+from datetime import datetime
+from functools import cached_property, partial
+from typing import Optional
 
-import numpy as np
 import pygame
-from matplotlib import pyplot as plt
-from matplotlib.backends import backend_agg
-from numpy import linspace
+from sqlalchemy import and_, func, or_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import defer
 
-from database_files.database import Score
+from database_files.database import Score, get_session
 from game_files.config import HEIGHT, WIDTH, BUTTON_SIZE
+from graphing.chart import line_chart, comparison_chart, progress_chart
+from graphing.config import GRAPH_CACHE_SIZE, PAGE_SIZE
 from mem_hub import mem
 from scenes import set_scene
-from utils import BaseScreen, Button, Text, pos, Colors, screen, GAME_AREA, Font, SmallFont
+from utils import BaseScreen, Button, Text, pos, Colors, GAME_AREA, Font, SmallFont, dirty, jobs, LRUCache
 
 
-def history_iterator() -> Iterator[Score]:
+def history_page(after: Optional[tuple[datetime, int]] = None) -> list[Score]:
     """
-    Fetches the all the scores of the user from the database and returns them as an iterator.
+    Fetches a page of the scores of the user from the database, newest first. The pages are found by seeking past the
+    last score of the previous page on the (user_id, date_created) index, and the samples aren't loaded until they are
+    needed.
 
-    Yields:
-        Score: The score of the user from the database.
+    Args:
+      after (tuple[datetime, int], optional): The date and id of the last score of the previous page.
+
+    Returns:
+      list[Score]: The scores on the page.
+    """
+    query = get_session().query(Score).options(defer(Score.score)).filter_by(user_id=mem['user'].id)
+    if after:
+        date, score_id = after
+        query = query.filter(or_(Score.date_created < date, and_(Score.date_created == date, Score.id < score_id)))
+    return query.order_by(Score.date_created.desc(), Score.id.desc()).limit(PAGE_SIZE).all()
+
+
+def history_count() -> int:
+    """
+    Counts the scores of the user in the database.
+
+    Returns:
+      int: The number of games played by the user.
     """
-    yield from (
-        mem['session'].query(Score)
-        .filter_by(user_id=mem['user'].id)
-        .order_by(Score.date_created.desc()).all()
-    )
+    return get_session().query(func.count(Score.id)).filter_by(user_id=mem['user'].id).scalar()
 
 
-BACK_BUTTON_MAIN = Button(Text('Go Back', pos(WIDTH/2, 3*HEIGHT/4), *BUTTON_SIZE, background_color=Colors.RED, font=Font(60)), {'background_color': Colors.BRIGHT_RED}, action=lambda: set_scene(mem['game_scene']))
+BACK_BUTTON_MAIN = Button(Text('Go Back', pos(WIDTH/2, 3*HEIGHT/4), *BUTTON_SIZE, background_color=Colors.RED, font=Font(60)), {'background_color': Colors.BRIGHT_RED}, action=partial(set_scene, 'game'))
 BACK_BUTTON_SUB = BACK_BUTTON_MAIN.modify({'box_is_centered': False, 'position': pos(20, 3*HEIGHT/8)})
 PREV_BUTTON = BACK_BUTTON_MAIN.modify({'text': 'Previous', 'position': pos(WIDTH/4, 3*HEIGHT/4), 'background_color': Colors.GREEN}, {'background_color': Colors.BRIGHT_GREEN, 'extend': True})
 NEXT_BUTTON = PREV_BUTTON.modify({'text': 'Next', 'position': 3*GAME_AREA/4})
 COMPARE_BUTTON = NEXT_BUTTON.modify({'box_is_centered': False, 'text': 'Compare', 'position': pos(20, 5*HEIGHT/8)})
+PROGRESS_BUTTON = PREV_BUTTON.modify({'text': 'Progress', 'position': pos(WIDTH/2, 7*HEIGHT/8), 'background_color': Colors.BLUE}, {'background_color': Colors.BRIGHT_BLUE, 'extend': True})
 STOP_COMPARE_BUTTON = BACK_BUTTON_MAIN.modify({'box_is_centered': False, 'font': SmallFont, 'text': 'Stop Comparing graph', 'position': pos(20, HEIGHT/2)})
 
+graph_cache = LRUCache(GRAPH_CACHE_SIZE)
+
 
 class History(BaseScreen):
     """
     This is the class which handles everything related to the graphing and displaying the old scores of the player.
 
     Attributes:
-      history (list): The list of all the scores of the player.
+      history (list): The scores of the player on the current page.
+      buttons (list): The buttons of the scores on the current page, which are built once per page.
       page (int): The current page of the history.
+      cursors (list): The date and id of the score each page starts after, None for the first page.
       index (int): The index of the score to display.
       score (Score): The score to display.
       original_score (Score): The score to compare with.
       surf (pygame.Surface): The surface on which the graph is drawn.
       size (pygame.Vector2): The size of the surface on which the graph is drawn.
       scene (function): The function to call to display the graph.
+      trends (Future, optional): The job computing the progress of the player, until the progress chart is drawn.
+      progress_surf (pygame.Surface, optional): The chart of the progress of the player.
+      summary (Text): The numbers of the progress of the player, or why it couldn't be shown, above the chart.
     """
     history: list
+    buttons: list[Button]
     index: int
     score: Score
     page: int = 0
     surf: pygame.Surface
     size: pygame.Vector2
     original_score: Score | None = None
+    trends: Optional[Future] = None
+    progress_surf: Optional[pygame.Surface] = None
+    dirty_rects = True
 
     def __init__(self) -> None:
         """
         Remap the function of the buttons.
         """
-        PREV_BUTTON.action = lambda: setattr(self, 'page', self.page - 1)
-        NEXT_BUTTON.action = lambda: setattr(self, 'page', self.page + 1)
+        self.cursors: list[Optional[tuple[datetime, int]]] = [None]
+        self.summary = Text('Loading your progress...', pos(WIDTH/2, HEIGHT/16), font=SmallFont)
+        PREV_BUTTON.action = lambda: self.load_page(self.page - 1)
+        NEXT_BUTTON.action = lambda: self.load_page(self.page + 1)
         BACK_BUTTON_SUB.action = lambda: setattr(self, 'scene', self.show_history)
         COMPARE_BUTTON.action = lambda: [setattr(self, 'original_score', self.score), setattr(self, 'scene', self.show_history)]
         STOP_COMPARE_BUTTON.action = lambda: [setattr(self, 'original_score', None), lambda: setattr(self, 'scene', self.show_history)]
+        PROGRESS_BUTTON.action = self.open_progress
 
     def show_history(self) -> None:
         """
         It displays the history of the user's games in a grid of buttons.
         """
         if not hasattr(self, 'history'):
-            self.history = list(history_iterator())
-
-        if tot := len(rows := self.history[20*self.page: 20*(self.page+1)]):
-            ncols = math.ceil(math.sqrt(tot))
-            nrows = math.ceil(tot/ncols)
+            self.load_page(self.page)
 
-            for nrow, y in enumerate(linspace(0, WIDTH, nrows+2)[1:-1]):
-                curr = rows[ncols*nrow:ncols*(nrow+1)]
-                for ncol, x in enumerate(linspace(0, 3*HEIGHT/4, len(curr)+2)[1:-1]):
-                    Button(Text(f'{curr[ncol].date_created}', pos(y, x)), {'text_color': Colors.BRIGHT_BLUE}, action=lambda: self.toggle(ncols*nrow+ncol)).draw(self)
+        for button in self.buttons:
+            button.draw(self)
 
         BACK_BUTTON_MAIN.draw(self)
+        PROGRESS_BUTTON.draw(self)
         if self.page > 0:
             PREV_BUTTON.draw(self)
         if self.page < self.pages - 1:
@@ -93,52 +122,19 @@ class History(BaseScreen):
     def create_graph(self) -> tuple[pygame.Surface, pygame.Vector2]:
         """
         It creates a graph of the user's score over time, which is renderable to the pygame window.
+        The graphs are cached, so opening a graph again doesn't draw it again.
 
         Returns:
           tuple[pygame.Surface, pygame.Vector2]: A tuple of the renderable graph object, and the size of the graph.
         """
-        plt.ioff()
-        plt.close('all')
-        figure, axes = plt.subplots()
-        plt.tight_layout()
-
-        correct = np.array(list(self.score.score))
-        axes.clear()
-        length = range(1, correct.size + 1)
-        max_score = np.max(correct)
-
-        if self.original_score:
-            main = np.array(list(self.original_score.score))
-            if correct.size > main.size:
-                correct = correct[:main.size]
-                length = range(1, main.size + 1)
+        key = self.score.id, self.original_score and self.original_score.id
+        if (surf := graph_cache.get(key)) is None:
+            if self.original_score:
+                surf = comparison_chart(self.score.samples, self.original_score.samples)
             else:
-                main = main[:correct.size]
-
-            if (og_max := np.max(main)) > max_score:
-                max_score = og_max
-
-            axes.fill_between(
-                length, main, correct, where=(correct > main),
-                interpolate=True, color="green", alpha=0.25,
-                label="Fast"
-            )
-            axes.fill_between(
-                length, main, correct, where=(correct <= main),
-                interpolate=True, color="red", alpha=0.25,
-                label="Slow"
-            )
-            axes.legend()
-        else:
-            axes.plot(length, correct, color='blue', lw=3)
-            axes.fill_between(length, 0, correct, alpha=.3)
-        axes.set(ylim=(0, max_score or 1), xlabel='Time (seconds)', ylabel='WPM')
-
-        (canvas := backend_agg.FigureCanvasAgg(figure)).draw()
-        raw_data = canvas.get_renderer().tostring_rgb()
-        size: tuple[int, int] = canvas.get_width_height()
-
-        return pygame.image.fromstring(raw_data, size, "RGB"), pos(*size)
+                surf = line_chart(self.score.samples)
+            graph_cache.put(key, surf)
+        return surf, pos(surf.get_size())
 
     @property
     def pages(self) -> int:
@@ -148,13 +144,47 @@ class History(BaseScreen):
         Returns:
           The number of pages.
         """
-        return math.ceil(self.count / 20)
+        return math.ceil(self.count / PAGE_SIZE)
+
+    def load_page(self, page: int) -> None:
+        """
+        It fetches the scores on the given page. The next page starts after the last score of this one.
+
+        Args:
+          page (int): The page to load.
+        """
+        self.page = page
+        self.history = history_page(self.cursors[page])
+        self.buttons = self.layout_page()
+        if self.history and len(self.cursors) == page + 1:
+            last = self.history[-1]
+            self.cursors.append((last.date_created, last.id))
+
+    def layout_page(self) -> list[Button]:
+        """
+        It builds the buttons of the scores on the page, spread evenly in a grid.
+
+        Returns:
+          list[Button]: The button of every score, which opens its graph.
+        """
+        buttons = []
+        if tot := len(rows := self.history):
+            ncols = math.ceil(math.sqrt(tot))
+            nrows = math.ceil(tot/ncols)
+
+            for nrow in range(nrows):
+                x = WIDTH * (nrow + 1) / (nrows + 1)
+                curr = rows[ncols*nrow:ncols*(nrow+1)]
+                for ncol, score in enumerate(curr):
+                    y = 3*HEIGHT/4 * (ncol + 1) / (len(curr) + 1)
+                    buttons.append(Button(Text(f'{score.date_created}', pos(x, y)), {'text_color': Colors.BRIGHT_BLUE}, action=partial(self.toggle, ncols*nrow+ncol)))
+        return buttons
 
     def graph(self) -> None:
         """
         This calls a function to draw the graph of the score of the player, along with the navigation buttons.
         """
-        screen.blit(self.surf, ((GAME_AREA - self.size)/2).xy)
+        dirty.blit(self.surf, ((GAME_AREA - self.size)/2).xy)
         if self.original_score:
             STOP_COMPARE_BUTTON.draw(self)
         else:
@@ -173,7 +203,48 @@ class History(BaseScreen):
         self.surf, self.size = self.create_graph()
         self.scene = self.graph
 
-    @property
+    def open_progress(self) -> None:
+        """
+        It shows the progress of the player, starting a job to compute it the first time.
+        The analytics are only imported then, like the scenes, so opening the history doesn't wait for them.
+        """
+        from graphing.analytics import load_trends
+
+        self.scene = self.progress
+        if self.trends is None and self.progress_surf is None:
+            self.trends = jobs.submit('analytics', load_trends, self.finish_progress, mem['user'].id)
+
+    def finish_progress(self, future: Future) -> None:
+        """
+        It is run on the render thread once the progress is computed, and draws its chart and summary.
+
+        Args:
+          future (Future): The finished job.
+        """
+        self.trends = None
+        try:
+            trends = future.result()
+        except (SQLAlchemyError, RuntimeError, TimeoutError):
+            self.summary.text = 'The database could not be reached'
+            return
+        if not len(trends):
+            self.summary.text = 'Play a game to see your progress'
+            return
+
+        self.progress_surf = progress_chart(trends)
+        self.summary.text = (f'{len(trends)} games    best {trends.best[-1]:.0f} WPM    average {trends.rolling[-1]:.0f} WPM    '
+                             f'{100 * trends.improvement:+.1f} WPM per 100 games    {trends.consistency.mean():.0%} consistent')
+
+    def progress(self) -> None:
+        """
+        It displays the progress of the player over all their games, or why it can't be shown yet.
+        """
+        if self.progress_surf:
+            dirty.blit(self.progress_surf, ((GAME_AREA - pos(self.progress_surf.get_size()))/2).xy)
+        self.summary.draw()
+        BACK_BUTTON_SUB.draw(self)
+
+    @cached_property
     def count(self) -> int:
         """
         It returns the count of the games played by the user, which are stored in the database.
@@ -181,6 +252,6 @@ class History(BaseScreen):
         Returns:
           int: The number of games played by the user.
         """
-        return len(self.history)
+        return history_count()
 
     scene = show_history
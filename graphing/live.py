@@ -1,52 +1,105 @@
-from typing import Iterator
+from collections import deque
+from functools import lru_cache, partial
 
-import matplotlib
-import matplotlib.pyplot as plt
-import seaborn as sns
+import pygame
 
 from database_files.database import Score
+from database_files.encoding import FILLER_SAMPLE, encode_samples, encode_keystrokes, encode_letters, summarize
 from game_files.game import Game
-from game_files.story_maker import char_filter
+from game_files.story_maker import story_hash
+from graphing.config import *
+from graphing.window import DetachedWindow
 from mem_hub import mem
+from utils import Text, Colors, SmallFont, dirty, pos
 
-matplotlib.use('Tkagg')
-sns.set(style="dark", context="talk")
+
+@lru_cache(maxsize=None)
+def detached_window() -> DetachedWindow:
+    return DetachedWindow(LIVE_GRAPH_SECONDS)
+
+
+class Sparkline:
+    def __init__(self, rect: tuple[int, int, int, int], seconds: int, scale: int) -> None:
+        self.rect = pygame.Rect(rect)
+        self.step = self.rect.width // (seconds - 1)
+        self.scale = scale
+        self.values = deque(maxlen=seconds)
+        self.version = 0
+        self.surf = pygame.Surface(self.rect.size)
+        self.surf.fill(LIVE_GRAPH_BACKGROUND)
+        self.label = Text(f'{scale} WPM', pos(self.rect.topleft), font=SmallFont, text_color=Colors.GREY, box_is_centered=False)
+
+    def y(self, value: int) -> int:
+        return self.rect.height - 1 - (self.rect.height - 1) * value // self.scale
+
+    def segment(self, right: int, start: int, end: int) -> None:
+        left = right - self.step
+        points = (left, self.y(start)), (right, self.y(end))
+        pygame.draw.polygon(self.surf, LIVE_GRAPH_FILL, [*points, (right, self.rect.height), (left, self.rect.height)])
+        pygame.draw.line(self.surf, LIVE_GRAPH_LINE, *points, 3)
+
+    def redraw(self) -> None:
+        self.surf.fill(LIVE_GRAPH_BACKGROUND)
+        right = self.rect.width - 1 - self.step * (len(self.values) - 2)
+        for start, end in zip(self.values, list(self.values)[1:]):
+            self.segment(right, start, end)
+            right += self.step
+        self.label.text = f'{self.scale} WPM'
+
+    def push(self, value: int) -> None:
+        self.version += 1
+        previous = self.values[-1] if self.values else value
+        self.values.append(value)
+        if value > self.scale:
+            self.scale = max(value, 2 * self.scale)
+            return self.redraw()
+
+        self.surf.scroll(-self.step)
+        self.surf.fill(LIVE_GRAPH_BACKGROUND, (self.rect.width - self.step, 0, self.step, self.rect.height))
+        self.segment(self.rect.width - 1, previous, value)
+
+    def draw(self) -> pygame.Rect:
+        dirty.draw(self.rect, (self, self.version), partial(pygame.display.get_surface().blit, self.surf, self.rect))
+        self.label.draw()
+        return self.rect
 
 
 class LiveGraph:
-    def __init__(self, game: Game, story: Iterator[str]) -> None:
+    def __init__(self, game: Game, rig: int) -> None:
         self.game = game
         self.correct = [0, 0, 0]
         self.prev = 0
         self.wrong = []
+        self.rig = rig
 
-        word_len = [len(_) for _ in char_filter(list(story)).split()]
-        self.rig = 60*len(word_len)//sum(word_len)
-
-        plt.ion()
-        plt.close('all')
-        self.figure, self.axes = plt.subplots()
-        plt.tight_layout()
-        plt.show(block=False)
+        if LIVE_GRAPH_MODE == 'window' and not game.headless:
+            self.view = detached_window()
+            self.view.reset()
+        else:
+            self.view = Sparkline(LIVE_GRAPH_RECT, LIVE_GRAPH_SECONDS, LIVE_GRAPH_SCALE)
 
     def plot(self) -> None:
         self.take_screenshot()
-        self.axes.clear()
-        length = range(max(1, len(self.correct)-9), len(self.correct)+1)
-        self.axes.plot(length, self.correct[-10:], color=sns.color_palette("muted", 1)[0], lw=3)
-        self.axes.fill_between(length, 0, self.correct[-10:], alpha=.3)
-        self.axes.set(ylim=(0, max(self.correct) or 1), xlabel='Time (seconds)', ylabel='WPM')
-        plt.pause(.00001)
+        self.view.push(self.correct[-1])
+
+    def draw(self) -> None:
+        if isinstance(self.view, Sparkline):
+            self.view.draw()
 
     def take_screenshot(self) -> None:
         score = (self.game.score-self.prev)*self.rig
-        if not score and not (self.correct[-2] == self.correct[-1] == 2) and 0 not in self.correct[:-2]:
-            score = 2
+        if not score and not (self.correct[-2] == self.correct[-1] == FILLER_SAMPLE) and 0 not in self.correct[:-2]:
+            score = FILLER_SAMPLE
         self.correct.append(score)
         self.prev = self.game.score
         self.wrong.append(self.game.wrong)
 
     def save(self) -> None:
-        score = Score(user=mem['user'], score=bytes(self.correct))
-        (session := mem['session']).add(score)
-        session.commit()
+        user = mem['user']
+        owner = {'user_id': user.id} if user.id is not None else {'user': user}
+        mem['writer'].add(Score(
+            **owner, score=encode_samples(self.correct), final_score=self.game.score,
+            error_count=self.game.wrong, story_id=self.game.story_index, story_hash=story_hash(self.game.story),
+            keystrokes=encode_keystrokes(self.game.keystrokes), letters=encode_letters(self.game.letters),
+            **summarize(self.correct)
+        ))
@@ -0,0 +1,88 @@
+from multiprocessing import Process, Queue
+from queue import Empty
+
+
+def run_window(samples: Queue, seconds: int) -> None:
+    """
+    It is run in a separate process, and plots the samples it receives in a matplotlib window, so the game loop never
+    waits for matplotlib. A None sample starts a new graph, and a 'close' sample ends the process.
+
+    Args:
+      samples (Queue): The queue through which the game sends the samples.
+      seconds (int): The number of the latest seconds which are shown.
+    """
+    import matplotlib
+    matplotlib.use('Tkagg')
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    sns.set(style="dark", context="talk")
+    plt.ion()
+    figure, axes = plt.subplots()
+    plt.tight_layout()
+    plt.show(block=False)
+
+    correct = []
+    while True:
+        try:
+            sample = samples.get(timeout=.05)
+        except Empty:
+            plt.pause(.05)
+            continue
+        if sample == 'close':
+            return plt.close('all')
+        if sample is None:
+            correct = []
+            continue
+
+        correct.append(sample)
+        axes.clear()
+        length = range(max(1, len(correct)-seconds+1), len(correct)+1)
+        axes.plot(length, correct[-seconds:], color=sns.color_palette("muted", 1)[0], lw=3)
+        axes.fill_between(length, 0, correct[-seconds:], alpha=.3)
+        axes.set(ylim=(0, max(correct) or 1), xlabel='Time (seconds)', ylabel='WPM')
+        plt.pause(.00001)
+
+
+class DetachedWindow:
+    """
+    The handle to the process which shows the live graph in a separate matplotlib window.
+
+    Attributes:
+      samples (Queue): The queue through which the samples are sent.
+      process (Process): The process which draws the window.
+    """
+    def __init__(self, seconds: int, start: bool = True) -> None:
+        """
+        It starts the process with the window.
+
+        Args:
+          seconds (int): The number of the latest seconds which are shown.
+          start (bool): Weather the process is started, otherwise the samples are only queued, as when benchmarking the
+            cost of sending them. Defaults to True.
+        """
+        self.samples: Queue = Queue()
+        self.process = Process(target=run_window, args=(self.samples, seconds), daemon=True)
+        if start:
+            self.process.start()
+
+    def reset(self) -> None:
+        """
+        It starts a new graph in the window.
+        """
+        self.samples.put_nowait(None)
+
+    def push(self, sample: int) -> None:
+        """
+        It sends a new sample to the window, without waiting for it to be drawn.
+
+        Args:
+          sample (int): The WPM of the last second.
+        """
+        self.samples.put_nowait(sample)
+
+    def close(self) -> None:
+        """
+        It asks the window to close.
+        """
+        self.samples.put_nowait('close')
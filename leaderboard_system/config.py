@@ -0,0 +1,5 @@
+LEADERBOARD_PAGE_SIZE = 10
+LEADERBOARD_ROW_HEIGHT = 40
+LEADERBOARD_COLUMNS = 200, 500, 800, 1000
+
+STANDINGS_TTL = 60
@@ -0,0 +1,238 @@
+import math
+import time
+from concurrent.futures import Future
+from functools import cached_property, partial
+from typing import Optional
+
+from sqlalchemy import and_, event, func, or_, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import Session as SessionType, object_session
+
+from database_files.database import Leaderboard, Score, Session, User, get_session, open_session
+from leaderboard_system.config import LEADERBOARD_PAGE_SIZE, LEADERBOARD_ROW_HEIGHT, LEADERBOARD_COLUMNS, STANDINGS_TTL
+from mem_hub import mem
+from scenes import set_scene
+from utils import BaseScreen, Button, Text, pos, Colors, Font, MediumFont, SmallFont, jobs, WIDTH, HEIGHT, BUTTON_SIZE
+
+BACK_BUTTON = Button(Text('Go Back', pos(WIDTH/2, 7*HEIGHT/8), *BUTTON_SIZE, background_color=Colors.RED, font=Font(60)), {'background_color': Colors.BRIGHT_RED}, action=partial(set_scene, 'game'))
+PREV_BUTTON = BACK_BUTTON.modify({'text': 'Previous', 'position': pos(WIDTH/4, 7*HEIGHT/8), 'background_color': Colors.GREEN}, {'background_color': Colors.BRIGHT_GREEN, 'extend': True})
+NEXT_BUTTON = PREV_BUTTON.modify({'text': 'Next', 'position': pos(3*WIDTH/4, 7*HEIGHT/8)})
+
+TITLE = Text('Leaderboard', pos(WIDTH/2, HEIGHT/12), font=MediumFont)
+HEADER = 'Rank', 'Player', 'Best', 'Games'
+
+
+def fetch_standings(user_id: int) -> tuple[int, int, int, str]:
+    """
+    It looks up the best score of the player and the global record. It is run as a background job, with its own session.
+
+    Args:
+      user_id (int): The id of the player.
+
+    Returns:
+      tuple[int, int, int, str]: The id of the player, their best score, the record and the name of who holds it.
+    """
+    with open_session() as session:
+        personal = session.execute(select(Leaderboard.best_score).where(Leaderboard.user_id == user_id)).scalar()
+        record = session.execute(select(Leaderboard.best_score, User.username).join(User).order_by(Leaderboard.best_score.desc(), Leaderboard.user_id.desc()).limit(1)).first()
+    return user_id, personal or 0, *(record or (0, ''))
+
+
+class Standings:
+    """
+    The best score of the player and the global record, kept in memory so the game can show them every frame without
+    asking the database. They are loaded on a background job when the player changes, or when they are older than
+    STANDINGS_TTL, to pick up the records set on other machines. The scores saved on this machine raise them as soon
+    as they are committed.
+
+    Attributes:
+      user_id (int, optional): The id of the player the standings are for.
+      username (str): The name of the player the standings are for.
+      personal (int): The best score of the player.
+      record (int): The best score of anyone.
+      holder (str): The name of who holds the record.
+      loaded_at (float): The time the standings were last loaded at.
+      pending (Future, optional): The job loading the standings.
+    """
+    def __init__(self) -> None:
+        """
+        All initial configuration for the standings is done here, they are empty until they are loaded.
+        """
+        self.user_id: Optional[int] = None
+        self.username = ''
+        self.personal = self.record = 0
+        self.holder = ''
+        self.loaded_at = float('-inf')
+        self.pending: Optional[Future] = None
+
+    def load(self, user: User) -> None:
+        """
+        It starts loading the standings of a player, unless they are already loaded and fresh, or being loaded.
+
+        Args:
+          user (User): The player.
+        """
+        if self.user_id != user.id:
+            self.user_id, self.username, self.personal, self.loaded_at = user.id, user.username, 0, float('-inf')
+        if self.pending is None and time.monotonic() - self.loaded_at > STANDINGS_TTL:
+            self.pending = jobs.submit('leaderboard', fetch_standings, self.finish, user.id)
+
+    def finish(self, future: Future) -> None:
+        """
+        It is run on the render thread once the standings are loaded. A score saved in the meantime is kept, if it is
+        higher than what was loaded.
+
+        Args:
+          future (Future): The finished job.
+        """
+        self.pending = None
+        try:
+            user_id, personal, record, holder = future.result()
+        except (SQLAlchemyError, RuntimeError, TimeoutError):
+            return
+        if user_id != self.user_id:
+            return
+        self.personal = max(self.personal, personal)
+        if record >= self.record:
+            self.record, self.holder = record, holder
+        self.loaded_at = time.monotonic()
+
+    def observe(self, user_id: int, score: int) -> None:
+        """
+        It raises the standings with a score which was just saved. It is run by the thread saving the score, once it
+        is committed.
+
+        Args:
+          user_id (int): The id of the player who made the score.
+          score (int): The score.
+        """
+        if user_id == self.user_id:
+            self.personal = max(self.personal, score)
+        if score > self.record:
+            self.record = score
+            self.holder = self.username if user_id == self.user_id else ''
+
+
+standings = Standings()
+
+
+@event.listens_for(Score, 'after_insert')
+def hold_score(mapper, connection, score: Score) -> None:
+    """
+    It keeps a score which was just inserted in its session, until the transaction it was inserted in is over.
+    """
+    object_session(score).info.setdefault('saved_scores', []).append((score.user_id, score.final_score or 0))
+
+
+@event.listens_for(Session, 'after_commit')
+def observe_scores(session: SessionType) -> None:
+    """
+    It raises the standings with the scores of a transaction which was committed.
+    """
+    for user_id, score in session.info.pop('saved_scores', ()):
+        standings.observe(user_id, score)
+
+
+@event.listens_for(Session, 'after_rollback')
+def forget_scores(session: SessionType) -> None:
+    """
+    It forgets the scores of a transaction which was rolled back, they are held again if they are inserted again.
+    """
+    session.info.pop('saved_scores', None)
+
+
+def leaderboard_page(after: Optional[tuple[int, int]] = None) -> list[tuple[int, int, int, str]]:
+    """
+    Fetches a page of the leaderboard, best first. The pages are found by seeking past the last player of the previous
+    page on the (best_score, user_id) index.
+
+    Args:
+      after (tuple[int, int], optional): The best score and id of the last player of the previous page.
+
+    Returns:
+      list[tuple[int, int, int, str]]: The best score, id, number of games and name of every player on the page.
+    """
+    query = select(Leaderboard.best_score, Leaderboard.user_id, Leaderboard.games, User.username).join(User)
+    if after:
+        best, user_id = after
+        query = query.where(or_(Leaderboard.best_score < best, and_(Leaderboard.best_score == best, Leaderboard.user_id < user_id)))
+    query = query.order_by(Leaderboard.best_score.desc(), Leaderboard.user_id.desc()).limit(LEADERBOARD_PAGE_SIZE)
+    return get_session().execute(query).all()
+
+
+class LeaderboardScene(BaseScreen):
+    """
+    The best score of every player, a page at a time.
+
+    Attributes:
+      page (int): The current page of the leaderboard.
+      cursors (list): The best score and id of the player each page starts after, None for the first page.
+      rows (list): The texts of the header and of the players on the current page, which are built once per page.
+    """
+    dirty_rects = True
+
+    def __init__(self) -> None:
+        """
+        Loads the first page, and remaps the buttons to page through the leaderboard.
+        """
+        self.cursors: list[Optional[tuple[int, int]]] = [None]
+        PREV_BUTTON.action = lambda: self.load_page(self.page - 1)
+        NEXT_BUTTON.action = lambda: self.load_page(self.page + 1)
+        self.load_page(0)
+
+    @cached_property
+    def count(self) -> int:
+        """
+        It returns the number of players on the leaderboard.
+
+        Returns:
+          int: The number of players who have played at least one game.
+        """
+        return get_session().query(func.count(Leaderboard.user_id)).scalar()
+
+    @property
+    def pages(self) -> int:
+        """
+        It returns the number of pages needed to show every player.
+
+        Returns:
+          The number of pages.
+        """
+        return math.ceil(self.count / LEADERBOARD_PAGE_SIZE)
+
+    def load_page(self, page: int) -> None:
+        """
+        It fetches the players on the given page, and builds their rows. The next page starts after the last player
+        of this one.
+
+        Args:
+          page (int): The page to load.
+        """
+        self.page = page
+        players = leaderboard_page(self.cursors[page])
+        if players and len(self.cursors) == page + 1:
+            self.cursors.append(players[-1][:2])
+
+        me = mem['user'].id if 'user' in mem else None
+        lines = [(HEADER, Colors.GREY)]
+        for rank, (best, user_id, games, username) in enumerate(players, page * LEADERBOARD_PAGE_SIZE + 1):
+            lines.append(((f'{rank}', username, f'{best}', f'{games}'), Colors.BRIGHT_BLUE if user_id == me else Colors.BLUE))
+        self.rows = [
+            [Text(text, pos(x, HEIGHT/6 + LEADERBOARD_ROW_HEIGHT * line), font=SmallFont, text_color=color) for x, text in zip(LEADERBOARD_COLUMNS, texts)]
+            for line, (texts, color) in enumerate(lines)
+        ]
+
+    def scene(self) -> None:
+        """
+        It draws the page of the leaderboard, and the buttons to page through it.
+        """
+        TITLE.draw()
+        for row in self.rows:
+            for text in row:
+                text.draw()
+
+        BACK_BUTTON.draw(self)
+        if self.page > 0:
+            PREV_BUTTON.draw(self)
+        if self.page < self.pages - 1:
+            NEXT_BUTTON.draw(self)
@@ -1,80 +1,195 @@
 from utils import *
 import string
+from concurrent.futures import Future
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
+
+from utils import jobs
 
 
 USERNAME_INPUT = TextInput(Text('Username: ', pos(WIDTH/4, HEIGHT/2), WIDTH/2, HEIGHT/8, font=MediumFont), active=True, _input={'text_color': Colors.WHITE}, placeholder={'text': 'Enter your username', 'text_color': (50,) * 3}, accepted_chars=string.ascii_letters + string.digits + '_', min_length=1, max_length=20)
 PASSWORD_INPUT = TextInput(Text('Password: ', pos(WIDTH/4, 5*HEIGHT/8), WIDTH/2, HEIGHT/8, font=MediumFont), _prev=USERNAME_INPUT, password=True, max_length=40, placeholder=USERNAME_INPUT.placeholder.format('Enter your password'), min_length=1)
 
+TITLE = Text('Login / Register a new account', pos(WIDTH/2, HEIGHT/4), font=Font(70))
+WAITING = tuple('Please wait' + ('.' * dots).ljust(3) for dots in range(4))
+
 LEFT_BUTTON = Button(Text('YES', pos(WIDTH/4, 5*HEIGHT/8), WIDTH/5, HEIGHT/10, background_color=Colors.GREEN, font=MediumFont), {'background_color': Colors.BRIGHT_GREEN})
 RIGHT_BUTTON = Button(Text('NO', pos(3*WIDTH/4, 5*HEIGHT/8), WIDTH/5, HEIGHT/10, background_color=Colors.RED, font=MediumFont), {'background_color': Colors.BRIGHT_RED})
 
 
-def verify_register(create: bool | User = False) -> None:
+LOGGED_IN, NOT_FOUND, WRONG_PASSWORD, TAKEN = 'logged in', 'not found', 'wrong password', 'taken'
+
+
+def authenticate(username: str, password: str, check_password: bool = True) -> tuple[str, Optional[User]]:
+    """
+    It looks the user up and checks their password. It is run as a background job, with its own session.
+
+    Args:
+      username (str): The name of the user.
+      password (str): The password which was entered.
+      check_password (bool): Weather the password has to match. Defaults to True.
+
+    Returns:
+      tuple[str, Optional[User]]: The outcome of the login, and the user if they were logged in.
+    """
+    with open_session(expire_on_commit=False) as session:
+        player = get_user(session, User(username=username))
+    if not player:
+        return NOT_FOUND, None
+    if check_password and not player.verify_password(password):
+        return WRONG_PASSWORD, None
+    return LOGGED_IN, player
+
+
+def register(username: str, password: str) -> tuple[str, Optional[User]]:
+    """
+    It creates a new account and commits it, so the user has an id before the first game is saved. It is run as a
+    background job, with its own session.
+
+    Args:
+      username (str): The name of the new user.
+      password (str): The password of the new user.
+
+    Returns:
+      tuple[str, Optional[User]]: The outcome of the registration, and the new user if it was created.
+    """
+    user = User(username=username, password=password)
+    with open_session(expire_on_commit=False) as session:
+        session.add(user)
+        try:
+            session.commit()
+        except IntegrityError:
+            session.rollback()
+            return TAKEN, None
+    return LOGGED_IN, user
+
+
+def finish_login(future: Future, guest: bool = False) -> None:
+    """
+    It is run on the render thread when a login or registration job is done, and acts on its outcome. The guest is
+    created when it is missing, without asking, since it has no inputs to confirm.
+
+    Args:
+      future (Future): The finished job.
+      guest (bool): Weather the job logged in the guest. Defaults to False.
+    """
+    scene = mem['game'].scene
+    if not isinstance(scene, LoginScene):
+        return
+    scene.pending = None
+
+    try:
+        outcome, player = future.result()
+    except (SQLAlchemyError, RuntimeError, TimeoutError):
+        return PASSWORD_INPUT.show_error('The database could not be reached')
+
+    if outcome == NOT_FOUND and guest:
+        scene.pending = jobs.submit('login', register, finish_login, 'guest', '')
+    elif outcome == NOT_FOUND:
+        scene.ask_to_register()
+    elif outcome == WRONG_PASSWORD:
+        PASSWORD_INPUT.show_error('Incorrect password')
+    elif outcome == TAKEN:
+        scene.scene = scene.draw_login
+        USERNAME_INPUT.show_error('That username was just taken')
+    else:
+        mem['user'] = player
+        set_scene('game')
+
+
+def verify_register(create: bool = False, guest: bool = False) -> None:
     """
     It verifies the user's input and either creates a new user or logs in an existing one.
+    The database is only queried in a background job, the scene shows that it is pending until the job is done.
 
     Args:
-      create (bool | User): The new account to create, if the user doesn't exist. Defaults to False.
+      create (bool): Weather a new account should be created. Defaults to False.
+      guest (bool): Weather to log in as the guest, without checking the inputs. Defaults to False.
     """
-    skip = isinstance(create, User)
+    scene = mem['game'].scene
+    if scene.pending:
+        return
 
-    if not skip:
+    if guest:
+        username, password = 'guest', ''
+    else:
         details = []
         for text_input in USERNAME_INPUT.group:
             if not text_input.verify():
                 return
             details.append(''.join(text_input.input.text))
+        username, password = details[0].lower(), details[1]
 
-        user = User(username=details[0].lower(), password=details[1])
+    if create:
+        scene.pending = jobs.submit('login', register, finish_login, username, password)
     else:
-        user = create
-    player = get_user(session := mem['session'], user)
-    if not player:
-        if not create:
-            scene = mem['game'].scene
-            return setattr(scene, 'scene', scene.wait_for_confirmation)
-        session.add(user)
-        session.commit()
-
-        set_scene(mem['game_scene'])
-        mem['user'] = user
-    else:
-        if not skip and not player.verify_password(user.password):
-            return PASSWORD_INPUT.show_error('Incorrect password')
-        set_scene(mem['game_scene'])
-        mem['user'] = player
+        scene.pending = jobs.submit('login', authenticate, partial(finish_login, guest=guest), username, password, not guest)
 
 
 LOGIN = Button(Text('Login', pos(WIDTH * 3 / 8, HEIGHT * 3 / 4), background_color=Colors.BLUE, text_color=(255, 165, 0), font=MediumFont), {'background_color': Colors.BRIGHT_BLUE, 'text_color': (255, 205, 45)}, verify_register)
-GUEST_BUTTON = LOGIN.modify({'text': 'Guest Mode', 'position': pos(WIDTH * 5 / 8, HEIGHT * 3 / 4)}, action=partial(verify_register, User(username='guest', password='')))
+GUEST_BUTTON = LOGIN.modify({'text': 'Guest Mode', 'position': pos(WIDTH * 5 / 8, HEIGHT * 3 / 4)}, action=partial(verify_register, guest=True))
 
 
 class LoginScene(BaseScreen):
     """
     It is the scene which handles the login and registration of the user.
+
+    Attributes:
+      pending (Future, optional): The login or registration job which is running.
+      question (Text): The question asking to create a new account.
+      waiting (Text): The text shown while the login is running.
     """
+    dirty_rects = True
+    pending: Optional[Future] = None
+
+    def __init__(self) -> None:
+        """
+        It builds the texts of the scene, and maps the confirmation buttons to it.
+        """
+        self.question = Text('', pos(WIDTH/2, 3*HEIGHT/8), font=MediumFont)
+        self.waiting = Text(WAITING[0], pos(WIDTH/2, 7*HEIGHT/8), font=MediumFont)
+        LEFT_BUTTON.action = partial(verify_register, True)
+        RIGHT_BUTTON.action = partial(setattr, self, 'scene', self.draw_login)
+
     def draw_login(self) -> None:
         """
         It draws the login screen.
         """
-        Text('Login / Register a new account', pos(WIDTH/2, HEIGHT/4), font=Font(70)).draw()
+        TITLE.draw()
         USERNAME_INPUT.draw(self)
         PASSWORD_INPUT.draw(self)
         LOGIN.draw(self)
         GUEST_BUTTON.draw(self)
+        self.draw_pending()
+
+    def draw_pending(self) -> None:
+        """
+        It shows that the login is still running, with dots which keep moving so the screen doesn't look frozen.
+        """
+        if self.pending:
+            self.waiting.text = WAITING[int(time.monotonic() * 3 % len(WAITING))]
+            self.waiting.draw()
+
+    def ask_to_register(self) -> None:
+        """
+        It asks the user to confirm if they want to create a new account with the name they entered.
+        """
+        self.question.text = f'No user named {"".join(USERNAME_INPUT.input.text)} found, create a new account?'
+        self.scene = self.wait_for_confirmation
 
     def wait_for_confirmation(self) -> None:
         """
         It alerts the user to confirm if they want to create a new account.
         """
-        Text(f'No user named {"".join(USERNAME_INPUT.input.text)} found, create a new account?', pos(WIDTH/2, 3*HEIGHT/8), font=MediumFont).draw()
-        LEFT_BUTTON.action = partial(verify_register, True)
-        RIGHT_BUTTON.action = partial(setattr, self, 'scene', self.draw_login)
+        self.question.draw()
         LEFT_BUTTON.draw(self)
         RIGHT_BUTTON.draw(self)
+        self.draw_pending()
 
     scene = draw_login
 
 
 if True:
+    from database_files.database import open_session
     from scenes import set_scene
@@ -1,13 +1,11 @@
-from threading import Thread
-
-from playsound import playsound
-
-from config import WELCOME_SOUND_PATH
-from database_files.action import setup_database
-from database_files.database import Session, engine
+from audio import audio
+from database_files.bootstrap import Bootstrap
+from database_files.database import open_session
+from database_files.writer import WriteBehind
 from mem_hub import mem
-
-from login_system.login import LoginScene
+from profiling import FrameProfiler
+from scenes import get_scene
+from utils import init_display, jobs, PROFILE_CSV_PATH
 
 
 class Game:
@@ -17,25 +15,34 @@ class Game:
     Attributes:
         scene (function): It is the current scene being rendered.
     """
-    scene = LoginScene()
-
-
-Thread(target=playsound, args=(WELCOME_SOUND_PATH,), daemon=True).start()
-
-
-game = Game()
-session = Session()
-conn = engine.connect()
-try:
-    mem['session'] = session
-    mem['conn'] = conn
-    mem['game'] = game
-
-    setup_database(session)
-
-    while 1:
-        game.scene.main_loop()
-finally:
-    session.close()
-    conn.close()
-    mem.clear()
+    scene = get_scene('login')()
+
+
+if __name__ == '__main__':
+    audio.open()
+    audio.announce('welcome')
+
+    bootstrap = Bootstrap()
+    bootstrap.start()
+
+    init_display()
+    game = Game()
+    profiler = FrameProfiler(csv_path=PROFILE_CSV_PATH)
+    writer = WriteBehind(open_session)
+    writer.start()
+    try:
+        mem['game'] = game
+        mem['writer'] = writer
+        mem['bootstrap'] = bootstrap
+        mem['profiler'] = profiler
+
+        while 1:
+            game.scene.main_loop()
+    finally:
+        profiler.save()
+        jobs.close()
+        writer.close()
+        audio.close()
+        if 'session' in mem:
+            mem['session'].close()
+        mem.clear()
@@ -0,0 +1,173 @@
+import csv
+import time
+from array import array
+from typing import Optional
+
+import pygame
+
+from utils import BaseScreen, Colors, Text, SmallFont, pacer, pos, FPS, PROFILE_FRAMES, PROFILE_TOGGLE_KEY, PROFILE_REFRESH, PROFILE_DROPPED_RATIO
+
+PHASES = 'poll', 'jobs', 'timers', 'keys', 'scene', 'dispatch', 'handler', 'hud', 'present', 'wait'
+COLUMNS = 'phase', 'p50', 'p95', 'p99'
+
+
+def percentile(values: list[int], fraction: float) -> int:
+    """
+    It picks the value below which the given fraction of the sorted values are.
+
+    Args:
+      values (list[int]): The sorted values.
+      fraction (float): The fraction, between 0 and 1.
+
+    Returns:
+      int: The percentile, or 0 if there are no values.
+    """
+    return values[min(int(fraction * len(values)), len(values) - 1)] if values else 0
+
+
+class FrameProfiler:
+    """
+    It times every phase of every frame with perf_counter_ns, into a ring buffer which holds the latest frames, and can
+    show the percentiles of the phases in an overlay. It only measures anything after it is turned on, with the toggle
+    key or by giving it a CSV file to save the frames to, so it costs next to nothing while it is off.
+
+    Attributes:
+      frames (int): The number of frames kept in the ring buffer.
+      samples (array): The nanoseconds spent in each phase, one row of PHASES per frame.
+      count (int): The number of frames timed since it was turned on.
+      dropped (int): The number of frames which took much longer than the frame budget.
+      budget (int): The nanoseconds a frame should take at the target FPS.
+      enabled (bool): Weather the frames are being timed.
+      visible (bool): Weather the overlay is shown.
+      csv_path (str, optional): The file the frames are saved to on exit.
+      index (dict): The column of every phase in a row.
+      row (int): The start of the row of the frame being timed.
+      last (int): The time the previous phase finished at.
+      cells (list): The texts of the overlay, a header, one row per phase, one for the whole frame, one for the latency
+        of the key presses and one for the dropped frames.
+    """
+    def __init__(self, frames: int = PROFILE_FRAMES, csv_path: Optional[str] = None) -> None:
+        """
+        All initial configuration for the profiler is done here.
+
+        Args:
+          frames (int): The number of frames kept in the ring buffer.
+          csv_path (str, optional): The file the frames are saved to on exit. It turns the profiler on if given.
+        """
+        self.frames = frames
+        self.samples = array('q', bytes(8 * frames * len(PHASES)))
+        self.index = {phase: column for column, phase in enumerate(PHASES)}
+        self.count = self.dropped = 0
+        self.budget = 10 ** 9 // FPS
+        self.enabled = bool(csv_path)
+        self.visible = False
+        self.csv_path = csv_path
+        self.row = self.last = 0
+        self.cells = [
+            [Text(name if not line else '', pos(10 + 90 * column, 10 + 22 * line), 90, 22, SmallFont, Colors.BLACK, Colors.YELLOW, False, False) for column, name in enumerate(COLUMNS)]
+            for line in range(len(PHASES) + 3)
+        ]
+        self.cells.append([Text('', pos(10, 10 + 22 * len(self.cells)), 90 * len(COLUMNS), 22, SmallFont, Colors.BLACK, Colors.YELLOW, False, False)])
+
+    def toggle(self) -> None:
+        """
+        It shows or hides the overlay, and starts timing the frames when it is shown.
+        """
+        self.visible = not self.visible
+        self.enabled = self.enabled or self.visible
+
+    def run(self, scene: BaseScreen) -> None:
+        """
+        It draws a frame of the scene and waits for the next one, timing every phase if it is turned on.
+
+        Args:
+          scene (BaseScreen): The scene being drawn.
+        """
+        if not self.enabled:
+            scene.run_frame()
+            pacer.wait()
+        else:
+            self.row = self.count % self.frames * len(PHASES)
+            self.last = start = time.perf_counter_ns()
+            scene.run_frame(self)
+            pacer.wait()
+            self.mark('wait')
+            if self.last - start > self.budget * PROFILE_DROPPED_RATIO:
+                self.dropped += 1
+            self.count += 1
+            if self.visible and self.count % PROFILE_REFRESH == 0:
+                self.refresh()
+
+        for event in scene.events:
+            if event.type == pygame.KEYDOWN and event.key == PROFILE_TOGGLE_KEY:
+                self.toggle()
+
+    def mark(self, phase: str) -> None:
+        """
+        It records the time since the previous mark as the time spent in a phase.
+
+        Args:
+          phase (str): The phase which just finished.
+        """
+        now = time.perf_counter_ns()
+        self.samples[self.row + self.index[phase]] = now - self.last
+        self.last = now
+
+    def column(self, phase: Optional[str] = None) -> list[int]:
+        """
+        It returns the sorted times of a phase, or of whole frames, over the frames in the ring buffer.
+
+        Args:
+          phase (str, optional): The phase, or None for the whole frame.
+
+        Returns:
+          list[int]: The sorted times in nanoseconds.
+        """
+        width = len(PHASES)
+        filled = min(self.count, self.frames) * width
+        if phase is None:
+            return sorted(sum(self.samples[row:row + width]) for row in range(0, filled, width))
+        return sorted(self.samples[self.index[phase]:filled:width])
+
+    def refresh(self) -> None:
+        """
+        It updates the texts of the overlay with the latest percentiles.
+        """
+        for line, phase in enumerate((*PHASES, None), 1):
+            values = self.column(phase)
+            texts = phase or 'frame', *(f'{percentile(values, fraction) / 1e6:.2f}ms' for fraction in (.5, .95, .99))
+            for cell, text in zip(self.cells[line], texts):
+                cell.text = text
+        latency = pacer.metrics()
+        texts = 'input', *(f'{latency[key]:.2f}ms' for key in ('p50_ms', 'p95_ms', 'p99_ms'))
+        for cell, text in zip(self.cells[-2], texts):
+            cell.text = text
+        self.cells[-1][0].text = f'dropped {self.dropped}/{self.count}'
+
+    def draw(self) -> None:
+        """
+        It draws the overlay on top of the scene, if it is shown.
+        """
+        if self.visible:
+            for line in self.cells:
+                for cell in line:
+                    cell.draw()
+
+    def save(self, path: Optional[str] = None) -> None:
+        """
+        It saves the frames in the ring buffer to a CSV file, from the oldest to the newest.
+
+        Args:
+          path (str, optional): The file to save to. Defaults to the csv_path of the profiler.
+        """
+        if not (path := path or self.csv_path) or not self.count:
+            return
+        width = len(PHASES)
+        first = max(self.count - self.frames, 0)
+        with open(path, 'w', newline='') as file:
+            writer = csv.writer(file)
+            writer.writerow(('frame', *(f'{phase}_ns' for phase in PHASES), 'total_ns'))
+            for frame in range(first, self.count):
+                start = frame % self.frames * width
+                row = self.samples[start:start + width]
+                writer.writerow((frame, *row, sum(row)))
@@ -0,0 +1,260 @@
+"""
+The race mode of the game. The player joins a lobby on the race server, and once a race is formed, types the same story
+as the others, with a lane for every player above the story showing how far along they are.
+
+The connection runs on a thread of its own, so the frames never wait for the network. The game is over when the word
+runs off the screen, or when the race ends, and then the ranking the server sent is shown.
+"""
+import asyncio
+import time
+from functools import partial
+from threading import Thread
+from typing import Optional
+
+import pygame
+
+from game_files.game import Game, RIGHT_BUTTON
+from game_files.story_maker import load_corpus
+from mem_hub import mem
+from race.config import RACE_HOST, RACE_PORT, RACE_CONNECT_TIMEOUT, RACE_DURATION, RACE_TICK, RACE_LANE_TOP, RACE_LANE_HEIGHT, RACE_LANE_LEFT, RACE_LANE_RIGHT
+from race.protocol import PROTOCOL_VERSION, JOIN, PROGRESS, FINISH, START, TICK, END, ERROR, encode, receive
+from scenes import set_scene
+from utils import Text, pos, Colors, MediumFont, SmallFont, draw_rect, WIDTH, HEIGHT
+
+LEAVE_BUTTON = RIGHT_BUTTON.modify({'text': 'Leave', 'position': pos(WIDTH / 2, 7 * HEIGHT / 8)}, action=partial(set_scene, 'game'))
+
+
+class RaceClient(Thread):
+    """
+    The connection to the race server, which runs on a background thread with an event loop of its own, so the game
+    never waits for the network. The thread only replaces the state below with what it received, and the game reads
+    it every frame.
+
+    Attributes:
+      player_name (str): The name the player joins with.
+      host (str): The address of the race server.
+      port (int): The port of the race server.
+      loop (asyncio.AbstractEventLoop, optional): The event loop of the thread, once it is connected.
+      writer (asyncio.StreamWriter, optional): The connection to the server, once it is connected.
+      race (dict, optional): The start message of the race, once the race is formed.
+      starts_at (int): The time on the monotonic clock the race starts at, in nanoseconds.
+      ends_at (int): The time on the monotonic clock the race is ended at by the server, in nanoseconds.
+      progress (list): The id, score, wrong keys and whether they are done of every player, from the latest tick.
+      results (list, optional): The id, name and score of every player, best first, once the race is over.
+      error (str, optional): What went wrong, if the connection failed.
+    """
+    def __init__(self, name: str, host: str = RACE_HOST, port: int = RACE_PORT) -> None:
+        """
+        All initial configuration for the client is done here, it has to be started to join a race.
+
+        Args:
+          name (str): The name the player joins with.
+          host (str): The address of the race server.
+          port (int): The port of the race server.
+        """
+        super().__init__(name='race-client', daemon=True)
+        self.player_name = name
+        self.host = host
+        self.port = port
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.writer: Optional[asyncio.StreamWriter] = None
+        self.race: Optional[dict] = None
+        self.starts_at = self.ends_at = 0
+        self.progress: list = []
+        self.results: Optional[list] = None
+        self.error: Optional[str] = None
+
+    def run(self) -> None:
+        """
+        It runs the connection until the race is over, or the connection is closed.
+        """
+        asyncio.run(self.session())
+
+    async def session(self) -> None:
+        """
+        It joins the lobby, and keeps the state up to date with the messages of the server.
+        """
+        try:
+            reader, self.writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), RACE_CONNECT_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            self.error = f'The race server at {self.host}:{self.port} could not be reached'
+            return
+
+        self.loop = asyncio.get_running_loop()
+        self.writer.write(encode(JOIN, name=self.player_name, version=PROTOCOL_VERSION))
+        try:
+            while (message := await receive(reader)) is not None:
+                self.receive(message)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.writer.close()
+        if self.results is None and self.error is None:
+            self.error = 'The race server closed the connection'
+
+    def receive(self, message: dict) -> None:
+        """
+        It updates the state with a message of the server.
+
+        Args:
+          message (dict): The message.
+        """
+        if message['type'] == START:
+            self.starts_at = time.monotonic_ns() + int(message['countdown'] * 1e9)
+            self.ends_at = self.starts_at + int(message.get('duration', RACE_DURATION) * 1e9)
+            self.race = message
+        elif message['type'] == TICK:
+            self.progress = message['progress']
+        elif message['type'] == END:
+            self.results = message['results']
+        elif message['type'] == ERROR:
+            self.error = message['reason']
+
+    def send(self, kind: str, **fields) -> None:
+        """
+        It sends a message to the server from the render thread, without waiting for it to be sent.
+
+        Args:
+          kind (str): The type of the message.
+          **fields: The contents of the message.
+        """
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.writer.write, encode(kind, **fields))
+
+    def close(self) -> None:
+        """
+        It closes the connection, which ends the thread.
+        """
+        if self.loop and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self.writer.close)
+
+
+class RaceGame(Game):
+    """
+    The client mode of the game, which races other players on the same story, and shows their progress above the
+    story. The progress of the player is sent at most once per RACE_TICK, and only if it changed.
+
+    Attributes:
+      client (RaceClient): The connection to the race server.
+      status (Text): What the race is waiting for, or why it couldn't be joined.
+      lanes (list): The id, name text and score text of every player in the race, which are built once per race.
+      reported (tuple[int, int]): The score and wrong keys last sent to the server.
+      report_call (float): The time the progress was last sent at.
+    """
+    def __init__(self) -> None:
+        """
+        It connects to the race server, and waits in the lobby until the race is formed.
+        """
+        super().__init__()
+        self.client = RaceClient(mem['user'].username if 'user' in mem else 'guest')
+        self.client.start()
+        self.scene = self.draw_lobby
+        self.status = Text('Looking for a race...', pos(WIDTH / 2, HEIGHT / 2), font=MediumFont)
+        self.lanes: list[tuple[int, Text, Text]] = []
+        self.reported = 0, 0
+        self.report_call = float('-inf')
+        LEAVE_BUTTON.action = self.leave
+
+    def load_story(self, story_index: Optional[int] = None) -> None:
+        """
+        Open the story of the race. Nothing is opened before the race is formed, since the server picks the story.
+
+        Args:
+          story_index (int, optional): The index of the story in the corpus, None until the race is formed.
+        """
+        if story_index is not None:
+            super().load_story(story_index)
+
+    def leave(self) -> None:
+        """
+        It leaves the race, and goes back to the menu.
+        """
+        self.client.close()
+        set_scene('game')
+
+    def draw_lobby(self) -> None:
+        """
+        It waits for the race to be formed, and then opens its story and builds the lanes of its players. The story is
+        looked up by its hash, so a player whose stories differ from the server's never races on another story.
+        """
+        if (race := self.client.race) is None or self.client.error:
+            self.status.text = self.client.error or 'Looking for a race...'
+            self.status.draw()
+            LEAVE_BUTTON.draw(self)
+            return
+
+        try:
+            self.load_story(load_corpus().find(race['story_hash'], race['story']))
+        except LookupError:
+            self.client.error = 'The story of the race is not in your stories'
+            self.client.close()
+            return
+        self.scene = self.draw_countdown
+        self.lanes = []
+        for line, (player_id, name) in enumerate(race['players']):
+            y = RACE_LANE_TOP + RACE_LANE_HEIGHT * line
+            color = Colors.BRIGHT_BLUE if player_id == race['player'] else Colors.BLUE
+            self.lanes.append((player_id, Text(name, pos(20, y), font=SmallFont, text_color=color, box_is_centered=False), Text('0', pos(RACE_LANE_RIGHT + 10, y), font=SmallFont, text_color=color, box_is_centered=False)))
+
+    def draw_countdown(self) -> None:
+        """
+        It counts down to the start of the race, and starts the game once it is over.
+        """
+        if (left := self.client.starts_at - self.clock()) <= 0:
+            return self.start_game()
+        self.status.text = f'The race starts in {left / 1e9:.0f}'
+        self.status.draw()
+        self.draw_lanes()
+
+    def draw_lanes(self) -> None:
+        """
+        It draws a lane for every player, with a bar as long as their score compared to the best score in the race.
+        The score of the player is the one on the screen, the others are the ones of the latest tick.
+        """
+        progress = {player_id: (score, done) for player_id, score, _, done in self.client.progress}
+        progress[self.client.race['player']] = self.score, self.scene == self.draw_results
+        best = max((score for score, _ in progress.values()), default=0) or 1
+        width = RACE_LANE_RIGHT - RACE_LANE_LEFT
+        for player_id, name, score_text in self.lanes:
+            score, done = progress.get(player_id, (0, False))
+            name.draw()
+            score_text.text = f'{score}'
+            score_text.draw()
+            top = name.pos[1] + 4
+            draw_rect(Colors.GREY if done else name.text_color, pygame.Rect(RACE_LANE_LEFT, top, max(2, width * score // best), RACE_LANE_HEIGHT - 10))
+
+    def draw_game(self) -> None:
+        """
+        Draw the game with the lanes of the race, and send the progress if it changed since it was last sent. The game
+        is over once the race is, even if the word is still on the screen.
+        """
+        if self.client.results is not None or self.clock() >= self.client.ends_at:
+            return self.game_over()
+        super().draw_game()
+        self.draw_lanes()
+        if (self.score, self.wrong) != self.reported and self.now - self.report_call > RACE_TICK:
+            self.reported, self.report_call = (self.score, self.wrong), self.now
+            self.client.send(PROGRESS, score=self.score, wrong=self.wrong)
+
+    def draw_results(self) -> None:
+        """
+        It shows the lanes until everyone is done, and then the ranking of the race, with the score the server counted.
+        """
+        self.draw_lanes()
+        if self.client.results is None:
+            self.status.text = self.client.error or 'Waiting for the others to finish...'
+        else:
+            place, score = next((place, score) for place, (player_id, _, score) in enumerate(self.client.results, 1) if player_id == self.client.race['player'])
+            self.status.text = f'You finished {place} of {len(self.client.results)} with {score}'
+        self.status.draw()
+        LEAVE_BUTTON.draw(self)
+
+    def game_over(self) -> None:
+        """
+        Save the game, tell the server it is over, and wait for the results of the race.
+        """
+        if 'writer' in mem and 'user' in mem:
+            self.graph.save()
+        self.client.send(FINISH, score=self.score, wrong=self.wrong)
+        self.word = None
+        self.scene = self.draw_results
@@ -0,0 +1,19 @@
+import os
+
+RACE_HOST = os.environ.get('TYPE_RUSH_RACE_HOST', '127.0.0.1')
+RACE_PORT = int(os.environ.get('TYPE_RUSH_RACE_PORT', 8765))
+RACE_BACKLOG = 1024
+RACE_CONNECT_TIMEOUT = 2
+
+RACE_SIZE = 4
+RACE_LOBBY_WAIT = 5
+RACE_COUNTDOWN = 3
+RACE_DURATION = 120
+RACE_TICK = .1
+RACE_WRITE_LIMIT = 64 * 1024
+RACE_TICK_SAMPLES = 1000
+
+RACE_LANE_TOP = 140
+RACE_LANE_HEIGHT = 30
+RACE_LANE_LEFT = 220
+RACE_LANE_RIGHT = 1100
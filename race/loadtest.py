@@ -0,0 +1,222 @@
+"""
+Load tests the race server with headless simulated clients, which join, type at a steady pace, and finish, all in one
+event loop of this process.
+
+The server is started in a process of its own on a free port of the loopback, unless the port of a running one is given
+with --port. Every client sends its progress at most once per RACE_TICK, like the game does, and records how long the
+ticks took to reach it, from the time the server stamped on them. Both run on the same machine, so they share the
+monotonic clock, and the latency includes the time the tick waited in this event loop.
+
+Run it with `python -m race.loadtest`. It reports how long the clients waited for a race, the latency of the ticks,
+how long a tick of the server took, and how many clients failed or were dropped.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from typing import Optional
+
+from race.config import RACE_HOST, RACE_TICK
+from race.protocol import PROTOCOL_VERSION, JOIN, PROGRESS, FINISH, STATS, START, TICK, END, encode, receive
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The clients connect in batches, so the listening socket's backlog isn't overrun.
+CONNECT_BATCH = 100
+
+
+class Results:
+    """
+    What the simulated clients measured.
+
+    Attributes:
+      waits (list[float]): The seconds every client waited between joining and its race being formed.
+      latencies (list[float]): The seconds every tick took to reach its client.
+      completed (int): The number of clients which got the results of their race.
+      failed (int): The number of clients which couldn't join, or lost their connection before the end.
+    """
+    def __init__(self) -> None:
+        """
+        All initial configuration for the results is done here, they are empty until the clients run.
+        """
+        self.waits: list[float] = []
+        self.latencies: list[float] = []
+        self.completed = self.failed = 0
+
+
+async def type_story(writer: asyncio.StreamWriter, generator: random.Random, seconds: float, rate: float) -> None:
+    """
+    It types for a while at about the given pace, missing a key now and then, and sends the progress once per tick.
+
+    Args:
+      writer (asyncio.StreamWriter): The connection to the server.
+      generator (random.Random): The random numbers of the client.
+      seconds (float): How long it types for.
+      rate (float): The keys it presses per second.
+    """
+    score = wrong = 0
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        await asyncio.sleep(RACE_TICK)
+        for _ in range(round(generator.uniform(.5, 1.5) * rate * RACE_TICK)):
+            if generator.random() < .9:
+                score += 1
+            else:
+                wrong += 1
+        writer.write(encode(PROGRESS, score=score, wrong=wrong))
+    writer.write(encode(FINISH, score=score, wrong=wrong))
+
+
+async def client(index: int, host: str, port: int, seconds: float, rate: float, results: Results) -> None:
+    """
+    A simulated player, which joins a race, types through it, and waits for the results.
+
+    Args:
+      index (int): The number of the client, which its name and random numbers come from.
+      host (str): The address of the server.
+      port (int): The port of the server.
+      seconds (float): How long it types for, on average.
+      rate (float): The keys it presses per second.
+      results (Results): Where the measurements are recorded.
+    """
+    generator = random.Random(index)
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        results.failed += 1
+        return
+
+    typing: Optional[asyncio.Task] = None
+    joined = time.monotonic()
+    writer.write(encode(JOIN, name=f'bot{index}', version=PROTOCOL_VERSION))
+    try:
+        while (message := await receive(reader)) is not None:
+            if message['type'] == START:
+                results.waits.append(time.monotonic() - joined)
+                await asyncio.sleep(message['countdown'])
+                typing = asyncio.create_task(type_story(writer, generator, generator.uniform(.5, 1.5) * seconds, rate))
+            elif message['type'] == TICK:
+                results.latencies.append(time.monotonic() - message['sent'])
+            elif message['type'] == END:
+                results.completed += 1
+                return
+        results.failed += 1
+    except (ConnectionError, ValueError):
+        results.failed += 1
+    finally:
+        if typing:
+            typing.cancel()
+        writer.close()
+
+
+async def server_stats(host: str, port: int) -> dict:
+    """
+    It asks the server for its metrics.
+
+    Args:
+      host (str): The address of the server.
+      port (int): The port of the server.
+
+    Returns:
+      dict: The metrics of the server.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write(encode(STATS))
+    message = await receive(reader)
+    writer.close()
+    return message or {}
+
+
+def percentiles(values: list[float]) -> dict[str, float]:
+    """
+    It sums up a distribution of seconds.
+
+    Args:
+      values (list[float]): The values, in seconds.
+
+    Returns:
+      dict[str, float]: The 50th, 95th and 99th percentiles and the maximum, in ms.
+    """
+    values = sorted(values) or [0.]
+    pick = lambda fraction: values[min(int(fraction * len(values)), len(values) - 1)] * 1e3
+    return {'p50_ms': pick(.5), 'p95_ms': pick(.95), 'p99_ms': pick(.99), 'max_ms': values[-1] * 1e3}
+
+
+async def load_test(args: argparse.Namespace) -> dict:
+    """
+    It starts the server if needed, runs all the clients until their races are over, and gathers the measurements.
+
+    Args:
+      args (argparse.Namespace): The options of the command line.
+
+    Returns:
+      dict: The measurements of the clients and the metrics of the server.
+    """
+    host, port, server = args.host, args.port, None
+    if not port:
+        server = await asyncio.create_subprocess_exec(
+            sys.executable, '-m', 'race.server', '--host', host, '--port', '0', '--size', str(args.size),
+            '--lobby-wait', '1', '--countdown', '1', '--duration', str(3 * args.seconds), cwd=ROOT, stdout=asyncio.subprocess.PIPE
+        )
+        while not (line := (await server.stdout.readline()).decode()).startswith('Listening on '):
+            if not line:
+                raise RuntimeError('The race server did not start')
+        port = int(line.rsplit(':', 1)[1])
+
+    results = Results()
+    start = time.monotonic()
+    try:
+        clients = []
+        for index in range(args.races * args.size):
+            clients.append(asyncio.create_task(client(index, host, port, args.seconds, args.rate, results)))
+            if index % CONNECT_BATCH == CONNECT_BATCH - 1:
+                await asyncio.sleep(.05)
+        await asyncio.gather(*clients)
+        elapsed = time.monotonic() - start
+        stats = await server_stats(host, port)
+    finally:
+        if server:
+            server.terminate()
+            await server.wait()
+
+    return {
+        'clients': args.races * args.size, 'completed': results.completed, 'failed': results.failed, 'elapsed_s': elapsed,
+        'ticks': len(results.latencies), 'wait': percentiles(results.waits), 'tick_latency': percentiles(results.latencies),
+        'server': {key: value for key, value in stats.items() if key != 'type'},
+    }
+
+
+def main() -> None:
+    """
+    It runs the load test, prints the results, and exits with a non-zero status if any client failed or was dropped.
+    """
+    parser = argparse.ArgumentParser(description='Load tests the race server with simulated clients.')
+    parser.add_argument('--races', type=int, default=250, help='The number of races at the same time.')
+    parser.add_argument('--size', type=int, default=4, help='The number of players in a race.')
+    parser.add_argument('--seconds', type=float, default=10, help='How long a client types for, on average.')
+    parser.add_argument('--rate', type=float, default=5, help='The keys a client presses per second.')
+    parser.add_argument('--host', default=RACE_HOST, help='The address of the server.')
+    parser.add_argument('--port', type=int, default=0, help='The port of a running server, instead of starting one.')
+    parser.add_argument('--output', metavar='PATH', help='Saves the results to a JSON file.')
+    args = parser.parse_args()
+
+    summary = asyncio.run(load_test(args))
+    server, wait, latency = summary['server'], summary['wait'], summary['tick_latency']
+    print(f'{summary["clients"]} clients in {args.races} races: {summary["completed"]} completed, {summary["failed"]} failed in {summary["elapsed_s"]:.1f}s')
+    print(f'waited for a race  p50 {wait["p50_ms"]:.1f}ms  p95 {wait["p95_ms"]:.1f}ms  max {wait["max_ms"]:.1f}ms')
+    print(f'tick latency       p50 {latency["p50_ms"]:.2f}ms  p95 {latency["p95_ms"]:.2f}ms  p99 {latency["p99_ms"]:.2f}ms  max {latency["max_ms"]:.2f}ms over {summary["ticks"]} ticks')
+    if server:
+        print(f'server tick        p50 {server["tick_p50_ms"]:.2f}ms  p99 {server["tick_p99_ms"]:.2f}ms  max {server["tick_max_ms"]:.2f}ms, {server["late_ticks"]} late')
+        print(f'server messages    {server["received"]} received, {server["sent"]} sent ({server["sent_bytes"] / 1024:.0f} KiB), {server["dropped"]} dropped')
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(summary, file, indent=2)
+    if summary['failed'] or server.get('dropped'):
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+The messages between the race server and its clients. Every message is a JSON object on a line of its own, with its
+kind under 'type'.
+
+From the client: join (name, version) to enter the lobby, progress (score, wrong) while typing, and finish (score) once
+the game is over. A first message of stats asks the server for its metrics instead of joining.
+From the server: start (race, player, story, story_hash, countdown, duration, players) once a race is formed, tick
+(sent, progress) with the progress of every player at most once per tick, end (results) once everyone finished, and
+error (reason).
+"""
+import asyncio
+import json
+from typing import Any, Optional
+
+PROTOCOL_VERSION = 2
+JOIN, PROGRESS, FINISH, STATS = 'join', 'progress', 'finish', 'stats'
+START, TICK, END, ERROR = 'start', 'tick', 'end', 'error'
+
+
+def encode(kind: str, **fields: Any) -> bytes:
+    """
+    It turns a message into the line which is sent.
+
+    Args:
+      kind (str): The type of the message.
+      **fields (Any): The contents of the message.
+
+    Returns:
+      bytes: The line, ending with a newline.
+    """
+    return json.dumps({'type': kind, **fields}, separators=(',', ':')).encode() + b'\n'
+
+
+def decode(line: bytes) -> dict:
+    """
+    It reads a message out of a line which was received.
+
+    Args:
+      line (bytes): The line.
+
+    Raises:
+      ValueError: If the line isn't a message.
+
+    Returns:
+      dict: The message, with its kind under 'type'.
+    """
+    message = json.loads(line)
+    if not isinstance(message, dict) or not isinstance(message.get('type'), str):
+        raise ValueError(f'Not a message: {line[:80]!r}')
+    return message
+
+
+async def receive(reader: asyncio.StreamReader) -> Optional[dict]:
+    """
+    It waits for the next message on a connection.
+
+    Args:
+      reader (asyncio.StreamReader): The connection.
+
+    Raises:
+      ValueError: If a line which isn't a message, or which is too long, was received.
+
+    Returns:
+      dict, optional: The message, or None if the connection was closed.
+    """
+    line = await reader.readline()
+    return decode(line) if line else None
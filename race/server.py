@@ -0,0 +1,365 @@
+"""
+The race server, which runs every race in one asyncio event loop.
+
+The players who join wait in a lobby until there are enough of them for a race, or until the first of them has waited
+long enough. Every race is handed a random story of the corpus, which every client opens from its own copy, and
+checks against the hash of the story sent along with it.
+The progress the clients send is only stored when it arrives. A single loop ticks all the races at a fixed rate, and
+sends the progress of a race which changed since the last tick as one message, which is encoded once and written to
+all its players. So the work of the server grows with the number of races, and not with how fast the players type.
+A client which falls too far behind reading is dropped, instead of letting its messages pile up in the server.
+
+Run it with `python -m race.server`.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from collections import deque
+from typing import Optional
+
+from race.config import RACE_HOST, RACE_PORT, RACE_BACKLOG, RACE_SIZE, RACE_LOBBY_WAIT, RACE_COUNTDOWN, RACE_DURATION, RACE_TICK, RACE_WRITE_LIMIT, RACE_TICK_SAMPLES
+from race.protocol import PROTOCOL_VERSION, JOIN, PROGRESS, FINISH, STATS, START, TICK, END, ERROR, encode, receive
+
+
+class Player:
+    """
+    A player connected to the server.
+
+    Attributes:
+      id (int): The id of the player, unique on the server.
+      name (str): The name the player joined with.
+      writer (asyncio.StreamWriter, optional): The connection to the player, None once it is closed.
+      joined (float): The time the player joined the lobby at.
+      race (Race, optional): The race the player is in.
+      score (int): The latest score of the player.
+      wrong (int): The latest number of wrong keys of the player.
+      done (bool): Weather the game of the player is over, or the player left.
+    """
+    __slots__ = 'id', 'name', 'writer', 'joined', 'race', 'score', 'wrong', 'done'
+
+    def __init__(self, player_id: int, name: str, writer: asyncio.StreamWriter, joined: float) -> None:
+        """
+        All initial configuration for the player is done here.
+
+        Args:
+          player_id (int): The id of the player.
+          name (str): The name the player joined with.
+          writer (asyncio.StreamWriter): The connection to the player.
+          joined (float): The time the player joined the lobby at.
+        """
+        self.id = player_id
+        self.name = name
+        self.writer: Optional[asyncio.StreamWriter] = writer
+        self.joined = joined
+        self.race: Optional[Race] = None
+        self.score = self.wrong = 0
+        self.done = False
+
+
+class Race:
+    """
+    A race between a few players on the same story.
+
+    Attributes:
+      id (int): The id of the race, unique on the server.
+      story (int): The index of the story in the corpus.
+      players (list[Player]): The players in the race.
+      starts_at (float): The time the race starts at, after the countdown.
+      ends_at (float): The time the race is ended at, even if some players aren't done.
+      changed (bool): Weather any progress arrived since the last tick.
+    """
+    def __init__(self, race_id: int, story: int, players: list[Player], starts_at: float, ends_at: float) -> None:
+        """
+        All initial configuration for the race is done here.
+
+        Args:
+          race_id (int): The id of the race.
+          story (int): The index of the story in the corpus.
+          players (list[Player]): The players in the race.
+          starts_at (float): The time the race starts at.
+          ends_at (float): The time the race is ended at.
+        """
+        self.id = race_id
+        self.story = story
+        self.players = players
+        self.starts_at = starts_at
+        self.ends_at = ends_at
+        self.changed = False
+
+    def over(self, now: float) -> bool:
+        """
+        It checks if the race is over.
+
+        Args:
+          now (float): The current time.
+
+        Returns:
+          bool: Weather every player is done, or the race ran out of time.
+        """
+        return now >= self.ends_at or all(player.done for player in self.players)
+
+    def results(self) -> list[list]:
+        """
+        It ranks the players by their score.
+
+        Returns:
+          list[list]: The id, name and score of every player, best first.
+        """
+        return [[player.id, player.name, player.score] for player in sorted(self.players, key=lambda player: -player.score)]
+
+
+class RaceServer:
+    """
+    It forms the races out of the players who join, and keeps their players up to date with each other's progress.
+
+    Attributes:
+      size (int): The most players in a race.
+      tick (float): The seconds between two broadcasts of the progress.
+      lobby_wait (float): The seconds a player waits in the lobby before a race is started with fewer players.
+      countdown (float): The seconds between a race being formed and it starting.
+      duration (float): The seconds after which a race is ended.
+      lobby (list[Player]): The players waiting for a race.
+      races (dict[int, Race]): The races being run, by id.
+      ids (itertools.count): The ids of the players and races.
+      corpus (StoryCorpus, optional): The stories, opened when the server is started.
+      ticker (asyncio.Task, optional): The task ticking the races, once the server is started.
+      connections (int): The number of players connected.
+      finished (int): The number of races which are over.
+      received (int): The number of messages received.
+      sent (int): The number of messages sent.
+      sent_bytes (int): The number of bytes sent.
+      dropped (int): The number of clients which were dropped for falling behind.
+      tick_times (deque): The time the latest ticks took, in seconds.
+      late (int): The number of ticks which started later than a whole tick after they were due.
+    """
+    def __init__(self, size: int = RACE_SIZE, tick: float = RACE_TICK, lobby_wait: float = RACE_LOBBY_WAIT, countdown: float = RACE_COUNTDOWN, duration: float = RACE_DURATION) -> None:
+        """
+        All initial configuration for the server is done here, it has to be served before anyone can join.
+
+        Args:
+          size (int): The most players in a race.
+          tick (float): The seconds between two broadcasts of the progress.
+          lobby_wait (float): The seconds a player waits in the lobby before a race is started with fewer players.
+          countdown (float): The seconds between a race being formed and it starting.
+          duration (float): The seconds after which a race is ended.
+        """
+        self.size = size
+        self.tick = tick
+        self.lobby_wait = lobby_wait
+        self.countdown = countdown
+        self.duration = duration
+        self.lobby: list[Player] = []
+        self.races: dict[int, Race] = {}
+        self.ids = itertools.count(1)
+        self.corpus = None
+        self.ticker: Optional[asyncio.Task] = None
+        self.connections = self.finished = self.received = self.sent = self.sent_bytes = self.dropped = self.late = 0
+        self.tick_times: deque[float] = deque(maxlen=RACE_TICK_SAMPLES)
+
+    async def serve(self, host: str = RACE_HOST, port: int = RACE_PORT) -> asyncio.AbstractServer:
+        """
+        It starts listening for players, and starts ticking the races.
+
+        Args:
+          host (str): The address to listen on.
+          port (int): The port to listen on, 0 for any free one.
+
+        Returns:
+          asyncio.AbstractServer: The listening server.
+        """
+        from game_files.story_maker import load_corpus
+
+        self.corpus = load_corpus()
+        server = await asyncio.start_server(self.handle, host, port, backlog=RACE_BACKLOG)
+        self.ticker = asyncio.create_task(self.run())
+        return server
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        It talks to a client from when it connects until it leaves. The first message either joins the lobby or asks
+        for the metrics, and the rest only update the progress of the player.
+
+        Args:
+          reader (asyncio.StreamReader): The connection from the client.
+          writer (asyncio.StreamWriter): The connection to the client.
+        """
+        player = None
+        self.connections += 1
+        try:
+            message = await receive(reader)
+            if message and message['type'] == STATS:
+                writer.write(encode(STATS, **self.metrics()))
+                return await writer.drain()
+            if not message or message['type'] != JOIN or message.get('version') != PROTOCOL_VERSION:
+                writer.write(encode(ERROR, reason=f'Expected to join with version {PROTOCOL_VERSION}'))
+                return await writer.drain()
+
+            player = Player(next(self.ids), str(message.get('name', ''))[:20], writer, time.monotonic())
+            self.lobby.append(player)
+            while (message := await receive(reader)) is not None:
+                self.received += 1
+                self.update(player, message)
+        except (ConnectionError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            if player:
+                self.leave(player)
+            writer.close()
+
+    def update(self, player: Player, message: dict) -> None:
+        """
+        It stores the progress of a player, to be sent on the next tick. The progress sent before the race starts or
+        after the game of the player is over is ignored.
+
+        Args:
+          player (Player): The player who sent the message.
+          message (dict): The message.
+
+        Raises:
+          ValueError: If the score or the wrong keys aren't counts, which drops the client.
+        """
+        if not (race := player.race) or player.done or time.monotonic() < race.starts_at:
+            return
+        if message['type'] in (PROGRESS, FINISH):
+            score, wrong = message.get('score', player.score), message.get('wrong', player.wrong)
+            if not all(type(count) is int and count >= 0 for count in (score, wrong)):
+                raise ValueError(f'Malformed progress from player {player.id}: {score!r}, {wrong!r}')
+            player.score, player.wrong = score, wrong
+            player.done = message['type'] == FINISH
+            race.changed = True
+
+    def leave(self, player: Player) -> None:
+        """
+        It takes a player who disconnected out of the lobby, or marks them as done in their race.
+
+        Args:
+          player (Player): The player.
+        """
+        player.writer = None
+        if player.race:
+            player.done = player.race.changed = True
+        elif player in self.lobby:
+            self.lobby.remove(player)
+
+    def send(self, players: list[Player], data: bytes) -> None:
+        """
+        It writes a message to players, without waiting for it to be sent. A player whose connection has more than
+        RACE_WRITE_LIMIT bytes waiting to be sent is dropped.
+
+        Args:
+          players (list[Player]): The players.
+          data (bytes): The encoded message.
+        """
+        for player in players:
+            if player.writer is None:
+                continue
+            if player.writer.transport.get_write_buffer_size() > RACE_WRITE_LIMIT:
+                self.dropped += 1
+                player.writer.close()
+                player.writer = None
+                continue
+            player.writer.write(data)
+            self.sent += 1
+            self.sent_bytes += len(data)
+
+    def match(self, now: float) -> None:
+        """
+        It forms races out of the lobby, whenever it is full enough, or the first in it waited long enough.
+
+        Args:
+          now (float): The current time.
+        """
+        while len(self.lobby) >= self.size or (self.lobby and now - self.lobby[0].joined >= self.lobby_wait):
+            players, self.lobby = self.lobby[:self.size], self.lobby[self.size:]
+            race = Race(next(self.ids), self.corpus.random(), players, now + self.countdown, now + self.countdown + self.duration)
+            self.races[race.id] = race
+            roster = [[player.id, player.name] for player in players]
+            digest = self.corpus.hash(race.story)
+            for player in players:
+                player.race = race
+                self.send([player], encode(START, race=race.id, player=player.id, story=race.story, story_hash=digest, countdown=self.countdown, duration=self.duration, players=roster))
+
+    def step(self, now: float) -> None:
+        """
+        It runs a tick: it forms the new races, sends the progress of the races which changed, and ends the races which
+        are over.
+
+        Args:
+          now (float): The current time.
+        """
+        self.match(now)
+        for race in list(self.races.values()):
+            if race.changed:
+                race.changed = False
+                progress = [[player.id, player.score, player.wrong, player.done] for player in race.players]
+                self.send(race.players, encode(TICK, sent=now, progress=progress))
+            if race.over(now):
+                self.send(race.players, encode(END, results=race.results()))
+                for player in race.players:
+                    if player.writer:
+                        player.writer.close()
+                del self.races[race.id]
+                self.finished += 1
+
+    async def run(self) -> None:
+        """
+        It ticks the races at a fixed rate, for as long as the server runs. A tick which is late doesn't make the next
+        ones come early, they are kept on the same schedule.
+        """
+        due = time.monotonic()
+        while True:
+            now = time.monotonic()
+            if now - due > self.tick:
+                self.late += 1
+            self.step(now)
+            self.tick_times.append(time.monotonic() - now)
+            due = max(due + self.tick, time.monotonic())
+            await asyncio.sleep(due - time.monotonic())
+
+    def metrics(self) -> dict:
+        """
+        It sums up how the server is doing.
+
+        Returns:
+          dict: The number of races, players and messages, and the percentiles of the time a tick takes in ms.
+        """
+        times = sorted(self.tick_times) or [0.]
+        return {
+            'races': len(self.races), 'lobby': len(self.lobby), 'connections': self.connections,
+            'finished': self.finished, 'received': self.received, 'sent': self.sent, 'sent_bytes': self.sent_bytes,
+            'dropped': self.dropped, 'late_ticks': self.late, 'tick_p50_ms': times[len(times) // 2] * 1e3,
+            'tick_p99_ms': times[min(int(.99 * len(times)), len(times) - 1)] * 1e3, 'tick_max_ms': times[-1] * 1e3,
+        }
+
+
+def main() -> None:
+    """
+    It runs the race server until it is interrupted.
+    """
+    parser = argparse.ArgumentParser(description='Runs the race server.')
+    parser.add_argument('--host', default=RACE_HOST, help='The address to listen on.')
+    parser.add_argument('--port', type=int, default=RACE_PORT, help='The port to listen on, 0 for any free one.')
+    parser.add_argument('--size', type=int, default=RACE_SIZE, help='The most players in a race.')
+    parser.add_argument('--tick', type=float, default=RACE_TICK, help='The seconds between two broadcasts.')
+    parser.add_argument('--lobby-wait', type=float, default=RACE_LOBBY_WAIT, help='The seconds before a race starts with fewer players.')
+    parser.add_argument('--countdown', type=float, default=RACE_COUNTDOWN, help='The seconds between a race being formed and it starting.')
+    parser.add_argument('--duration', type=float, default=RACE_DURATION, help='The seconds after which a race is ended.')
+    args = parser.parse_args()
+
+    async def serve() -> None:
+        server = await RaceServer(args.size, args.tick, args.lobby_wait, args.countdown, args.duration).serve(args.host, args.port)
+        host, port = server.sockets[0].getsockname()[:2]
+        print(f'Listening on {host}:{port}', flush=True)
+        async with server:
+            await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
@@ -1,21 +1,40 @@
+import importlib
+from functools import lru_cache
 from typing import Type
+
 from mem_hub import mem
 from utils import BaseScreen
 
+SCENES = {
+    'login': ('login_system.login', 'LoginScene'),
+    'game': ('game_files.game', 'Game'),
+    'history': ('graphing.history', 'History'),
+    'leaderboard': ('leaderboard_system.leaderboard', 'LeaderboardScene'),
+    'race': ('race.client', 'RaceGame'),
+}
+
 
-def set_scene(scene: Type[BaseScreen]) -> None:
+@lru_cache(maxsize=None)
+def get_scene(name: str) -> Type[BaseScreen]:
     """
-    It changes the current scene to the scene passed in.
+    The scene registry, it imports the module of a scene only the first time the scene is asked for, so the modules
+    which are only needed after the login aren't loaded before the first frame.
 
     Args:
-      scene (Type[BaseScreen]): The scene to set.
+      name (str): The name of the scene in SCENES.
+
+    Returns:
+      Type[BaseScreen]: The class of the scene.
     """
-    mem['game'].scene = scene()
+    module, attribute = SCENES[name]
+    return getattr(importlib.import_module(module), attribute)
 
 
-if True:
-    from game_files.game import Game
-    from login_system.login import LoginScene
-    from graphing.history import History
+def set_scene(scene: str | Type[BaseScreen]) -> None:
+    """
+    It changes the current scene to the scene passed in.
 
-    mem.update({'login': LoginScene, 'game_scene': Game, 'history': History})
+    Args:
+      scene (str | Type[BaseScreen]): The name of the scene in the registry, or the scene itself.
+    """
+    mem['game'].scene = (get_scene(scene) if isinstance(scene, str) else scene)()
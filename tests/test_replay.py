@@ -0,0 +1,88 @@
+import os
+import random
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+
+# utils has to be imported before the database, which it imports.
+import utils
+from database_files.database import User
+from game_files.game import Game
+from game_files.replay import ReplayGame
+from game_files.story_maker import load_corpus
+from mem_hub import mem
+
+
+class Saved(list):
+    """
+    It stands in for the write-behind thread, and keeps the games it is given.
+    """
+    add = list.append
+
+
+class PlayedGame(Game):
+    """
+    A game played by a script instead of the keyboard, against a clock the script moves.
+    """
+    headless = True
+    time = 0
+
+    def clock(self) -> int:
+        return self.time
+
+
+def longest_story() -> int:
+    corpus = load_corpus()
+    return max(range(len(corpus)), key=lambda index: len(corpus[index]))
+
+
+def play(story_index: int, seed: int) -> Game:
+    """
+    It plays a game the way the frames of BaseScreen.run_frame would, with frames of uneven length, and keys which arrive
+    at any time between two frames, until the word runs off the screen.
+    """
+    generator = random.Random(seed)
+    game = PlayedGame(story_index)
+    game.start_game()
+    for _ in range(100_000):
+        length = generator.randint(5, 60) * 10 ** 6
+        game.time += length
+        game.events = []
+        if generator.random() < .1:
+            key = game.word.first if game.word and generator.random() < .9 else '#'
+            arrived = game.time - generator.randint(0, length)
+            game.events.append(pygame.event.Event(pygame.KEYDOWN, key=ord(key), unicode=key, arrived=arrived))
+        game.handle_keys()
+        game.word_rect = game.scroller.rect
+        game.draw_graph()
+        game.handler()
+        if game.scene != game.draw_game:
+            return game
+    raise AssertionError('The game never ended')
+
+
+def test_replays_a_saved_game_to_game_over():
+    mem['user'], mem['writer'] = User(username='replayer', password=''), Saved()
+    try:
+        play(longest_story(), seed=7)
+        score, = mem['writer']
+    finally:
+        del mem['user'], mem['writer']
+
+    story_index = load_corpus().find(score.story_hash, score.story_id)
+    replay = ReplayGame(story_index, score.keystroke_log, score.letter_log).run()
+
+    assert replay.finished
+    assert replay.diverged == 0
+    assert (replay.score, replay.wrong) == (score.final_score, score.error_count)
+    assert [letter.keys for letter in replay.letters] == [letter.keys for letter in score.letter_log]
+
+
+def test_replays_an_empty_log_to_game_over():
+    replay = ReplayGame(longest_story(), [], []).run()
+
+    assert replay.finished
+    assert replay.score == replay.wrong == 0
+    assert replay.letters
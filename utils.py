@@ -1,17 +1,22 @@
 import hashlib
+import heapq
+import itertools
 import os
+import time
 import uuid
-from functools import partial
-from operator import contains
-from threading import Timer
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial, lru_cache
+from operator import contains, is_
+from queue import Empty, SimpleQueue
 from types import EllipsisType
 from typing import Any, Callable, Optional, Collection, Union
 
 from pygame.event import Event
-from sqlalchemy import create_engine, func
+from sqlalchemy import create_engine, func, select
 from sqlalchemy.engine import Engine
 from sqlalchemy.engine.default import DefaultExecutionContext
-from sqlalchemy.exc import OperationalError
+from sqlalchemy.exc import SQLAlchemyError
 import pygame
 from sqlalchemy.orm import Session
 
@@ -50,15 +55,53 @@ pos = partial(pygame.Vector2)
 if True:
     from game_files.config import *
 
-pygame.init()
-screen = pygame.display.set_mode(DIMENSIONS)
-icon = pygame.image.load(ICON_PATH)
-pygame.display.set_icon(icon)
-clock = pygame.time.Clock()
+pygame.font.init()
+screen: Optional[pygame.Surface] = None
+
+
+def init_display() -> pygame.Surface:
+    """
+    It initializes pygame and opens the window. Importing this module doesn't open it, so the window only appears once
+    the game is ready to draw its first frame.
+
+    Returns:
+      pygame.Surface: The surface of the window, which everything is drawn on.
+    """
+    global screen
+    pygame.init()
+    screen = pygame.display.set_mode(DIMENSIONS)
+    pygame.display.set_icon(pygame.image.load(ICON_PATH))
+    return screen
+
+
+def draw_rect(color: tuple[int, int, int], rect: pygame.Rect) -> pygame.Rect:
+    """
+    Draws a filled rectangle on the window.
+
+    Args:
+      color (tuple): The color of the rectangle.
+      rect (pygame.Rect): Where the rectangle is drawn.
+
+    Returns:
+      pygame.Rect: The area which was drawn on.
+    """
+    return pygame.draw.rect(screen, color, rect)
+
+
+@lru_cache(maxsize=None)
+def Font(size: int) -> pygame.font.Font:
+    """
+    The font registry, it loads the game font at the given size only the first time it is asked for.
+
+    Args:
+      size (int): The size of the font.
+
+    Returns:
+      pygame.font.Font: The shared font object of that size.
+    """
+    return pygame.font.Font(FONT_PATH, size)
 
-draw_rect = partial(pygame.draw.rect, screen)
 
-Font = partial(pygame.font.Font, FONT_PATH)
 SmallFont = Font(SMALL_FONT_SIZE)
 MediumFont = Font(MEDIUM_FONT_SIZE)
 LargeFont = Font(LARGE_FONT_SIZE)
@@ -70,6 +113,263 @@ def stop() -> None:
     exit(0)
 
 
+class LRUCache:
+    """
+    A bounded cache which throws away the least recently used entry when it is full.
+
+    Attributes:
+      maxsize (int): The maximum number of entries kept in the cache.
+      data (OrderedDict): The cached entries, ordered from the least to the most recently used.
+      hits (int): The number of lookups which were found in the cache.
+      misses (int): The number of lookups which were not found in the cache.
+      evictions (int): The number of entries thrown away to make space for new ones.
+    """
+    def __init__(self, maxsize: int) -> None:
+        """
+        All initial configuration for the cache is done here.
+
+        Args:
+          maxsize (int): The maximum number of entries kept in the cache.
+        """
+        self.maxsize = maxsize
+        self.data: OrderedDict = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        """
+        Fetches an entry from the cache, and marks it as the most recently used.
+
+        Args:
+          key (Any): The key of the entry.
+          default (Any): The value returned if the key isn't cached. Defaults to None.
+
+        Returns:
+          Any: The cached value, or the default.
+        """
+        try:
+            value = self.data[key]
+        except KeyError:
+            self.misses += 1
+            return default
+        self.hits += 1
+        self.data.move_to_end(key)
+        return value
+
+    def put(self, key: Any, value: Any) -> Any:
+        """
+        Stores an entry in the cache, evicting the least recently used one if the cache is full.
+
+        Args:
+          key (Any): The key of the entry.
+          value (Any): The value to be cached.
+
+        Returns:
+          Any: The value which was cached.
+        """
+        self.data[key] = value
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+            self.evictions += 1
+        return value
+
+    def clear(self) -> None:
+        """
+        It empties the cache, the counters are kept as they are.
+        """
+        self.data.clear()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """
+        It returns the counters of the cache, to check how well it is doing its job.
+
+        Returns:
+          dict[str, int]: The size, hits, misses and evictions of the cache.
+        """
+        return {'size': len(self.data), 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+    def __len__(self) -> int:
+        """
+        It returns the number of entries in the cache.
+
+        Returns:
+          int: Number of cached entries.
+        """
+        return len(self.data)
+
+
+text_cache = LRUCache(TEXT_CACHE_SIZE)
+
+
+def render_text(font: pygame.font.Font, text: str, color: tuple[int, int, int], alpha: Optional[int] = None) -> pygame.Surface:
+    """
+    Renders the text with the given font and color, reusing the surface if the same text was rendered before.
+
+    Args:
+      font (pygame.font.Font): The font to render the text in.
+      text (str): The text to be rendered.
+      color (tuple): The color of the text.
+      alpha (int, optional): The transparency of the rendered text.
+
+    Notes:
+      The surface is shared between everyone who renders the same text, so it must not be drawn on.
+
+    Returns:
+      pygame.Surface: The surface with the text rendered on it.
+    """
+    key = font, text, color, alpha
+    surf = text_cache.get(key)
+    if surf is None:
+        surf = font.render(text, True, color)
+        if alpha:
+            surf.set_alpha(alpha)
+        text_cache.put(key, surf)
+    return surf
+
+
+class DirtyRects:
+    """
+    It records everything that is drawn in a frame, so that only the parts of the screen which changed since the
+    previous frame have to be cleared, redrawn and presented.
+
+    Attributes:
+      recording (bool): Whether the draw calls are being recorded, instead of being drawn immediately.
+      ops (list): The draw calls recorded in the current frame, as tuples of (area, key, redraw function).
+      presented (list, optional): The draw calls of the last frame which was presented.
+      keys (set): The keys of the draw calls of the last frame which was presented.
+    """
+    def __init__(self) -> None:
+        """
+        All initial configuration for the recorder is done here.
+        """
+        self.recording = False
+        self.ops: list[tuple[pygame.Rect, Any, Callable[[], Any]]] = []
+        self.presented: Optional[list] = None
+        self.keys: set = set()
+
+    def draw(self, area: pygame.Rect, signature: Any, redraw: Callable[[], Any]) -> None:
+        """
+        Draws something to the screen, or records it if the current scene is in dirty rectangle mode.
+
+        Args:
+          area (pygame.Rect): The area of the screen which is drawn on.
+          signature (Any): A hashable value which changes whenever the drawing would look different.
+          redraw (function): The function which does the actual drawing.
+        """
+        self.record(self.prepare(area, signature, redraw))
+
+    @staticmethod
+    def prepare(area: pygame.Rect, signature: Any, redraw: Callable[[], Any]) -> tuple:
+        """
+        Builds a draw call, which can be kept and recorded again in every frame it doesn't change.
+
+        Args:
+          area (pygame.Rect): The area of the screen which is drawn on.
+          signature (Any): A hashable value which changes whenever the drawing would look different.
+          redraw (function): The function which does the actual drawing.
+
+        Returns:
+          tuple: The draw call, as a tuple of (area, key, redraw function).
+        """
+        return area, (tuple(area), signature), redraw
+
+    def record(self, op: tuple) -> None:
+        """
+        Draws a draw call which was built before, or records it if the current scene is in dirty rectangle mode.
+
+        Args:
+          op (tuple): The draw call, from prepare.
+        """
+        if self.recording:
+            self.ops.append(op)
+        else:
+            op[2]()
+
+    def blit(self, surf: pygame.Surface, dest: pygame.Vector2 | tuple[int, int]) -> pygame.Rect:
+        """
+        Blits a surface to the screen through the recorder.
+
+        Args:
+          surf (pygame.Surface): The surface to be drawn, it is expected not to be drawn on while it is being shown.
+          dest (pygame.Vector2/tuple): The top left corner of where the surface is drawn.
+
+        Returns:
+          pygame.Rect: The area of the screen which the surface covers.
+        """
+        rect = surf.get_rect(topleft=dest)
+        self.draw(rect, (surf, tuple(rect)), partial(screen.blit, surf, rect))
+        return rect
+
+    def begin(self) -> None:
+        """
+        Starts recording the draw calls of a new frame.
+        """
+        self.recording = True
+        self.ops = []
+
+    def present(self, previous: Optional[list]) -> list:
+        """
+        Compares the recorded frame with the previous one, and only clears, redraws and updates the areas which changed.
+        Nothing is presented if nothing changed, which is found without building anything when the same kept draw calls
+        were recorded again.
+
+        Args:
+          previous (list, optional): The draw calls of the previous frame, None if everything should be redrawn.
+
+        Returns:
+          list: The draw calls of this frame, to be compared against the next one.
+        """
+        ops, self.ops = self.ops, []
+        self.recording = False
+
+        if previous is None:
+            screen.fill(SCREEN_COLOR)
+            for *_, redraw in ops:
+                redraw()
+            pygame.display.update()
+            self.presented, self.keys = ops, {key for _, key, _ in ops}
+            return ops
+
+        if len(ops) == len(previous) and all(map(is_, ops, previous)):
+            return previous
+
+        old = self.keys if previous is self.presented else {key for _, key, _ in previous}
+        new = {key for _, key, _ in ops}
+        self.presented, self.keys = ops, new
+        regions = [pygame.Rect(area) for area, _ in old ^ new]
+        if not regions:
+            return ops
+
+        for region in regions:
+            screen.set_clip(region)
+            screen.fill(SCREEN_COLOR)
+            for area, _, redraw in ops:
+                if area.colliderect(region):
+                    redraw()
+        screen.set_clip(None)
+        pygame.display.update(regions)
+        return ops
+
+
+dirty = DirtyRects()
+
+
+def blit_text(surf: pygame.Surface, rect: pygame.Rect, background_color: Optional[tuple[int, int, int]], bg_rect: pygame.Rect) -> None:
+    """
+    Draws a rendered text, along with the box behind it, to the screen.
+
+    Args:
+      surf (pygame.Surface): The rendered text.
+      rect (pygame.Rect): Where the text is drawn.
+      background_color (tuple, optional): The color of the box behind the text, if there is one.
+      bg_rect (pygame.Rect): Where the box behind the text is drawn.
+    """
+    if background_color:
+        draw_rect(background_color, bg_rect)
+    screen.blit(surf, rect)
+
+
 class Text:
     """
     This is the class used everywhere to render text to the screen.
@@ -85,7 +385,14 @@ class Text:
         text_is_centered (bool): Weather the text should be centered within the box. If not, it will be aligned to the top left corner of the box.
         box_is_centered (bool): Weather the box should be centered at the given position. If not, it will be aligned to the top left corner at the position.
         alpha (int): The transparency of the textbox.
+
+    Notes:
+      The layout is kept between frames, so the attributes should be changed in place instead of making a new Text.
+      A list given as the text is compared by value when it is assigned, and a list changed in place is equal to itself,
+      so the layout is kept. A new list has to be assigned, like a changed copy, for the change to be drawn.
     """
+    __slots__ = 'text', 'pos', 'width', 'height', 'font', 'background_color', 'text_color', 'text_is_centered', 'box_is_centered', 'alpha', '_layout'
+
     def __init__(self, text: str | list, position: Optional[pygame.Vector2 | tuple[int, int]] = None, width: int = 0, height: int = 0, font: pygame.font.Font = SmallFont, background_color: Optional[tuple[int, int, int]] = None, text_color: tuple[int, int, int] = TEXT_COLOR, text_is_centered: bool = True, box_is_centered: bool = True, alpha: Optional[int] = None) -> None:
         """
         All initial configuration for the Text object is done here.
@@ -102,6 +409,7 @@ class Text:
           box_is_centered (bool): Weather the box should be centered at the given position. If not, it will be aligned to the top left corner. Defaults to True.
           alpha (int, optional): The transparency of the textbox.
         """
+        object.__setattr__(self, '_layout', None)
         self.text = text
         self.pos = position
         self.width = width
@@ -113,6 +421,22 @@ class Text:
         self.box_is_centered = box_is_centered
         self.alpha = alpha
 
+    def __setattr__(self, name: str, value: Any) -> None:
+        """
+        Special function invoked when an attribute is set, it throws away the layout if the value changed.
+
+        Args:
+          name (str): The name of the attribute.
+          value (Any): The new value of the attribute.
+        """
+        try:
+            if getattr(self, name) == value:
+                return
+        except AttributeError:
+            pass
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_layout', None)
+
     def format(self, text: str | list) -> 'Text':
         """
         Create a new Text object with the same format as the current one, but with a different text.
@@ -196,9 +520,24 @@ class Text:
         Returns:
           pygame.Rect: The surface with the text rendered on it.
         """
-        surf = self.font.render(self.text, True, self.text_color)
-        if self.alpha:
-            surf.set_alpha(self.alpha)
+        area, op = self.layout
+        if should_blit:
+            dirty.record(op)
+        return area
+
+    @property
+    def layout(self) -> tuple[pygame.Rect, tuple]:
+        """
+        The area covered by the textbox, and the draw call which draws it. They are only computed again if one of the
+        attributes changed since the last time.
+
+        Returns:
+          tuple[pygame.Rect, tuple]: The area of the textbox, and its draw call.
+        """
+        if self._layout is not None:
+            return self._layout
+
+        surf = render_text(self.font, self.text, self.text_color, self.alpha)
         rect = bg_rect = surf.get_rect()
 
         if self.box_is_centered:
@@ -217,11 +556,11 @@ class Text:
             else:
                 bg_rect.topleft = rect.topleft
 
-        if should_blit:
-            if self.background_color:
-                draw_rect(self.background_color, bg_rect)
-            screen.blit(surf, rect)
-        return bg_rect if self.background_color else rect
+        area = bg_rect if self.background_color else rect
+        signature = surf, tuple(rect), self.background_color, tuple(bg_rect)
+        layout = area, dirty.prepare(area, signature, partial(blit_text, surf, rect, self.background_color, bg_rect))
+        object.__setattr__(self, '_layout', layout)
+        return layout
 
 
 class Button:
@@ -234,6 +573,8 @@ class Button:
       og_text (Text/EllipsisType/dict): The original value passed as the active_text.
       action (function): The function that is triggered when the button is clicked.
     """
+    __slots__ = 'default_text', 'active_text', 'og_text', 'action'
+
     def __init__(self, default_text: Text, active_text: Text | EllipsisType | dict, action: Callable[[], Any] = lambda: None) -> None:
         """
         All initial configuration for the Button is done here.
@@ -260,7 +601,7 @@ class Button:
     def draw(self, scene: 'BaseScreen') -> pygame.Rect:
         """
         The handler for drawing the button, it shows different text depending on whether the button is active or not.
-        And triggers the action if the button is clicked.
+        And registers the button with the event router of the scene, which triggers the action if it is clicked.
 
         Args:
           scene (BaseScreen): The scene that the button is being drawn on.
@@ -268,16 +609,11 @@ class Button:
         Returns:
           pygame.Rect: The surface of the button that is being drawn.
         """
-        mouse_x, mouse_y = pygame.mouse.get_pos()
-
-        arect = self.active_text.draw
-
-        if arect(False).collidepoint(mouse_x, mouse_y):
-            if self.action:
-                for event in scene.events:
-                    if event.type == pygame.MOUSEBUTTONDOWN:
-                        self.action()
-            return arect()
+        rect = self.active_text.draw(False)
+        if self.action:
+            scene.router.register(rect, self.action)
+        if scene.router.hovered(rect):
+            return self.active_text.draw()
         return self.default_text.draw()
 
     def modify(self, default_text: Optional[Text | dict] = None, active_text: Optional[Text | dict] = None, action: Optional[Callable[[], Any]] = None) -> 'Button':
@@ -298,6 +634,155 @@ class Button:
         return Button(default_text, active_text, action)
 
 
+class GlyphAtlas:
+    """
+    The characters of a font in a single color, each of which is rendered only the first time it is needed.
+
+    Attributes:
+      font (pygame.font.Font): The font the characters are rendered in.
+      color (tuple): The color the characters are rendered in.
+      glyphs (dict): The rendered characters.
+    """
+    def __init__(self, font: pygame.font.Font, color: tuple[int, int, int]) -> None:
+        """
+        All initial configuration for the atlas is done here.
+
+        Args:
+          font (pygame.font.Font): The font the characters are rendered in.
+          color (tuple): The color the characters are rendered in.
+        """
+        self.font = font
+        self.color = color
+        self.glyphs: dict[str, pygame.Surface] = {}
+
+    def __getitem__(self, char: str) -> pygame.Surface:
+        """
+        Returns the rendered character, rendering it if it wasn't needed before.
+
+        Args:
+          char (str): The character to be rendered.
+
+        Returns:
+          pygame.Surface: The surface with the character rendered on it.
+        """
+        try:
+            return self.glyphs[char]
+        except KeyError:
+            glyph = self.glyphs[char] = self.font.render(char, True, self.color)
+            return glyph
+
+
+@lru_cache(maxsize=None)
+def glyph_atlas(font: pygame.font.Font, color: tuple[int, int, int]) -> GlyphAtlas:
+    """
+    The atlas registry, so that every font and color pair is only ever rendered into one atlas.
+
+    Args:
+      font (pygame.font.Font): The font of the atlas.
+      color (tuple): The color of the atlas.
+
+    Returns:
+      GlyphAtlas: The shared atlas of the font and color.
+    """
+    return GlyphAtlas(font, color)
+
+
+class Scroller:
+    """
+    A line of text which grows on the right and is consumed from the left, like the word in the game.
+    It is drawn by blitting the glyphs from an atlas at their offsets, so nothing is re-rendered when the text changes,
+    and only the glyphs which are on the screen are drawn.
+
+    Attributes:
+      atlas (GlyphAtlas): The atlas the glyphs are taken from.
+      center (pygame.Vector2): The position the line is centered at.
+      glyphs (deque): The glyphs of the line, from left to right.
+      width (int): The total width of the line.
+      height (int): The height of the line.
+      version (int): It changes whenever the line changes.
+    """
+    def __init__(self, atlas: GlyphAtlas, center: pygame.Vector2 | tuple[int, int]) -> None:
+        """
+        All initial configuration for the Scroller is done here.
+
+        Args:
+          atlas (GlyphAtlas): The atlas the glyphs are taken from.
+          center (pygame.Vector2/tuple): The position the line is centered at.
+        """
+        self.atlas = atlas
+        self.center = center
+        self.glyphs: deque[pygame.Surface] = deque()
+        self.width = 0
+        self.height = atlas[' '].get_height()
+        self.version = 0
+
+    def push(self, text: str) -> None:
+        """
+        Adds the text to the right end of the line.
+
+        Args:
+          text (str): The text to be added.
+        """
+        for char in text:
+            glyph = self.atlas[char]
+            self.glyphs.append(glyph)
+            self.width += glyph.get_width()
+        self.version += 1
+
+    def pop(self) -> None:
+        """
+        Removes the leftmost character of the line.
+        """
+        self.width -= self.glyphs.popleft().get_width()
+        self.version += 1
+
+    def clear(self) -> None:
+        """
+        Removes everything from the line.
+        """
+        self.glyphs.clear()
+        self.width = 0
+        self.version += 1
+
+    @property
+    def rect(self) -> pygame.Rect:
+        """
+        The area the whole line covers, including the parts which are off the screen.
+
+        Returns:
+          pygame.Rect: The area covered by the line.
+        """
+        rect = pygame.Rect(0, 0, self.width, self.height)
+        rect.center = self.center
+        return rect
+
+    def blit(self, rect: pygame.Rect) -> None:
+        """
+        Blits the glyphs which are on the screen, from left to right.
+
+        Args:
+          rect (pygame.Rect): The area covered by the line.
+        """
+        x, y = rect.topleft
+        for glyph in self.glyphs:
+            if x >= WIDTH:
+                break
+            if (width := glyph.get_width()) + x > 0:
+                screen.blit(glyph, (x, y))
+            x += width
+
+    def draw(self) -> pygame.Rect:
+        """
+        Draws the line to the screen.
+
+        Returns:
+          pygame.Rect: The area covered by the line.
+        """
+        rect = self.rect
+        dirty.draw(rect, (tuple(rect), self, self.version), partial(self.blit, rect))
+        return rect
+
+
 contains_everything = type('', (), {'__contains__': lambda *_: 1})()
 
 
@@ -319,7 +804,12 @@ class TextInput:
       input (str): Styling for input given by the user.
       current (str): The active TextInput in the group.
       group (list): The list of TextInputs in the group.
+      box (Text, optional): The textbox showing the input, which is built the first time it is drawn.
+      blink (bool): Weather the cursors are shown, it is toggled by the scheduler, for all the TextInputs at once.
     """
+    __slots__ = 'question', 'size', 'center', 'password', 'active', 'placeholder', 'min_length', 'max_length', 'accepted_chars', 'verifier', 'input', 'current', 'group', 'box', 'error', '_cursor_pos'
+    blink: bool = True
+
     def __init__(self, question: Text, _input: Optional[Text | dict] = None, placeholder: Text | str | dict = '', password: bool = False, active: bool = False, _prev: Optional['TextInput'] = None, _next: Optional['TextInput'] = None, min_length: int = 0, max_length: float = float('inf'), accepted_chars: Collection[str] = contains_everything, verifier: Optional[Callable[[str], bool]] = None) -> None:
         """
         All initial configuration for the TextInput is done here.
@@ -351,7 +841,7 @@ class TextInput:
         self.input = question.modify(**_input).format([]) if isinstance(_input, dict) else _input.format([]) if _input else question.format([])
         self.current = [self if active else None]
         self.group = [self]
-        self._cursor = 0
+        self.box: Optional[Text] = None
         self._cursor_pos = None
 
         if _prev:
@@ -378,7 +868,8 @@ class TextInput:
 
     def show_error(self, text: str) -> bool | None:
         """
-        Temporarily shows an error message in the input box.
+        Temporarily shows an error message in the input box, which flashes brighter before the input is restored.
+        The steps are run by the scheduler between frames, so nothing is changed from another thread.
 
         Args:
           text (str): The error message to be shown.
@@ -392,7 +883,8 @@ class TextInput:
             self.input = self.input.modify(list(text), text_color=Colors.RED)
             password, self.password = self.password, False
             setattr(self, 'error', True)
-            Timer(.3, lambda: [setattr(self, 'input', self.input.modify(text_color=Colors.BRIGHT_RED)), Timer(.3, lambda: [setattr(self, 'password', password), setattr(self, 'input', old), self.set_active(), hasattr(self, 'error') and delattr(self, 'error')]).start()]).start()
+            scheduler.after(ERROR_FLASH, lambda: setattr(self, 'input', self.input.modify(text_color=Colors.BRIGHT_RED)))
+            scheduler.after(2 * ERROR_FLASH, lambda: [setattr(self, 'password', password), setattr(self, 'input', old), self.set_active(), hasattr(self, 'error') and delattr(self, 'error')])
             return False
 
     @property
@@ -419,25 +911,39 @@ class TextInput:
     @property
     def cursor(self) -> str:
         """
-        Returns the cursor character or an empty string depending on frame count, giving the illusion of blinking.
+        Returns the cursor character or an empty string depending on the blink, giving the illusion of blinking.
 
         Returns:
           str: The character for the cursor.
         """
-        self._cursor += 1
-        self._cursor %= FPS
-        return self.active and '|' * (self._cursor < FPS / 2) or ''
+        return self.active and TextInput.blink and '|' or ''
+
+    @staticmethod
+    def toggle_blink() -> None:
+        """
+        It shows the cursors if they are hidden, and hides them if they are shown.
+        """
+        TextInput.blink = not TextInput.blink
 
     @property
     def text(self) -> 'Text':
         """
         Returns the text as per the style of the input box. Also replaces the text with '*' if the input is a password.
+        The textbox is built once, next to the question, and then updated in place.
 
         Returns:
           Text: The text object displayed in the input box.
         """
+        if self.box is None:
+            rect = self.question.draw(False)
+            self.box = self.input.modify(position=pos(rect.topright), width=self.input.width - rect.width, background_color=SCREEN_COLOR, text_is_centered=False, box_is_centered=False)
+
         actual_input = ['*'] * len(self.input.text) if self.password else self.input.text
-        return self.input.format(''.join(actual_input[:self.cursor_pos] + [self.cursor] + actual_input[self.cursor_pos:])) if actual_input else self.cursor + self.placeholder
+        style = self.input if actual_input else self.placeholder
+        self.box.text = ''.join(actual_input[:self.cursor_pos] + [self.cursor] + actual_input[self.cursor_pos:]) if actual_input else self.cursor + self.placeholder.text
+        self.box.text_color = style.text_color
+        self.box.font = style.font
+        return self.box
 
     def is_at_pos(self, index: int) -> bool:
         """
@@ -576,50 +1082,468 @@ class TextInput:
             self.current[0].active = False
         self.current[0] = None
 
+    def handle_key(self, event: Event) -> None:
+        """
+        It handles a key press for the whole group, by passing it to the focused TextInput.
+        If none of them is focused, the up and down keys focus the last and the first one.
+
+        Args:
+          event (Event): The key press.
+        """
+        if focused := self.current[0]:
+            return focused.type_key(event)
+        if event.key == pygame.K_UP:
+            self.group[-1].set_active()
+        elif event.key == pygame.K_DOWN:
+            self.group[0].set_active()
+
+    def type_key(self, event: Event) -> None:
+        """
+        It edits the input, or moves the focus, according to the key which was pressed.
+
+        Args:
+          event (Event): The key press.
+        """
+        if event.key in [pygame.K_RETURN, pygame.K_DOWN]:
+            self.set_next_active()
+        elif event.key == pygame.K_BACKSPACE:
+            self.pop_back()
+        elif event.key == pygame.K_DELETE:
+            self.pop_front()
+        elif event.key == pygame.K_LEFT:
+            self.cursor_pos -= 1
+        elif event.key == pygame.K_RIGHT:
+            self.cursor_pos += 1
+        elif event.key == pygame.K_HOME:
+            self.cursor_pos = 0
+        elif event.key == pygame.K_END:
+            self.cursor_pos = None
+        elif event.key == pygame.K_UP:
+            self.set_prev_active()
+        elif char := event.unicode:
+            if char not in self.accepted_chars:
+                self.show_error(f'Only letters or numbers or underscore!!')
+            elif len(self) == self.max_length:
+                self.show_error(f'Maximum only {self.max_length} characters!!')
+            else:
+                self.add_char(char)
+
     def draw(self, scene: 'BaseScreen') -> None:
         """
-        It draws the textbox and handles the keyboard events.
+        It draws the textbox, and registers it with the event router of the scene, so clicking it focuses it.
+        The first TextInput of the group listens for the key presses of the whole group.
 
         Args:
           scene (BaseScreen): The screen that the textbox is being drawn on.
         """
-        button = Button(self.question, ..., self.set_active)
-        rect = button.draw(scene)
-        button.modify(self.text.modify(position=pos(rect.topright), width=self.text.width - rect.width, background_color=SCREEN_COLOR, text_is_centered=False, box_is_centered=False), ...).draw(scene)
-
-        if self.active:
-            for event in scene.events:
-                if event.type == pygame.KEYDOWN:
-                    if event.key in [pygame.K_RETURN, pygame.K_DOWN]:
-                        self.set_next_active()
-                        scene.events.clear()
-                    elif event.key == pygame.K_BACKSPACE:
-                        self.pop_back()
-                    elif event.key == pygame.K_DELETE:
-                        self.pop_front()
-                    elif event.key == pygame.K_LEFT:
-                        self.cursor_pos -= 1
-                    elif event.key == pygame.K_RIGHT:
-                        self.cursor_pos += 1
-                    elif event.key == pygame.K_HOME:
-                        self.cursor_pos = 0
-                    elif event.key == pygame.K_END:
-                        self.cursor_pos = None
-                    elif event.key == pygame.K_UP:
-                        self.set_prev_active()
-                        scene.events.clear()
-                    elif char := event.unicode:
-                        if char not in self.accepted_chars:
-                            self.show_error(f'Only letters or numbers or underscore!!')
-                        elif len(self) == self.max_length:
-                            self.show_error(f'Maximum only {self.max_length} characters!!')
-                        else:
-                            self.add_char(char)
-        elif not self.current[0]:
-            for event in scene.events:
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_UP and self.is_at_pos(-1) or event.key == pygame.K_DOWN and self.is_at_pos(0):
-                        self.set_active()
+        rect = self.question.draw()
+        box = self.text.draw()
+        scene.router.register(rect.union(box), self.set_active)
+        if self.is_at_pos(0):
+            scene.router.listen(self.handle_key)
+
+
+class Jobs:
+    """
+    It runs slow work, like talking to the database, on background threads, so the frames keep being drawn while it
+    runs. The finished jobs are handed back through a thread-safe queue, which the render thread drains every frame,
+    so their callbacks run between frames and can safely change the scene.
+
+    Attributes:
+      executor (ThreadPoolExecutor): The threads the work runs on.
+      done (SimpleQueue): The finished jobs, waiting for their callbacks to be run.
+      timings (defaultdict): The latest timings of every kind of job, as tuples of the seconds spent waiting for a
+        thread, running, and waiting for the render thread.
+    """
+    def __init__(self, workers: int = JOB_WORKERS) -> None:
+        """
+        All initial configuration for the jobs is done here.
+
+        Args:
+          workers (int): The maximum number of jobs which run at the same time.
+        """
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='job')
+        self.done: SimpleQueue = SimpleQueue()
+        self.timings: defaultdict[str, deque[tuple[float, float, float]]] = defaultdict(partial(deque, maxlen=JOB_LATENCY_SAMPLES))
+
+    def submit(self, name: str, work: Callable[..., Any], callback: Callable[[Future], Any], *args: Any) -> Future:
+        """
+        It runs the work on a background thread, and the callback on the render thread once the work is done.
+
+        Args:
+          name (str): The kind of job, which its timings are recorded under.
+          work (function): The function which is run in the background.
+          callback (function): The function which is given the finished future, on the render thread.
+          *args (Any): The arguments passed to the work.
+
+        Returns:
+          Future: The future of the work.
+        """
+        stamps = [time.perf_counter()]
+
+        def run() -> Any:
+            stamps.append(time.perf_counter())
+            try:
+                return work(*args)
+            finally:
+                stamps.append(time.perf_counter())
+
+        future = self.executor.submit(run)
+        future.add_done_callback(lambda _: self.done.put((name, stamps, callback, future)))
+        return future
+
+    def drain(self) -> None:
+        """
+        It runs the callbacks of the jobs which have finished since the previous frame.
+        """
+        while True:
+            try:
+                name, stamps, callback, future = self.done.get_nowait()
+            except Empty:
+                return
+            if len(stamps) == 3:
+                submitted, started, finished = stamps
+                self.timings[name].append((started - submitted, finished - started, time.perf_counter() - finished))
+            callback(future)
+
+    def metrics(self, name: str) -> dict[str, int | float]:
+        """
+        It returns how long a kind of job takes, from being submitted to its callback being run.
+
+        Args:
+          name (str): The kind of job.
+
+        Returns:
+          dict[str, int | float]: The number of timed jobs, the mean, 95th percentile and max total latency, and the
+            mean time spent waiting, running and being delivered, in ms.
+        """
+        timings = list(self.timings[name])
+        totals = sorted(map(sum, timings))
+        mean = lambda values: sum(values) / len(values) * 1e3 if values else 0.
+        return {
+            'count': len(timings),
+            'mean_ms': mean(totals),
+            'p95_ms': totals[min(int(.95 * len(totals)), len(totals) - 1)] * 1e3 if totals else 0.,
+            'max_ms': max(totals, default=0.) * 1e3,
+            'queued_ms': mean([timing[0] for timing in timings]),
+            'ran_ms': mean([timing[1] for timing in timings]),
+            'delivered_ms': mean([timing[2] for timing in timings]),
+        }
+
+    def close(self) -> None:
+        """
+        It cancels the jobs which haven't started, without waiting for the running ones.
+        """
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+jobs = Jobs()
+
+
+class Scheduler:
+    """
+    It runs callbacks at a later time on the render thread, between frames, so timers and animations never need a
+    thread of their own. The callbacks wait in a heap ordered by the time they are due, so checking for the due ones
+    every frame only looks at the top of the heap.
+
+    Attributes:
+      clock (function): The monotonic clock the times are measured on, in nanoseconds.
+      heap (list): The waiting timers, as lists of [due, order, callback, args, interval].
+      counter (itertools.count): It orders the timers which are due at the same time by when they were added.
+    """
+    def __init__(self, clock: Callable[[], int] = time.monotonic_ns) -> None:
+        """
+        All initial configuration for the scheduler is done here.
+
+        Args:
+          clock (function): The monotonic clock the times are measured on, in nanoseconds.
+        """
+        self.clock = clock
+        self.heap: list[list] = []
+        self.counter = itertools.count()
+
+    def after(self, delay: float, callback: Callable[..., Any], *args: Any, interval: Optional[float] = None) -> list:
+        """
+        It runs the callback once the delay has passed, and then again every interval if there is one.
+
+        Args:
+          delay (float): The seconds to wait before running the callback.
+          callback (function): The function which is run.
+          *args (Any): The arguments passed to the callback.
+          interval (float, optional): The seconds between the runs of a repeating callback.
+
+        Returns:
+          list: The timer, which can be cancelled.
+        """
+        timer = [self.clock() + int(delay * 1e9), next(self.counter), callback, args, interval and int(interval * 1e9)]
+        heapq.heappush(self.heap, timer)
+        return timer
+
+    def every(self, interval: float, callback: Callable[..., Any], *args: Any) -> list:
+        """
+        It runs the callback every interval, starting one interval from now.
+
+        Args:
+          interval (float): The seconds between the runs of the callback.
+          callback (function): The function which is run.
+          *args (Any): The arguments passed to the callback.
+
+        Returns:
+          list: The timer, which can be cancelled.
+        """
+        return self.after(interval, callback, *args, interval=interval)
+
+    @staticmethod
+    def cancel(timer: list) -> None:
+        """
+        It stops a timer from running again. It is left in the heap, and thrown away once it is due.
+
+        Args:
+          timer (list): The timer returned when it was added.
+        """
+        timer[2] = None
+
+    def run(self) -> int:
+        """
+        It runs the callbacks which are due. A repeating callback which fell behind runs once, and not once for every
+        interval it missed.
+
+        Returns:
+          int: The number of callbacks which were run.
+        """
+        now, ran = self.clock(), 0
+        while self.heap and self.heap[0][0] <= now:
+            timer = heapq.heappop(self.heap)
+            if (callback := timer[2]) is None:
+                continue
+            if interval := timer[4]:
+                timer[0] = max(timer[0] + interval, now + 1)
+                timer[1] = next(self.counter)
+                heapq.heappush(self.heap, timer)
+            callback(*timer[3])
+            ran += 1
+        return ran
+
+    def __len__(self) -> int:
+        """
+        It returns the number of waiting timers.
+
+        Returns:
+          int: The number of timers in the heap, including the cancelled ones which haven't been thrown away yet.
+        """
+        return len(self.heap)
+
+
+scheduler = Scheduler()
+scheduler.every(CURSOR_BLINK, TextInput.toggle_blink)
+
+
+class EventRouter:
+    """
+    It hands the events of a frame to the widgets they are meant for, in a single pass.
+    The widgets register the area they can be clicked in while they are drawn, into a grid of cells covering the
+    screen, so a click only has to be tested against the widgets in its cell. The key presses go to the handlers which
+    are listening for them, like the group of the focused TextInput.
+
+    Attributes:
+      cell_size (int): The width and height of a cell of the grid.
+      cells (defaultdict): The widgets registered in every cell, as tuples of (area, action).
+      listeners (list): The functions which are given the key presses.
+      mouse (tuple): The position of the mouse in this frame.
+    """
+    def __init__(self, cell_size: int = ROUTER_CELL_SIZE) -> None:
+        """
+        All initial configuration for the router is done here.
+
+        Args:
+          cell_size (int): The width and height of a cell of the grid.
+        """
+        self.cell_size = cell_size
+        self.cells: defaultdict[tuple[int, int], list[tuple[pygame.Rect, Callable[[], Any]]]] = defaultdict(list)
+        self.listeners: list[Callable[[Event], Any]] = []
+        self.mouse: tuple[int, int] = (-1, -1)
+
+    def begin(self) -> None:
+        """
+        It forgets the widgets of the previous frame, and reads the position of the mouse once for the whole frame.
+        The lists of the cells are emptied rather than thrown away, so they don't have to be built again every frame.
+        """
+        for cell in self.cells.values():
+            cell.clear()
+        self.listeners.clear()
+        self.mouse = pygame.mouse.get_pos()
+
+    def register(self, area: pygame.Rect, action: Callable[[], Any]) -> None:
+        """
+        It adds a widget which can be clicked to every cell its area overlaps.
+
+        Args:
+          area (pygame.Rect): The area the widget can be clicked in.
+          action (function): The function called when the widget is clicked.
+        """
+        size = self.cell_size
+        entry = area, action
+        for x in range(max(area.left, 0) // size, max(area.right - 1, 0) // size + 1):
+            for y in range(max(area.top, 0) // size, max(area.bottom - 1, 0) // size + 1):
+                self.cells[x, y].append(entry)
+
+    def listen(self, listener: Callable[[Event], Any]) -> None:
+        """
+        It adds a function which is given every key press of the frame.
+
+        Args:
+          listener (function): The function which handles the key presses.
+        """
+        self.listeners.append(listener)
+
+    def hovered(self, area: pygame.Rect) -> bool:
+        """
+        Checks weather the mouse is over an area in this frame.
+
+        Args:
+          area (pygame.Rect): The area to check.
+
+        Returns:
+          bool: Weather the mouse is over the area.
+        """
+        return area.collidepoint(self.mouse)
+
+    def dispatch(self, events: list[Event]) -> None:
+        """
+        It sends the clicks to the widgets under them, and the key presses to the listeners.
+
+        Args:
+          events (list[Event]): The events of the frame.
+        """
+        size = self.cell_size
+        for event in events:
+            if event.type == pygame.MOUSEBUTTONDOWN:
+                x, y = event.pos
+                for area, action in list(self.cells.get((x // size, y // size), ())):
+                    if area.collidepoint(x, y):
+                        action()
+            elif event.type == pygame.KEYDOWN:
+                for listener in self.listeners:
+                    listener(event)
+
+
+class FramePacer:
+    """
+    It decides when the next frame starts, and collects the events which arrive while it waits for it. Every event is
+    given the time it arrived at, on the monotonic clock in nanoseconds, as its `arrived` attribute, so the key presses
+    are timed exactly, instead of at the frame they were handled in. It can pace the frames in three modes:
+      fixed: FPS frames per second.
+      uncapped: as many frames as it can draw, without waiting.
+      adaptive: FPS frames per second while nothing happens, but a key press or a click wakes it up to draw the next
+        frame right away, at most ADAPTIVE_MAX_FPS times per second.
+
+    Attributes:
+      mode (str): The pacing mode, one of FRAME_PACING_MODES.
+      interval (int): The nanoseconds between two frames.
+      min_interval (int): The shortest nanoseconds between two frames, when woken up in adaptive mode.
+      start (int): The time the current frame started at.
+      pending (list): The events which arrived while waiting, which are handed to the next frame.
+      latencies (deque): The latest nanoseconds between a key being pressed and the frame which handled it being shown.
+    """
+    def __init__(self, mode: str = FRAME_PACING, fps: int = FPS) -> None:
+        """
+        All initial configuration for the pacer is done here.
+
+        Args:
+          mode (str): The pacing mode, one of FRAME_PACING_MODES.
+          fps (int): The number of frames per second in the fixed and adaptive modes.
+
+        Raises:
+          ValueError: If the mode is unknown.
+        """
+        if mode not in FRAME_PACING_MODES:
+            raise ValueError(f'Unknown frame pacing {mode!r}, it should be one of {", ".join(FRAME_PACING_MODES)}')
+        self.mode = mode
+        self.interval = 10 ** 9 // fps
+        self.min_interval = 10 ** 9 // ADAPTIVE_MAX_FPS
+        self.start = 0
+        self.pending: list[Event] = []
+        self.latencies: deque[int] = deque(maxlen=INPUT_LATENCY_SAMPLES)
+
+    @staticmethod
+    def stamp(events: list[Event]) -> list[Event]:
+        """
+        It gives the events the current time as the time they arrived at.
+
+        Args:
+          events (list[Event]): The events which just arrived.
+
+        Returns:
+          list[Event]: The same events.
+        """
+        now = time.monotonic_ns()
+        for event in events:
+            event.arrived = now
+        return events
+
+    def poll(self) -> list[Event]:
+        """
+        It returns the events of the frame, which are the ones that arrived while waiting, and the ones since.
+
+        Returns:
+          list[Event]: The events, in the order they arrived.
+        """
+        events, self.pending = self.pending, []
+        events.extend(self.stamp(pygame.event.get()))
+        return events
+
+    def wait(self) -> None:
+        """
+        It waits for the next frame, collecting the events which arrive in the meantime.
+        If a frame took longer than its share, the next one starts right away, and the lost time isn't made up for.
+        """
+        now = time.monotonic_ns()
+        if self.mode == 'uncapped':
+            self.start = now
+            return
+
+        deadline = max(self.start + self.interval, now)
+        while (remaining := deadline - now) >= 10 ** 6:
+            if (event := pygame.event.wait(remaining // 10 ** 6)).type != pygame.NOEVENT:
+                events = self.stamp([event, *pygame.event.get()])
+                self.pending.extend(events)
+                if self.mode == 'adaptive' and any(event.type in URGENT_EVENTS for event in events):
+                    deadline = min(deadline, self.start + self.min_interval)
+            now = time.monotonic_ns()
+        self.start = max(deadline, now)
+
+    def presented(self, events: list[Event]) -> None:
+        """
+        It records how long the key presses of a frame took to be shown, once the frame is on the screen.
+
+        Args:
+          events (list[Event]): The events of the frame.
+        """
+        now = time.monotonic_ns()
+        for event in events:
+            if event.type == pygame.KEYDOWN and (arrived := getattr(event, 'arrived', None)) is not None:
+                self.latencies.append(now - arrived)
+
+    def metrics(self) -> dict[str, int | float]:
+        """
+        It returns how long the latest key presses took to be shown.
+
+        Returns:
+          dict[str, int | float]: The number of timed key presses, and the median, 95th and 99th percentile and max
+            latency, in ms.
+        """
+        latencies = sorted(self.latencies)
+        percentile = lambda fraction: latencies[min(int(fraction * len(latencies)), len(latencies) - 1)] / 1e6 if latencies else 0.
+        return {
+            'count': len(latencies),
+            'p50_ms': percentile(.5),
+            'p95_ms': percentile(.95),
+            'p99_ms': percentile(.99),
+            'max_ms': max(latencies, default=0) / 1e6,
+        }
+
+
+pacer = FramePacer()
 
 
 class BaseScreen:
@@ -630,10 +1554,18 @@ class BaseScreen:
       events (list): The list of events that happened in the scene.
       screen (function): The screen that the scene is drawn on.
       handler (function): The handler which handles the remaining events.
+      dirty_rects (bool): Whether only the parts of the screen that changed are redrawn every frame.
+      drawn (list, optional): What was drawn in the previous frame, when in dirty rectangle mode.
+      router (EventRouter): The router which the widgets register with while they are drawn.
+      scheduler (Scheduler): The timers and animations, which are run at the start of every frame.
     """
     scene: Callable[[], Any] = lambda _: _
     handler: Callable[[], Any] = lambda _: _
     events: list[Event] = []
+    dirty_rects: bool = False
+    drawn: Optional[list] = None
+    router: EventRouter = EventRouter()
+    scheduler: Scheduler = scheduler
 
     def reset(self) -> None:
         """
@@ -649,36 +1581,83 @@ class BaseScreen:
             if event.type == pygame.QUIT:
                 stop()
 
-    def main_loop(self) -> None:
-        """
-        The abstract method for the main loop, which is called every frame.
+    def run_frame(self, profiler: Optional['FrameProfiler'] = None) -> None:
         """
-        screen.fill(SCREEN_COLOR)
+        It draws a single frame, without waiting for the next one.
+        In dirty rectangle mode, only the parts of the screen which changed are cleared and updated.
+        The callbacks of the background jobs which finished since the previous frame, and of the timers which are due,
+        are run before the scene.
+        The events are routed to the widgets after the scene is drawn, once all of them have registered.
+        The events come from the pacer, timestamped as they arrived, and their latency is recorded once they are shown.
 
-        self.events = list(pygame.event.get())
+        Args:
+          profiler (FrameProfiler, optional): The profiler which times every phase of the frame, and draws its overlay.
+        """
+        if self.dirty_rects:
+            dirty.begin()
+        else:
+            screen.fill(SCREEN_COLOR)
+
+        self.events = pacer.poll()
+        self.router.begin()
+        if profiler:
+            profiler.mark('poll')
+        jobs.drain()
+        if profiler:
+            profiler.mark('jobs')
+        self.scheduler.run()
+        if profiler:
+            profiler.mark('timers')
         self.handle_keys()
+        if profiler:
+            profiler.mark('keys')
         self.scene()
+        if profiler:
+            profiler.mark('scene')
+        self.router.dispatch(self.events)
+        if profiler:
+            profiler.mark('dispatch')
         self.handler()
+        if profiler:
+            profiler.mark('handler')
+            profiler.draw()
+            profiler.mark('hud')
 
-        pygame.display.update()
-        clock.tick(FPS)
+        if self.dirty_rects:
+            self.drawn = dirty.present(self.drawn)
+        else:
+            pygame.display.update()
+        pacer.presented(self.events)
+        if profiler:
+            profiler.mark('present')
+
+    def main_loop(self) -> None:
+        """
+        The abstract method for the main loop, which is called every frame.
+        It draws the frame and then waits for the next one as the pacer decides, through the profiler if there is one.
+        """
+        if profiler := mem.get('profiler'):
+            return profiler.run(self)
+        self.run_frame()
+        pacer.wait()
 
 
-def try_connect(database: str) -> Engine:
+def try_connect(database: str, **settings: Any) -> Engine:
     """
     It tries to connect to a database, and returns the engine object if it succeeds.
 
     Args:
       database (str): The address of the database.
+      **settings (Any): The pool and connection settings passed to create_engine.
 
     Returns:
       Engine: The engine object which is connected to the database.
     """
     try:
-        engine = create_engine(database, echo=False)
+        engine = create_engine(database, echo=False, **settings)
         with engine.connect():
             return engine
-    except OperationalError:
+    except (SQLAlchemyError, ImportError):
         pass
 
 
@@ -714,15 +1693,19 @@ def set_value(ctx: DefaultExecutionContext) -> str | None:
     return salt
 
 
-def make_user_id() -> str:
+def make_user_id(ctx: DefaultExecutionContext) -> str:
     """
     Query the database to get the last user id and increment it by 1.
+    It uses the connection of the insert, so it works from whichever thread the user is created on.
+
+    Args:
+      ctx (DefaultExecutionContext): The context of the query
 
     Returns:
       str: The next user id.
     """
-    uid = mem['session'].query(mem['User'].id, func.max(mem['User'].id)).first()[-1]
-    return f'user{uid + 1}'
+    uid = ctx.connection.execute(select(func.max(User.id))).scalar()
+    return f'user{(uid or 0) + 1}'
 
 
 def get_user(session: Session, user: 'User') -> Union['User', None]: